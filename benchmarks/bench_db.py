@@ -0,0 +1,198 @@
+"""
+数据库层和抽取层的基准测试
+
+在临时数据库中分别写入不同规模的名单和点名历史，对每个入口函数计时，
+结果保存为JSON，可用 benchmarks.compare 与之前的结果比较
+
+用法（在项目根目录下）:
+    python -m benchmarks.bench_db
+    python -m benchmarks.bench_db --sizes 1000 100000 --output result.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import platform
+import argparse
+import tempfile
+import statistics
+import atexit
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+# 导入 utils.database 时会初始化数据库，先指向临时文件，避免改动 data/names.db
+_IMPORT_DIR = tempfile.mkdtemp(prefix="randomcall_bench_import_")
+atexit.register(shutil.rmtree, _IMPORT_DIR, True)
+os.environ["RANDOMCALL_DB"] = os.path.join(_IMPORT_DIR, "import.db")
+
+from utils import database
+from utils.draw import DrawPool, draw_names
+from utils.rng import get_rng, configure_rng
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+def use_database(path: str):
+    """让 utils.database 使用指定路径的数据库并建表"""
+    database.DB_PATH = path
+    database.init_db()
+
+def seed(size: int, history_factor: float, rng: random.Random):
+    """写入 size 个姓名和 size*history_factor 条点名历史"""
+    chunk = 50000
+    for start in range(0, size, chunk):
+        database.add_names([f"学生{i:07d}" for i in range(start, min(start + chunk, size))])
+
+    history = int(size * history_factor)
+    base = datetime(2024, 1, 1)
+    conn = sqlite3.connect(database.DB_PATH)
+    try:
+        for start in range(0, history, chunk):
+            conn.executemany(
+                "INSERT INTO history (name, called_time) VALUES (?, ?)",
+                [
+                    (f"学生{rng.randrange(size):07d}",
+                     (base + timedelta(seconds=i * 37)).strftime('%Y-%m-%d %H:%M:%S'))
+                    for i in range(start, min(start + chunk, history))
+                ]
+            )
+        conn.commit()
+    finally:
+        conn.close()
+
+def measure(func: Callable[[], object], repeat: int,
+            setup: Optional[Callable[[], None]] = None) -> Dict[str, float]:
+    """执行 repeat 次并统计耗时（毫秒）"""
+    times = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    times.sort()
+    return {
+        "runs": repeat,
+        "min_ms": times[0],
+        "median_ms": statistics.median(times),
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "max_ms": times[-1],
+    }
+
+def simulate_roll(pool: DrawPool, min_speed: int = 50, max_speed: int = 200, draw_count: int = 1):
+    """
+    按 MainWindow.update_roll 的逻辑模拟一次完整点名（不含界面绘制）：
+    间隔从 min_speed 每次增加10直到 max_speed，最后一次抽取并记录
+    """
+    remaining = pool.available()
+    get_rng().shuffle(remaining)
+    interval = min_speed
+    selected = None
+    while True:
+        if not remaining:
+            remaining = pool.available()
+            get_rng().shuffle(remaining)
+        if draw_count > 1:
+            get_rng().sample(remaining, min(draw_count, len(remaining)))
+        else:
+            selected = get_rng().choice(remaining)
+            remaining.remove(selected)
+        interval = min(interval + 10, max_speed)
+        if interval >= max_speed:
+            if draw_count > 1:
+                return draw_names(draw_count, pool)
+            pool.record([selected])
+            return [selected]
+
+def run_size(size: int, work_dir: str, history_factor: float, seed_value: int) -> Dict[str, dict]:
+    rng = random.Random(seed_value)
+    configure_rng({"mode": "seeded", "seed": seed_value})
+    path = os.path.join(work_dir, f"bench_{size}.db")
+    use_database(path)
+
+    start = time.perf_counter()
+    seed(size, history_factor, rng)
+    print(f"[{size}] 写入测试数据 {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+    # 大名单的全量操作较慢，减少重复次数
+    heavy = 3 if size >= 1000000 else 10
+    results = {}
+
+    def bench(name, func, repeat, setup=None):
+        results[name] = measure(func, repeat, setup)
+        print(f"[{size}] {name}: 中位数 {results[name]['median_ms']:.3f} ms", file=sys.stderr)
+
+    bench("get_names", database.get_names, heavy)
+    bench("get_name_ids", database.get_name_ids, heavy)
+    bench("get_name_keys", database.get_name_keys, heavy)
+    bench("count_names", database.count_names, 20)
+
+    batch = iter(range(10 ** 9))
+    pending: List[List[str]] = []
+
+    def new_batch():
+        pending.append([f"新增{next(batch)}" for _ in range(1000)])
+
+    bench("add_names_1000", lambda: database.add_names(pending[-1]), 10, new_batch)
+    bench("delete_names_1000", lambda: database.delete_names(pending.pop()), 10)
+
+    names = database.get_names()
+    bench("record_called_name", lambda: database.record_called_name(rng.choice(names)), 50)
+    bench("record_called_names_10",
+          lambda: database.record_called_names(rng.sample(names, 10)), 20)
+    bench("get_called_history_50", lambda: database.get_called_history(50), 50)
+    bench("count_history", database.count_history, heavy)
+    bench("get_call_counts", database.get_call_counts, heavy)
+    bench("get_cycle_bits", database.get_cycle_bits, 20)
+    bench("get_roster_version", database.get_roster_version, 50)
+
+    backup_path = os.path.join(work_dir, f"bench_{size}_backup.db")
+    bench("backup_database", lambda: database.backup_database(backup_path, sleep=0),
+          1 if size >= 1000000 else 3)
+
+    pool = DrawPool(recent_size=10)
+    bench("pool_reload", pool.reload, heavy)
+    bench("roll_single", lambda: simulate_roll(pool), 20)
+    bench("roll_batch_5", lambda: simulate_roll(pool, draw_count=5), 20)
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="数据库层和抽取层基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="名单规模")
+    parser.add_argument('--history-factor', type=float, default=2.0,
+                        help="点名历史条数 = 名单规模 × 该系数")
+    parser.add_argument('--seed', type=int, default=20240101, help="随机种子")
+    parser.add_argument('--output', help="结果JSON路径（默认 benchmarks/results/时间.json）")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    report = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "history_factor": args.history_factor,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+
+    work_dir = tempfile.mkdtemp(prefix="randomcall_bench_")
+    try:
+        for size in args.sizes:
+            report["results"][str(size)] = run_size(size, work_dir, args.history_factor, args.seed)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果已保存到 {output}")
+
+if __name__ == '__main__':
+    main()
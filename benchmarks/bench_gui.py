@@ -0,0 +1,225 @@
+"""
+界面延迟基准测试（在 QT_QPA_PLATFORM=offscreen 下运行，不需要显示器）
+
+每个名单规模在单独的子进程中测量（包含首次导入模块的冷启动开销）：
+主窗口首次绘制时间、各子窗口打开延迟、apply_theme 耗时和点名滚动的帧间隔
+结果JSON的格式与 benchmarks.bench_db 相同，可用 benchmarks.compare 比较
+
+用法（在项目根目录下）:
+    python -m benchmarks.bench_gui
+    python -m benchmarks.bench_gui --sizes 100 10000 --output gui.json
+    python -m benchmarks.bench_gui --prewarm   # 等空闲预热完成后再测量子窗口打开
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+DEFAULT_SIZES = [100, 10000, 100000]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+THEMES = [("light", "classic"), ("dark", "retro"), ("light", "modern"), ("dark", "tech")]
+
+def stats(times):
+    """耗时列表（毫秒）的统计，格式与 bench_db.measure 相同"""
+    times = sorted(times)
+    return {
+        "runs": len(times),
+        "min_ms": times[0],
+        "median_ms": times[len(times) // 2] if len(times) % 2 else
+                     (times[len(times) // 2 - 1] + times[len(times) // 2]) / 2,
+        "p95_ms": times[min(len(times) - 1, int(len(times) * 0.95))],
+        "max_ms": times[-1],
+    }
+
+def run_worker(size: int, db_path: str, roll_seconds: float, prewarm: bool = False) -> dict:
+    """在当前进程中测量一个名单规模（由父进程以子进程方式调用）"""
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QObject, QEvent, QEventLoop, QTimer
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    # bench_db 在导入 utils.database 之前把数据库指向临时文件
+    from benchmarks.bench_db import use_database
+    from utils import database
+    from utils.metrics import registry
+
+    use_database(db_path)
+    for start in range(0, size, 50000):
+        database.add_names([f"学生{i:07d}" for i in range(start, min(start + 50000, size))])
+
+    import main
+
+    class BenchMainWindow(main.MainWindow):
+        """关闭后台备份、卡顿监视和关联文件，避免影响计时和写入真实数据目录；按选项开关空闲预热"""
+        def load_config(self):
+            config = json.loads(json.dumps(super().load_config()))
+            config.setdefault("backup", {})["enabled"] = False
+            config.setdefault("watchdog", {})["enabled"] = False
+            config.setdefault("sync", {})["source"] = ""
+            config.setdefault("metrics", {})["enabled"] = True
+            config["prewarm"] = dict(config.get("prewarm", {}), enabled=prewarm, delay_ms=0)
+            return config
+
+    class PaintWatcher(QObject):
+        """记录目标控件第一次收到绘制事件的时间"""
+        def __init__(self, widget):
+            super().__init__()
+            self.painted = None
+            self.paints = 0
+            widget.installEventFilter(self)
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                self.paints += 1
+                if self.painted is None:
+                    self.painted = time.perf_counter()
+            return False
+
+    def wait(condition, timeout=10.0):
+        deadline = time.perf_counter() + timeout
+        while not condition() and time.perf_counter() < deadline:
+            app.processEvents(QEventLoop.AllEvents, 10)
+
+    def idle():
+        """处理完所有待处理事件（包括延迟到事件循环空闲时的绘制）"""
+        loop = QEventLoop()
+        QTimer.singleShot(0, loop.quit)
+        loop.exec_()
+
+    results = {}
+
+    # 主窗口：构造到第一次绘制
+    start = time.perf_counter()
+    window = BenchMainWindow()
+    constructed = time.perf_counter()
+    watcher = PaintWatcher(window)
+    window.show()
+    wait(lambda: watcher.painted is not None)
+    results["main_construct"] = stats([(constructed - start) * 1000])
+    results["main_first_paint"] = stats([((watcher.painted or time.perf_counter()) - start) * 1000])
+    if prewarm:
+        # 预热完成所需的总时间（期间事件循环保持响应）
+        start = time.perf_counter()
+        wait(window.prewarm.is_idle, 60.0)
+        results["prewarm_total"] = stats([(time.perf_counter() - start) * 1000])
+
+    # 子窗口：第一次打开（冷）和再次打开（热）
+    openers = [
+        ("change", window.open_change_window, lambda: window.change_window),
+        ("settings", window.open_settings, lambda: window.settings_window),
+        ("simple", window.open_simple_mode, lambda: window.simple_window),
+    ]
+    for name, opener, target in openers:
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            opener()
+            idle()
+            times.append((time.perf_counter() - start) * 1000)
+            target().hide()
+            window.show()
+            idle()
+        results[f"open_{name}_cold"] = stats(times[:1])
+        results[f"open_{name}_warm"] = stats(times[1:])
+
+    # 主题切换
+    times = []
+    for _ in range(3):
+        for theme, style in THEMES:
+            config = dict(window.config["theme"], main=theme, style=style)
+            start = time.perf_counter()
+            window.apply_theme(config)
+            idle()
+            times.append((time.perf_counter() - start) * 1000)
+    results["apply_theme"] = stats(times)
+
+    # 点名滚动：单人和多人模式，统计实际帧间隔、抖动和每帧耗时
+    for mode, count in (("single", 1), ("batch_5", 5)):
+        registry.reset()
+        window.count_spin.setValue(count)
+        label = window.result_label if count == 1 else window.batch_widget
+        painter = PaintWatcher(label)
+        start = time.perf_counter()
+        window.toggle_roll()
+        wait(lambda: not window.is_rolling, roll_seconds)
+        if window.is_rolling:
+            window.toggle_roll()
+        duration = (time.perf_counter() - start) * 1000
+        snapshot = registry.snapshot()["histograms"]
+        for metric in ("roll.interval_ms", "roll.jitter_ms", "roll.tick_ms"):
+            summary = snapshot.get(metric, {})
+            if summary.get("count"):
+                results[f"roll_{mode}_{metric.split('.')[1]}"] = {
+                    "runs": summary["count"],
+                    "min_ms": summary["min"],
+                    "median_ms": summary["p50"],
+                    "p95_ms": summary["p95"],
+                    "max_ms": summary["max"],
+                }
+        # 整次点名的平均每帧时间（帧数为结果控件的绘制次数）
+        results[f"roll_{mode}_per_frame"] = stats([duration / max(1, painter.paints)])
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="界面延迟基准测试")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="名单规模")
+    parser.add_argument('--roll-seconds', type=float, default=15.0, help="单次点名最长等待时间")
+    parser.add_argument('--prewarm', action='store_true', help="开启空闲预热，预热完成后再打开子窗口")
+    parser.add_argument('--output', help="结果JSON路径（默认 benchmarks/results/gui_时间.json）")
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker is not None:
+        json.dump(run_worker(args.worker, args.db, args.roll_seconds, args.prewarm), sys.stdout)
+        return
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"gui_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    report = {
+        "meta": {
+            "time": datetime.now().isoformat(timespec='seconds'),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qpa": os.environ["QT_QPA_PLATFORM"],
+            "prewarm": args.prewarm,
+        },
+        "results": {},
+    }
+
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    work_dir = tempfile.mkdtemp(prefix="randomcall_gui_bench_")
+    try:
+        for size in args.sizes:
+            db_path = os.path.join(work_dir, f"gui_{size}.db")
+            proc = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_gui', '--worker', str(size),
+                 '--db', db_path, '--roll-seconds', str(args.roll_seconds)]
+                + (['--prewarm'] if args.prewarm else []),
+                cwd=root, capture_output=True, text=True, encoding='utf-8'
+            )
+            if proc.returncode != 0:
+                print(proc.stderr, file=sys.stderr)
+                raise SystemExit(f"规模 {size} 的测量失败")
+            # 子进程的标准输出最后一行是结果JSON
+            results = json.loads(proc.stdout.strip().splitlines()[-1])
+            report["results"][str(size)] = results
+            print(f"[{size}] 首次绘制 {results['main_first_paint']['median_ms']:.1f} ms, "
+                  f"名单窗口 {results['open_change_cold']['median_ms']:.1f} ms", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"结果已保存到 {output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+比较两次基准测试结果，任一项中位数变慢超过阈值时以非零状态退出
+
+用法（在项目根目录下）:
+    python -m benchmarks.compare 基准结果.json 本次结果.json --threshold 0.2
+"""
+import sys
+import json
+import argparse
+from typing import List, Tuple
+
+def load_results(path: str) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)["results"]
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float
+            ) -> List[Tuple[str, str, float, float, float, bool]]:
+    """
+    返回 (规模, 测试项, 基准中位数, 本次中位数, 变化比例, 是否退化)
+    两次中位数都低于 min_ms 的测试项只比较不判定退化（避免计时噪声）
+    """
+    rows = []
+    for size, benches in current.items():
+        for name, stats in benches.items():
+            base = baseline.get(size, {}).get(name)
+            if base is None:
+                continue
+            before, after = base["median_ms"], stats["median_ms"]
+            change = (after - before) / before if before > 0 else 0.0
+            regressed = change > threshold and max(before, after) >= min_ms
+            rows.append((size, name, before, after, change, regressed))
+    return rows
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="比较基准测试结果")
+    parser.add_argument('baseline', help="基准结果JSON")
+    parser.add_argument('current', help="本次结果JSON")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="中位数变慢超过该比例视为退化（默认0.2即20%%）")
+    parser.add_argument('--min-ms', type=float, default=0.5,
+                        help="低于该耗时（毫秒）的测试项不判定退化")
+    args = parser.parse_args(argv)
+
+    rows = compare(load_results(args.baseline), load_results(args.current),
+                   args.threshold, args.min_ms)
+    regressions = 0
+    for size, name, before, after, change, regressed in rows:
+        mark = "退化" if regressed else ""
+        regressions += regressed
+        print(f"{size:>8} {name:<24} {before:>10.3f} -> {after:>10.3f} ms {change:+7.1%} {mark}")
+    print(f"共比较 {len(rows)} 项，退化 {regressions} 项（阈值 {args.threshold:.0%}）")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -27,6 +27,7 @@ def build_app():
         '--hidden-import=PyQt5.QtGui',
         '--hidden-import=PyQt5.QtWidgets',
         '--hidden-import=pandas',
+        '--hidden-import=pypinyin',  # 拼音首字母搜索（utils/search.py 中按需导入）
     ]
     
     # 执行打包
@@ -1,30 +1,245 @@
+import os
+import time
+import bisect
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, 
-    QListWidget, QLineEdit, QPushButton,
-    QFileDialog, QMessageBox, QLabel
+    QTableView, QHeaderView, QAbstractItemView, QLineEdit, QPushButton,
+    QFileDialog, QMessageBox, QLabel, QInputDialog, QProgressDialog,
+    QDialog, QDialogButtonBox, QComboBox, QDateEdit, QCheckBox, QFormLayout
 )
-from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QDate, QTimer, QAbstractListModel, QModelIndex
 import pandas as pd
 from utils.database import (
-    get_names, add_name, delete_name, 
-    add_names, delete_names, clear_names
+    add_name,
+    add_names, bulk_delete_names, rename_names, clear_names, set_attributes,
+    count_names, count_history, iter_names, iter_history,
+    get_roster_version, get_roster_changes
 )
+from utils.exporter import write_rows, ExportCancelled
+from utils.search import NameIndex
+from utils.draw import partition_names
+from utils.importer import iter_excel_names, count_excel_rows, sheet_names
+from utils.metrics import registry
 import logging
 
-# 配置日志
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ExportWorker(QThread):
+    """后台导出线程（数据在线程内按批读取并写出）"""
+    progress = pyqtSignal(int)
+    export_finished = pyqtSignal(int, str)  # (写出行数, 错误信息)，取消时行数为-1
+    
+    def __init__(self, file_path, file_type, header, make_batches):
+        super().__init__()
+        self.file_path = file_path
+        self.file_type = file_type
+        self.header = header
+        self.make_batches = make_batches
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        try:
+            written = write_rows(
+                self.file_path, self.file_type, self.header, self.make_batches(),
+                progress=self.progress.emit, cancelled=lambda: self.cancelled
+            )
+            self.export_finished.emit(written, "")
+        except ExportCancelled:
+            if os.path.exists(self.file_path):
+                os.remove(self.file_path)
+            self.export_finished.emit(-1, "")
+        except Exception as e:
+            self.export_finished.emit(0, str(e))
+
+class HistoryExportDialog(QDialog):
+    """点名历史导出选项（格式和日期范围）"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('导出点名历史')
+        layout = QFormLayout()
+        
+        self.format_combo = QComboBox()
+        self.format_combo.addItem('Excel', 'excel')
+        self.format_combo.addItem('CSV', 'csv')
+        self.format_combo.addItem('TXT', 'txt')
+        layout.addRow("格式:", self.format_combo)
+        
+        self.all_check = QCheckBox("全部时间")
+        self.all_check.setChecked(True)
+        layout.addRow(self.all_check)
+        
+        today = QDate.currentDate()
+        self.start_edit = QDateEdit(today.addMonths(-1))
+        self.end_edit = QDateEdit(today)
+        for edit in (self.start_edit, self.end_edit):
+            edit.setCalendarPopup(True)
+            edit.setDisplayFormat("yyyy-MM-dd")
+            edit.setEnabled(False)
+            self.all_check.toggled.connect(lambda checked, e=edit: e.setEnabled(not checked))
+        layout.addRow("开始日期:", self.start_edit)
+        layout.addRow("结束日期:", self.end_edit)
+        
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+        self.setLayout(layout)
+
+    def options(self):
+        """返回 (格式, 开始日期, 结束日期)，不限日期时为None"""
+        if self.all_check.isChecked():
+            return self.format_combo.currentData(), None, None
+        return (
+            self.format_combo.currentData(),
+            self.start_edit.date().toString("yyyy-MM-dd"),
+            self.end_edit.date().toString("yyyy-MM-dd")
+        )
+
+class NameListModel(QAbstractListModel):
+    """
+    名单列表模型：names 保存全部姓名（行号与搜索索引一致，删除的位置为None），
+    rows 是当前显示的行号。加载时逐批追加并建立搜索索引，
+    搜索时用索引的查询结果直接替换 rows，不需要逐行隐藏
+    """
+    rename_requested = pyqtSignal(int, str)  # (行号, 新姓名)，由窗口写入数据库后调用 rename
+
+    EMPTY_TEXT = "名单为空"
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.name_index = NameIndex()
+        self.rows = []
+        self.query = ''
+        self.loaded = False  # 加载完成后名单为空时显示 EMPTY_TEXT
+
+    def show_empty(self):
+        return self.loaded and not self.rows and len(self.name_index) == 0
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.rows) or int(self.show_empty())
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if not self.rows:
+            return self.EMPTY_TEXT if role == Qt.DisplayRole else None
+        if role in (Qt.DisplayRole, Qt.EditRole, Qt.UserRole):
+            return self.names[self.rows[index.row()]]
+        return None
+
+    def flags(self, index):
+        if not self.rows:
+            return Qt.ItemIsEnabled
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.EditRole or not self.rows:
+            return False
+        self.rename_requested.emit(self.rows[index.row()], str(value).strip())
+        return False
+
+    def source_row(self, index):
+        """视图中的位置对应的行号（提示行为None）"""
+        return self.rows[index.row()] if self.rows and index.isValid() else None
+
+    def clear(self):
+        """清空列表和搜索索引（保留搜索条件）"""
+        self.beginResetModel()
+        self.names = []
+        self.name_index = NameIndex()
+        self.rows = []
+        self.loaded = False
+        self.endResetModel()
+
+    def set_loaded(self):
+        self.beginResetModel()
+        self.loaded = True
+        self.endResetModel()
+
+    def append(self, names):
+        """追加姓名并加入搜索索引，符合当前搜索条件的立即显示"""
+        visible = []
+        for name in names:
+            self.names.append(name)
+            row = self.name_index.add(name)
+            if not self.query or self.name_index.matches(row, self.query):
+                visible.append(row)
+        if not visible:
+            return
+        if not self.rows:
+            # 从提示行或空列表变为有内容
+            self.beginResetModel()
+            self.rows = visible
+            self.endResetModel()
+            return
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(visible) - 1)
+        self.rows.extend(visible)
+        self.endInsertRows()
+
+    def remove(self, source_rows):
+        """删除若干行（rows 保持升序，按位置逐个移除以保留滚动位置和其他选中项）"""
+        for row in sorted(source_rows, reverse=True):
+            position = bisect.bisect_left(self.rows, row)
+            if position < len(self.rows) and self.rows[position] == row:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self.rows[position]
+                self.endRemoveRows()
+            self.names[row] = None
+            self.name_index.remove(row)
+        if self.show_empty():
+            self.beginResetModel()
+            self.endResetModel()
+
+    def rename(self, row, name):
+        self.names[row] = name
+        self.name_index.update(row, name)
+        position = bisect.bisect_left(self.rows, row)
+        if position < len(self.rows) and self.rows[position] == row:
+            changed = self.createIndex(position, 0)
+            self.dataChanged.emit(changed, changed)
+
+    def filter(self, query):
+        """按搜索条件重建显示的行"""
+        self.query = query.strip()
+        self.beginResetModel()
+        self.rows = self.name_index.search(self.query)
+        self.endResetModel()
+
 class ChangeListWindow(QWidget):
-    names_changed = pyqtSignal()  # 名单变化信号
+    names_changed = pyqtSignal(dict)  # 名单变化信号（携带变化内容，见 get_roster_changes）
+    
+    # 合并通知的时间窗口（毫秒）
+    NOTIFY_DELAY = 150
     
-    def __init__(self, main_window=None):
+    # 分批加载名单时每批的条数
+    LOAD_CHUNK = 1000
+    
+    def __init__(self, main_window=None, load=True):
         super().__init__()
         self.main_window = main_window
+        self.worker = None
+        self.export_progress = None
+        self.load_generation = 0  # 每次加载名单加一，使未完成的分批加载失效
+        
+        # 名单变化通知：短时间内的多次修改合并为一次
+        self.roster_version = get_roster_version()
+        self.attributes_changed = False
+        self.notify_timer = QTimer(self)
+        self.notify_timer.setSingleShot(True)
+        self.notify_timer.setInterval(self.NOTIFY_DELAY)
+        self.notify_timer.timeout.connect(self.emit_names_changed)
         self.setWindowTitle('名单管理')
         self.resize(600, 400)
         self.init_ui()
-        self.load_names()
+        if load:
+            self.load_names()
         
         if main_window:
             self.apply_theme(main_window.config["theme"])
@@ -39,25 +254,45 @@ class ChangeListWindow(QWidget):
         title_label.setStyleSheet("font-size: 18px; font-weight: bold; margin-bottom: 15px;")
         layout.addWidget(title_label)
 
-        # 名单列表
-        self.list_widget = QListWidget()
-        self.list_widget.setSelectionMode(QListWidget.MultiSelection)
-        self.list_widget.setStyleSheet("""
-            QListWidget {
+        # 搜索框
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索姓名或拼音首字母")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setStyleSheet("padding: 5px;")
+        self.search_edit.textChanged.connect(self.filter_names)
+        layout.addWidget(self.search_edit)
+
+        # 名单列表（模型保存姓名和搜索索引）
+        # 用单列、固定行高的表格视图显示：行数变化时不需要像 QListView 那样逐行重新布局，
+        # 搜索结果有几万行时也能立即显示
+        self.name_model = NameListModel(self)
+        self.name_model.rename_requested.connect(self.rename_item)
+        self.name_view = QTableView()
+        self.name_view.setModel(self.name_model)
+        self.name_view.horizontalHeader().hide()
+        self.name_view.horizontalHeader().setStretchLastSection(True)
+        self.name_view.verticalHeader().hide()
+        self.name_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.name_view.setShowGrid(False)
+        self.name_view.setSelectionMode(QAbstractItemView.MultiSelection)
+        self.name_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.name_view.setEditTriggers(QAbstractItemView.DoubleClicked | QAbstractItemView.EditKeyPressed)
+        self.name_view.setStyleSheet("""
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
                 padding: 5px;
                 font-size: 14px;
             }
-            QListWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
-            QListWidget::item:selected {
+            QTableView::item:selected {
                 background: #2196F3;
                 color: white;
             }
         """)
-        layout.addWidget(self.list_widget)
+        layout.addWidget(self.name_view)
 
         # 添加姓名部分
         add_layout = QHBoxLayout()
@@ -106,17 +341,30 @@ class ChangeListWindow(QWidget):
         import_export_layout.addWidget(self.export_excel_btn)
         import_export_layout.addWidget(self.export_csv_btn)
         import_export_layout.addWidget(self.export_txt_btn)
+        
+        self.export_history_btn = QPushButton('导出历史')
+        self.export_history_btn.clicked.connect(self.export_history)
+        import_export_layout.addWidget(self.export_history_btn)
+        
+        self.link_source_btn = QPushButton('关联文件')
+        self.link_source_btn.setToolTip('关联名单文件，文件变化后自动同步名单')
+        self.link_source_btn.clicked.connect(self.link_source_file)
+        self.link_source_btn.setVisible(self.main_window is not None)
+        import_export_layout.addWidget(self.link_source_btn)
         layout.addLayout(import_export_layout)
 
         # 底部操作按钮
         bottom_layout = QHBoxLayout()
         self.select_all_btn = QPushButton('全选')
         self.clear_all_btn = QPushButton('清空名单')
+        self.partition_btn = QPushButton('随机分组')
         
         self.select_all_btn.clicked.connect(self.select_all_names)
         self.clear_all_btn.clicked.connect(self.clear_all_names)
+        self.partition_btn.clicked.connect(self.partition_groups)
         
         bottom_layout.addWidget(self.select_all_btn)
+        bottom_layout.addWidget(self.partition_btn)
         bottom_layout.addWidget(self.clear_all_btn)
         layout.addLayout(bottom_layout)
 
@@ -124,19 +372,55 @@ class ChangeListWindow(QWidget):
 
     def load_names(self):
         """加载名单列表"""
+        for _ in self.load_names_slices():
+            pass
+
+    def load_names_slices(self):
+        """
+        分批加载名单列表，每批 LOAD_CHUNK 条之后让出一次（供空闲预热分片执行）
+        搜索索引随每批一起建立，打开窗口后第一次搜索不需要再建索引
+        加载过程中再次加载名单时，未完成的这次加载直接结束
+        """
+        self.load_generation += 1
+        generation = self.load_generation
         try:
-            self.list_widget.clear()
-            names = get_names()
-            if names:
-                self.list_widget.addItems(names)
-                logger.info(f"成功加载 {len(names)} 个姓名")
+            self.name_model.clear()
+            count = 0
+            for batch in iter_names(self.LOAD_CHUNK):
+                if count:
+                    yield
+                    if generation != self.load_generation:
+                        return
+                self.name_model.append([name for (name,) in batch])
+                count += len(batch)
+            self.name_model.set_loaded()
+            if count:
+                logger.info(f"成功加载 {count} 个姓名")
             else:
-                self.list_widget.addItem("名单为空")
                 logger.info("名单为空")
         except Exception as e:
             logger.error(f"加载名单失败: {e}")
             QMessageBox.critical(self, "错误", f"加载名单失败:\n{str(e)}")
 
+    def filter_names(self, text):
+        """按输入实时筛选列表（用搜索索引的结果替换显示的行，不逐行隐藏）"""
+        self.name_model.filter(text)
+
+    def names_modified(self, attributes=False):
+        """列表内容变化后安排发送名单变化信号（搜索索引已随列表一起更新）"""
+        self.attributes_changed = self.attributes_changed or attributes
+        self.notify_timer.start()
+
+    def emit_names_changed(self):
+        """发送合并后的名单变化（自上次通知以来的增删改）"""
+        diff = get_roster_changes(self.roster_version)
+        diff["attributes_changed"] = self.attributes_changed
+        self.roster_version = diff["version"]
+        self.attributes_changed = False
+        if diff["full"] or diff["added"] or diff["removed"] or diff["renamed"] \
+                or diff["attributes_changed"]:
+            self.names_changed.emit(diff)
+
     def add_single_name(self):
         """添加单个姓名"""
         name = self.name_edit.text().strip()
@@ -145,9 +429,9 @@ class ChangeListWindow(QWidget):
             
         try:
             if add_name(name):
-                self.list_widget.addItem(name)
+                self.name_model.append([name])
                 self.name_edit.clear()
-                self.names_changed.emit()
+                self.names_modified()
                 logger.info(f"成功添加姓名: {name}")
             else:
                 QMessageBox.warning(self, '提示', '该姓名已存在！')
@@ -157,29 +441,63 @@ class ChangeListWindow(QWidget):
 
     def delete_selected_name(self):
         """删除选中姓名"""
-        selected_items = self.list_widget.selectedItems()
-        if not selected_items:
+        rows = sorted(
+            row for row in map(self.name_model.source_row, self.name_view.selectionModel().selectedRows())
+            if row is not None
+        )
+        if not rows:
             QMessageBox.warning(self, '提示', '请先选择要删除的姓名')
             return
             
         try:
-            names = [item.text() for item in selected_items]
-            deleted_count = delete_names(names)
+            names = [self.name_model.names[row] for row in rows]
+            outcomes = bulk_delete_names(names)
+            deleted_count = sum(outcomes.values())
             if deleted_count > 0:
-                for item in selected_items:
-                    self.list_widget.takeItem(self.list_widget.row(item))
-                self.names_changed.emit()
+                if deleted_count > 1000:
+                    # 大批量删除时整体重建比逐项移除更快
+                    self.load_names()
+                else:
+                    self.name_model.remove(
+                        [row for row, name in zip(rows, names) if outcomes.get(name)]
+                    )
+                self.names_modified()
                 logger.info(f"成功删除 {deleted_count} 个姓名")
+                missing = len(names) - deleted_count
+                if missing:
+                    QMessageBox.warning(self, '提示', f'{missing} 个姓名已不存在，未删除')
             else:
                 QMessageBox.warning(self, '提示', '删除失败，姓名可能不存在')
         except Exception as e:
             logger.error(f"删除姓名失败: {e}")
             QMessageBox.critical(self, "错误", f"删除姓名失败:\n{str(e)}")
 
+    def rename_item(self, row, new_name):
+        """双击编辑姓名后重命名（保留点名历史和属性）"""
+        old_name = self.name_model.names[row]
+        if old_name is None or new_name == old_name:
+            return
+            
+        messages = {
+            'missing': '原姓名已不存在',
+            'exists': '该姓名已存在！',
+            'invalid': '姓名不能为空',
+        }
+        try:
+            status = rename_names([(old_name, new_name)]).get(old_name)
+            if status == 'renamed':
+                self.name_model.rename(row, new_name)
+                self.names_modified()
+                logger.info(f"成功重命名: {old_name} -> {new_name}")
+            else:
+                QMessageBox.warning(self, '提示', messages.get(status, '重命名失败'))
+        except Exception as e:
+            logger.error(f"重命名失败: {e}")
+            QMessageBox.critical(self, "错误", f"重命名失败:\n{str(e)}")
+
     def select_all_names(self):
         """选择所有姓名"""
-        for i in range(self.list_widget.count()):
-            self.list_widget.item(i).setSelected(True)
+        self.name_view.selectAll()
 
     def clear_all_names(self):
         """清空所有姓名"""
@@ -192,7 +510,7 @@ class ChangeListWindow(QWidget):
             try:
                 if clear_names():
                     self.load_names()
-                    self.names_changed.emit()
+                    self.names_modified()
                     logger.info("成功清空名单")
             except Exception as e:
                 logger.error(f"清空名单失败: {e}")
@@ -212,37 +530,170 @@ class ChangeListWindow(QWidget):
         if not file_path:
             return
             
+        if file_type == 'excel' and not file_path.lower().endswith('.xls'):
+            self.import_excel_stream(file_path)
+            return
+            
+        start = time.perf_counter()
         try:
             # 读取文件
             if file_type == 'excel':
-                df = pd.read_excel(file_path)
+                df = pd.read_excel(file_path, dtype=str)
             elif file_type == 'csv':
-                df = pd.read_csv(file_path)
+                df = pd.read_csv(file_path, dtype=str)
             else:  # txt
                 with open(file_path, 'r', encoding='utf-8') as f:
                     names = [line.strip() for line in f if line.strip()]
                     df = pd.DataFrame(names, columns=['Name'])
             
             # 获取姓名列
-            new_names = df.iloc[:, 0].astype(str).dropna().unique().tolist()
+            name_column = df.iloc[:, 0].astype(str)
+            new_names = name_column.dropna().unique().tolist()
+            
+            # 其余列作为姓名属性（列名为属性名）
+            attributes = []
+            for column in df.columns[1:]:
+                values = df[column]
+                mask = values.notna()
+                attributes.extend(
+                    (name.strip(), str(column).strip(), str(value).strip())
+                    for name, value in zip(name_column[mask], values[mask])
+                )
             
             # 批量添加
             added = add_names(new_names)
-            if added > 0:
-                self.load_names()
-                self.names_changed.emit()
-                QMessageBox.information(self, "导入完成", 
-                    f"成功导入 {added} 个姓名\n重复姓名已自动过滤")
-                logger.info(f"成功导入 {added} 个姓名")
-            else:
-                QMessageBox.warning(self, "导入结果", 
-                    "没有导入新姓名（可能全部已存在或文件为空）")
+            attr_count = set_attributes(attributes)
+            self.record_import(len(df), start)
+            self.finish_import(added, attr_count)
         except Exception as e:
             logger.error(f"导入失败: {e}")
             QMessageBox.critical(self, "导入错误", f"导入文件时出错:\n{str(e)}")
 
-    def export_names(self, file_type):
-        """导出名单"""
+    def link_source_file(self):
+        """关联或取消关联名单源文件（关联后名单与文件保持一致）"""
+        current = self.main_window.config.get("sync", {}).get("source", "")
+        if current:
+            reply = QMessageBox.question(
+                self, '关联文件',
+                f'当前已关联:\n{current}\n\n是否取消关联？',
+                QMessageBox.Yes | QMessageBox.No,
+                QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                self.main_window.link_source("")
+            return
+        
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "选择名单文件", "", "名单文件 (*.xlsx *.csv *.txt);;所有文件 (*.*)")
+        if not file_path:
+            return
+        reply = QMessageBox.question(
+            self, '关联文件',
+            '关联后名单将与该文件保持一致，文件中没有的姓名会被删除。\n是否继续？',
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        if reply == QMessageBox.Yes:
+            self.main_window.link_source(file_path)
+
+    def import_excel_stream(self, file_path):
+        """流式导入Excel（只读模式逐行读取，自动识别表头和姓名列，可合并多个工作表）"""
+        try:
+            merge_sheets = True
+            sheets = sheet_names(file_path)
+            if len(sheets) > 1:
+                reply = QMessageBox.question(
+                    self, '多个工作表',
+                    f'工作簿包含 {len(sheets)} 个工作表，是否全部合并导入？\n选择"否"只导入第一个工作表',
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.Yes
+                )
+                merge_sheets = reply == QMessageBox.Yes
+            
+            total = count_excel_rows(file_path, merge_sheets)
+            progress = QProgressDialog("正在导入...", "取消", 0, total, self)
+            progress.setWindowTitle("导入Excel")
+            progress.setWindowModality(Qt.WindowModal)
+            progress.setMinimumDuration(300)
+            
+            start = time.perf_counter()
+            added = attr_count = rows_read = 0
+            for names, attributes, count in iter_excel_names(file_path, merge_sheets):
+                added += add_names(names)
+                attr_count += set_attributes(attributes)
+                rows_read += count
+                progress.setValue(min(rows_read, total))
+                progress.setLabelText(f"已读取 {rows_read} 行，新增 {added} 个姓名")
+                if progress.wasCanceled():
+                    logger.info(f"导入已取消，已读取 {rows_read} 行")
+                    break
+            progress.close()
+            
+            self.record_import(rows_read, start)
+            self.finish_import(added, attr_count)
+        except Exception as e:
+            logger.error(f"导入失败: {e}")
+            QMessageBox.critical(self, "导入错误", f"导入文件时出错:\n{str(e)}")
+
+    def record_import(self, rows, start):
+        """统计导入耗时和吞吐量（行/秒）"""
+        if not registry.enabled:
+            return
+        elapsed = time.perf_counter() - start
+        registry.incr("import.rows", rows)
+        registry.observe("import.duration_ms", elapsed * 1000)
+        if elapsed > 0:
+            registry.observe("import.rows_per_s", rows / elapsed)
+
+    def finish_import(self, added, attr_count):
+        """刷新名单并提示导入结果"""
+        if added > 0 or attr_count > 0:
+            self.load_names()
+            self.names_modified(attributes=attr_count > 0)
+            message = f"成功导入 {added} 个姓名\n重复姓名已自动过滤"
+            if attr_count:
+                message += f"\n已更新 {attr_count} 条属性"
+            QMessageBox.information(self, "导入完成", message)
+            logger.info(f"成功导入 {added} 个姓名, {attr_count} 条属性")
+        else:
+            QMessageBox.warning(self, "导入结果", 
+                "没有导入新姓名（可能全部已存在或文件为空）")
+
+    def partition_groups(self):
+        """随机分组并导出结果"""
+        group_count, ok = QInputDialog.getInt(self, "随机分组", "分组数量:", 4, 1, 1000)
+        if not ok:
+            return
+            
+        reply = QMessageBox.question(
+            self, '分组方式',
+            '是否按历史点名次数均衡分组？',
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No
+        )
+        
+        try:
+            groups = partition_names(group_count, balance=(reply == QMessageBox.Yes))
+            if not groups:
+                QMessageBox.warning(self, "分组失败", "名单为空，无法分组")
+                return
+            
+            preview = '\n'.join(
+                f"第{i}组 ({len(group)}人): {', '.join(group[:5])}{' ...' if len(group) > 5 else ''}"
+                for i, group in enumerate(groups[:10], 1)
+            )
+            formats = {'Excel': 'excel', 'CSV': 'csv', 'TXT': 'txt'}
+            file_format, ok = QInputDialog.getItem(
+                self, "分组完成", f"{preview}\n\n选择导出格式:", list(formats), 0, False)
+            if ok:
+                self.export_names(formats[file_format], groups)
+            logger.info(f"成功分为 {len(groups)} 组")
+        except Exception as e:
+            logger.error(f"分组失败: {e}")
+            QMessageBox.critical(self, "错误", f"分组失败:\n{str(e)}")
+
+    def export_names(self, file_type, groups=None):
+        """导出名单（传入groups时导出分组结果）"""
         file_filters = {
             'excel': 'Excel文件 (*.xlsx)',
             'csv': 'CSV文件 (*.csv)',
@@ -255,27 +706,79 @@ class ChangeListWindow(QWidget):
         if not file_path:
             return
             
-        try:
-            names = get_names()
-            if not names:
-                QMessageBox.warning(self, "导出失败", "名单为空，无法导出")
-                return
-                
-            df = pd.DataFrame(names, columns=['Name'])
-            
-            if file_type == 'excel':
-                df.to_excel(file_path, index=False)
-            elif file_type == 'csv':
-                df.to_csv(file_path, index=False, encoding='utf-8-sig')
-            else:  # txt
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write('\n'.join(names))
-            
-            QMessageBox.information(self, "导出成功", "名单导出成功！")
-            logger.info(f"成功导出名单到 {file_path}")
-        except Exception as e:
-            logger.error(f"导出失败: {e}")
-            QMessageBox.critical(self, "导出错误", f"导出文件时出错:\n{str(e)}")
+        if groups is not None:
+            if file_type == 'txt':
+                rows = [(f"第{i}组: {', '.join(group)}",) for i, group in enumerate(groups, 1)]
+            else:
+                rows = [(i, name) for i, group in enumerate(groups, 1) for name in group]
+            self.start_export(file_path, file_type, ('Group', 'Name'),
+                              lambda: [rows], len(rows), "分组结果")
+            return
+        
+        total = count_names()
+        if not total:
+            QMessageBox.warning(self, "导出失败", "名单为空，无法导出")
+            return
+        self.start_export(file_path, file_type, ('Name',), iter_names, total, "名单")
+
+    def export_history(self):
+        """导出点名历史（可按日期范围筛选）"""
+        dialog = HistoryExportDialog(self)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        file_type, start, end = dialog.options()
+        
+        file_filters = {
+            'excel': 'Excel文件 (*.xlsx)',
+            'csv': 'CSV文件 (*.csv)',
+            'txt': '文本文件 (*.txt)'
+        }
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "保存文件", "", file_filters[file_type])
+        if not file_path:
+            return
+        
+        total = count_history(start, end)
+        if not total:
+            QMessageBox.warning(self, "导出失败", "所选时间范围内没有点名记录")
+            return
+        self.start_export(file_path, file_type, ('Name', 'Time'),
+                          lambda: iter_history(start, end), total, "点名历史")
+
+    def start_export(self, file_path, file_type, header, make_batches, total, title):
+        """在后台线程中导出，显示进度并允许取消"""
+        if self.worker is not None and self.worker.isRunning():
+            QMessageBox.warning(self, "提示", "已有导出任务正在进行")
+            return
+        
+        self.export_title = title
+        self.worker = ExportWorker(file_path, file_type, header, make_batches)
+        self.export_progress = QProgressDialog(f"正在导出{title}...", "取消", 0, total, self)
+        self.export_progress.setWindowTitle("导出")
+        self.export_progress.setWindowModality(Qt.WindowModal)
+        self.export_progress.setMinimumDuration(300)
+        self.export_progress.setAutoClose(False)
+        self.export_progress.canceled.connect(self.worker.cancel)
+        self.worker.progress.connect(
+            lambda written: self.export_progress.setValue(min(written, total)))
+        self.worker.export_finished.connect(self.on_export_finished)
+        self.worker.start()
+        logger.info(f"开始导出{title}到 {file_path}")
+
+    def on_export_finished(self, written, error):
+        """导出线程结束"""
+        if self.export_progress is not None:
+            self.export_progress.canceled.disconnect()
+            self.export_progress.close()
+            self.export_progress = None
+        
+        if error:
+            logger.error(f"导出失败: {error}")
+            QMessageBox.critical(self, "导出错误", f"导出文件时出错:\n{error}")
+        elif written < 0:
+            logger.info(f"已取消导出{self.export_title}")
+        else:
+            QMessageBox.information(self, "导出成功", f"{self.export_title}导出成功！共 {written} 行")
 
     def apply_theme(self, theme_config):
         """应用主题设置"""
@@ -289,7 +792,7 @@ class ChangeListWindow(QWidget):
                     background-color: #333333;
                     color: #FFFFFF;
                 }
-                QListWidget {
+                QTableView {
                     background-color: #444444;
                     color: #FFFFFF;
                     border: 1px solid #666666;
@@ -309,7 +812,7 @@ class ChangeListWindow(QWidget):
                     background-color: #F5F5F5;
                     color: #000000;
                 }
-                QListWidget {
+                QTableView {
                     background-color: #FFFFFF;
                     color: #000000;
                     border: 1px solid #CCCCCC;
@@ -401,6 +904,10 @@ class ChangeListWindow(QWidget):
 
     def closeEvent(self, event):
         """关闭窗口时确保资源释放"""
-        if hasattr(self, 'worker') and self.worker.isRunning():
-            self.worker.quit()
+        if self.notify_timer.isActive():
+            self.notify_timer.stop()
+            self.emit_names_changed()
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
         event.accept()
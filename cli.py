@@ -0,0 +1,304 @@
+"""
+随机点名命令行入口（不导入Qt，适合脚本和定时任务）
+
+用法（在项目根目录下）:
+    python -m cli draw [-k N]
+    python -m cli import 名单.xlsx
+    python -m cli export 名单.csv [--history --start 2024-01-01 --end 2024-12-31]
+    python -m cli history [-n 20]
+    python -m cli stats
+    python -m cli serve [--host 0.0.0.0 --token TOKEN] [--port 8765]
+    python -m cli audit [--names 50 -k 1 --recent 5 --sessions 20000 --draws 100 --cross-check 200]
+"""
+import os
+import sys
+import time
+import json
+import threading
+import argparse
+import logging
+from utils.log import setup_logging, load_logging_config
+from utils.rng import configure_rng
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
+logger = logging.getLogger(__name__)
+
+# 文件扩展名对应的导出类型（与名单管理窗口的导出一致）
+EXPORT_TYPES = {'.xlsx': 'excel', '.csv': 'csv', '.txt': 'txt'}
+
+def load_config() -> dict:
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def output(args, data, text: str):
+    """按 --json 选项输出JSON或文本"""
+    if args.json:
+        print(json.dumps(data, ensure_ascii=False))
+    else:
+        print(text)
+
+def cmd_draw(args) -> int:
+    from utils.draw import DrawPool, draw_names
+
+    recent = args.recent
+    if recent is None:
+        recent = load_config().get("random", {}).get("recent_exclude", 0)
+    if args.seed is not None:
+        # 同一种子和同一数据库状态下抽取结果相同，可用于复核有争议的点名
+        configure_rng({"mode": "seeded", "seed": args.seed})
+    pool = DrawPool(recent)
+    if not pool.roster:
+        print("名单为空", file=sys.stderr)
+        return 1
+    names = draw_names(args.k, pool)
+    if not names:
+        print("抽取失败", file=sys.stderr)
+        return 1
+    output(args, names, '\n'.join(names))
+    return 0
+
+def cmd_import(args) -> int:
+    from utils.database import add_names, set_attributes
+    from utils.sync import SOURCE_READERS
+
+    ext = os.path.splitext(args.file)[1].lower()
+    if ext not in SOURCE_READERS:
+        print(f"不支持的文件类型: {ext}（支持 {', '.join(SOURCE_READERS)}）", file=sys.stderr)
+        return 1
+    reader = SOURCE_READERS[ext]
+    chunks = reader(args.file, merge_sheets=not args.first_sheet) if ext == '.xlsx' else reader(args.file)
+
+    added = attr_count = rows_read = 0
+    try:
+        for names, attributes, count in chunks:
+            added += add_names(names)
+            attr_count += set_attributes(attributes)
+            rows_read += count
+    except Exception as e:
+        logger.error(f"导入失败: {e}")
+        print(f"导入失败: {e}", file=sys.stderr)
+        return 1
+    output(args, {"rows": rows_read, "added": added, "attributes": attr_count},
+           f"读取 {rows_read} 行，新增 {added} 个姓名，更新 {attr_count} 条属性")
+    return 0
+
+def cmd_export(args) -> int:
+    from utils.database import iter_names, iter_history
+    from utils.exporter import write_rows
+
+    file_type = EXPORT_TYPES.get(os.path.splitext(args.file)[1].lower())
+    if file_type is None:
+        print(f"不支持的文件类型（支持 {', '.join(EXPORT_TYPES)}）", file=sys.stderr)
+        return 1
+    if args.history:
+        header, batches = ('Name', 'Time'), iter_history(args.start, args.end)
+    else:
+        header, batches = ('Name',), iter_names()
+    try:
+        written = write_rows(args.file, file_type, header, batches)
+    except Exception as e:
+        logger.error(f"导出失败: {e}")
+        print(f"导出失败: {e}", file=sys.stderr)
+        return 1
+    output(args, {"rows": written, "file": args.file}, f"已导出 {written} 行到 {args.file}")
+    return 0
+
+def cmd_history(args) -> int:
+    from utils.database import get_called_history
+
+    history = get_called_history(args.n)
+    output(args, [{"name": name, "time": called} for name, called in history],
+           '\n'.join(f"{called}  {name}" for name, called in history) or "暂无点名记录")
+    return 0
+
+def cmd_stats(args) -> int:
+    from utils.database import (count_names, count_history, get_cycle_bits,
+                                get_roster_version, get_call_counts)
+
+    names = count_names()
+    called = sum(bin(byte).count('1') for byte in get_cycle_bits())
+    counts = sorted(get_call_counts().items(), key=lambda item: (-item[1], item[0]))[:args.top]
+    data = {
+        "names": names,
+        "history": count_history(),
+        "cycle_called": called,
+        "cycle_remaining": max(0, names - called),
+        "roster_version": get_roster_version(),
+        "top": dict(counts),
+    }
+    lines = [
+        f"姓名数量: {data['names']}",
+        f"点名记录: {data['history']}",
+        f"本轮已点: {data['cycle_called']}，剩余: {data['cycle_remaining']}",
+        f"名单版本: {data['roster_version']}",
+    ]
+    if counts:
+        lines.append("点名次数最多:")
+        lines += [f"  {name}: {count}" for name, count in counts]
+    output(args, data, '\n'.join(lines))
+    return 0
+
+def cmd_serve(args) -> int:
+    from utils.database import get_roster_changes
+    from utils.draw import DrawPool, draw_names
+    from utils.server import DrawServer
+
+    config = load_config()
+    server_config = dict(config.get("server", {}))
+    if args.host:
+        server_config["host"] = args.host
+    if args.port is not None:
+        server_config["port"] = args.port
+    if args.token is not None:
+        server_config["token"] = args.token
+    pool = DrawPool(config.get("random", {}).get("recent_exclude", 0))
+    lock = threading.Lock()
+
+    def on_draw(k):
+        # 请求在线程池中并发执行，抽取和记录需要串行
+        with lock:
+            pool.apply_diff(get_roster_changes(pool.version))
+            names = draw_names(k, pool)
+        server.publish({"type": "result", "names": names})
+        return names
+
+    server = DrawServer(server_config, on_draw)
+    try:
+        port = server.start()
+    except (OSError, ValueError) as e:
+        print(f"启动服务失败: {e}", file=sys.stderr)
+        return 1
+    print(f"点名服务已启动 http://{server.config['host']}:{port}/ （Ctrl+C 停止）", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+def cmd_audit(args) -> int:
+    try:
+        from utils.audit import run_audit, cross_check
+    except ImportError as e:
+        print(f"公平性审计需要NumPy: {e}", file=sys.stderr)
+        return 1
+    from utils.database import count_names
+
+    names = args.names or count_names()
+    if names < 1:
+        print("名单为空，请用 --names 指定模拟的人数", file=sys.stderr)
+        return 1
+    recent = args.recent
+    if recent is None:
+        recent = load_config().get("random", {}).get("recent_exclude", 0)
+    report = run_audit(names, args.k, recent, args.sessions, args.draws, args.seed,
+                       args.alpha, args.engine_samples)
+    check = None
+    if args.cross_check:
+        check = cross_check(names, args.k, recent, args.cross_check, min(args.draws, 10),
+                            args.sessions, args.seed)
+        report["cross_check"] = check
+        report["passed"] = report["passed"] and check["p"] >= args.alpha
+    per_draw, totals, engine = report["per_draw"], report["totals"], report["engine"]
+    lines = [
+        f"模拟 {report['sessions']} 个会话 x {report['draws']} 次抽取 x {report['k']} 人，"
+        f"名单 {names} 人，排除最近 {recent} 次，共 {report['simulated_picks']} 次点中，"
+        f"用时 {report['seconds']:.1f} s",
+        f"逐次均匀性: {per_draw['tests']} 项检验，最小p值 {per_draw['min_p']:.4g}"
+        f"（Bonferroni校正 {per_draw['bonferroni_p']:.4g}），平均 chi2/df {per_draw['mean_chi2_per_df']:.3f}",
+        f"总次数: chi2={totals['chi2']:.1f} df={totals['df']} p={totals['p']:.4g}（有轮次规则时p接近1属正常）",
+    ]
+    if engine is not None:
+        lines.append(f"随机数引擎 {report['rng']['mode']}: chi2={engine['chi2']:.1f} "
+                     f"df={engine['df']} p={engine['p']:.4g}")
+    if check is not None:
+        lines.append(f"模拟与实际实现一致性（{args.cross_check} 个真实会话）: chi2={check['chi2']:.1f} "
+                     f"df={check['df']} p={check['p']:.4g}")
+    lines.append(f"结论（显著性水平 {args.alpha}）: {'未发现偏差' if report['passed'] else '存在偏差'}")
+    output(args, report, '\n'.join(lines))
+    return 0 if report["passed"] else 1
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="随机点名命令行工具")
+    parser.add_argument('--json', action='store_true', help="以JSON格式输出")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    draw = commands.add_parser('draw', help="抽取并记录")
+    draw.add_argument('-k', type=int, default=1, help="抽取人数（默认1）")
+    draw.add_argument('--recent', type=int, help="排除最近点到的次数（默认读取config.json）")
+    draw.add_argument('--seed', help="随机数种子（可复现的抽取）")
+    draw.set_defaults(func=cmd_draw)
+
+    import_ = commands.add_parser('import', help="导入名单（.xlsx/.csv/.txt）")
+    import_.add_argument('file')
+    import_.add_argument('--first-sheet', action='store_true', help="Excel只导入第一个工作表")
+    import_.set_defaults(func=cmd_import)
+
+    export = commands.add_parser('export', help="导出名单或点名历史（.xlsx/.csv/.txt）")
+    export.add_argument('file')
+    export.add_argument('--history', action='store_true', help="导出点名历史")
+    export.add_argument('--start', help="历史开始日期 YYYY-MM-DD")
+    export.add_argument('--end', help="历史结束日期 YYYY-MM-DD")
+    export.set_defaults(func=cmd_export)
+
+    history = commands.add_parser('history', help="查看最近的点名记录")
+    history.add_argument('-n', type=int, default=20, help="显示条数（默认20）")
+    history.set_defaults(func=cmd_history)
+
+    stats = commands.add_parser('stats', help="名单和点名统计")
+    stats.add_argument('--top', type=int, default=10, help="显示点名次数最多的人数")
+    stats.set_defaults(func=cmd_stats)
+
+    serve = commands.add_parser('serve', help="启动局域网点名服务（HTTP + WebSocket）")
+    serve.add_argument('--host', help="监听地址（默认读取config.json）")
+    serve.add_argument('--port', type=int, help="监听端口（默认读取config.json）")
+    serve.add_argument('--token', help="访问令牌（默认读取config.json，监听非本机地址时必须设置）")
+    serve.set_defaults(func=cmd_serve)
+
+    audit = commands.add_parser('audit', help="蒙特卡洛模拟点名规则，卡方检验公平性（需要NumPy）")
+    audit.add_argument('--names', type=int, help="名单人数（默认为当前名单人数）")
+    audit.add_argument('-k', type=int, default=1, help="每次抽取人数（默认1）")
+    audit.add_argument('--recent', type=int, help="排除最近点到的次数（默认读取config.json）")
+    audit.add_argument('--sessions', type=int, default=20000, help="并行模拟的会话数")
+    audit.add_argument('--draws', type=int, default=100, help="每个会话的抽取次数")
+    audit.add_argument('--seed', type=int, help="模拟的随机数种子")
+    audit.add_argument('--alpha', type=float, default=0.01, help="显著性水平")
+    audit.add_argument('--engine-samples', type=int, default=200000,
+                       help="检验当前随机数引擎的抽样次数（0为不检验）")
+    audit.add_argument('--cross-check', type=int, default=0, metavar='SESSIONS',
+                       help="在临时数据库上用真实点名逻辑运行SESSIONS个会话，核对模拟规则（0为不核对）")
+    audit.set_defaults(func=cmd_audit)
+    return parser
+
+def configure_database(config: dict, storage: bool = True):
+    """按config.json的database项设置锁重试和存储模式（与主窗口一致）"""
+    from utils.database import configure_locking, configure_storage
+
+    db_config = dict(config.get("database", {}))
+    mode = db_config.pop("storage", "disk")
+    flush_interval_s = db_config.pop("flush_interval_s", 5.0)
+    if storage:
+        configure_storage(mode, flush_interval_s)
+    configure_locking(**db_config)
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    setup_logging(load_logging_config(CONFIG_PATH))
+    config = load_config()
+    configure_rng(config.get("rng"))
+    # audit 只使用临时数据库，不切换存储模式（内存模式下不能切换数据库）
+    configure_database(config, storage=args.func is not cmd_audit)
+    try:
+        return args.func(args)
+    finally:
+        from utils.database import shutdown_storage
+        shutdown_storage()
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,25 +1,44 @@
 import sys
 import os
 import json
-import random
+import math
+import time
 import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from PyQt5.QtWidgets import (QApplication, QWidget, QVBoxLayout, QPushButton,
-                            QLabel, QMessageBox, QSystemTrayIcon, QMenu, QHBoxLayout)
-from PyQt5.QtCore import Qt, QTimer, pyqtSignal
-from PyQt5.QtGui import QIcon, QFont
-from utils.database import get_names, record_called_name
+                            QLabel, QMessageBox, QSystemTrayIcon, QMenu, QHBoxLayout,
+                            QGridLayout, QSpinBox, QComboBox)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal, QFileSystemWatcher
+from PyQt5.QtGui import QIcon, QFont, QPixmapCache
+from utils.database import (get_names, configure_locking, configure_storage, shutdown_storage,
+                            get_lock_stats, get_roster_changes)
+from utils.draw import draw_names, DrawPool, patch_name_list
+from utils.backup import BackupService
+from utils.sync import SourceSync, DEFAULT_SYNC_CONFIG
+from utils.server import DrawServer
 from setting import SettingsWindow
+from stall_monitor import StallWatchdog
+from prewarm import PrewarmScheduler, import_in_background
+from utils.log import setup_logging, load_logging_config
+from utils.metrics import registry, configure_metrics
+from utils.rng import get_rng, configure_rng
+from utils.memory import rss_bytes, trim_memory, format_bytes
 import ctypes
-# 配置日志
-log_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'app.log')
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename=log_path)
+
+CONFIG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+
 logger = logging.getLogger(__name__)
 
+# 远程点名请求等待界面滚动结束的最长时间（秒），超时后返回202，结果仍通过事件推送
+REMOTE_DRAW_TIMEOUT = 30
+
+DEFAULT_TRAY_CONFIG = {
+    "release_after_s": 300  # 隐藏到托盘多久后释放名单和子窗口占用的内存（秒），0为不释放
+}
+
 class MainWindow(QWidget):
-    names_updated = pyqtSignal()  # 名单更新信号
+    names_updated = pyqtSignal(dict)  # 名单更新信号（携带变化内容）
+    remote_draw_requested = pyqtSignal(int, object)  # 局域网点名服务请求抽取 (人数, Future)（跨线程，排队到界面线程执行）
     
     def __init__(self):
         super().__init__()
@@ -31,9 +50,22 @@ class MainWindow(QWidget):
         self.is_rolling = False
         self.roll_interval = 50
         self.remaining_names = []
+        self.batch_labels = []
+        self.last_tick = None  # 上一次滚动的时间，用于统计定时器抖动
+        self.remote_waiters = []  # 等待本次滚动结果的远程点名请求
+        self.resources_released = False
+        self.release_timer = QTimer(self)
+        self.release_timer.setSingleShot(True)
+        self.release_timer.timeout.connect(self.release_resources)
         
         # 初始化配置和UI
         self.config = self.load_config()
+        configure_metrics(self.config.get("metrics"))
+        configure_rng(self.config.get("rng"))
+        db_config = dict(self.config.get("database", {}))
+        configure_storage(db_config.pop("storage", "disk"), db_config.pop("flush_interval_s", 5.0))
+        configure_locking(**db_config)
+        self.draw_pool = DrawPool(self.config["random"].get("recent_exclude", 0))
         self.init_ui()
         self.init_tray_icon()
         self.apply_theme()
@@ -41,6 +73,45 @@ class MainWindow(QWidget):
         # 检查数据库
         self.check_database()
         
+        # 后台定时备份
+        self.backup_service = BackupService(self.config.get("backup"))
+        self.backup_service.start()
+        
+        # 关联名单源文件：文件变化后增量同步
+        self.source_sync = None
+        self.source_watcher = QFileSystemWatcher(self)
+        self.source_watcher.fileChanged.connect(self.on_source_changed)
+        sync_config = dict(DEFAULT_SYNC_CONFIG, **self.config.get("sync", {}))
+        self.sync_timer = QTimer(self)
+        self.sync_timer.setSingleShot(True)
+        self.sync_timer.setInterval(sync_config["debounce_ms"])
+        self.sync_timer.timeout.connect(self.sync_source)
+        self.link_source(sync_config["source"], save=False)
+        
+        # 事件循环卡顿监视
+        self.watchdog = StallWatchdog(self.config.get("watchdog"), self)
+        self.watchdog.start()
+        
+        # 主窗口显示后在空闲时预先创建子窗口
+        self.prewarm = PrewarmScheduler(self.config.get("prewarm"), self)
+        
+        # 隐藏到托盘一段时间后进入低内存模式
+        tray_config = dict(DEFAULT_TRAY_CONFIG, **self.config.get("tray", {}))
+        self.release_timer.setInterval(int(tray_config["release_after_s"] * 1000))
+        self.release_enabled = tray_config["release_after_s"] > 0
+        
+        # 局域网点名服务（多屏显示、手机或翻页笔触发）
+        self.draw_server = None
+        server_config = self.config.get("server", {})
+        if server_config.get("enabled"):
+            self.remote_draw_requested.connect(self.start_remote_roll)
+            self.draw_server = DrawServer(server_config, on_draw=self.request_remote_draw)
+            try:
+                self.draw_server.start()
+            except (OSError, ValueError) as e:
+                logger.error(f"点名服务启动失败: {e}")
+                self.draw_server = None
+        
         logger.info("应用程序初始化完成")
 
     def check_database(self):
@@ -58,11 +129,26 @@ class MainWindow(QWidget):
 
     def load_config(self):
         """加载配置文件"""
-        config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json')
+        config_path = CONFIG_PATH
         default_config = {
             "theme": {"main": "light", "simple": "dark", "style": "classic"},
             "simple_mode": {"width": 320, "height": 220, "opacity": 200, "bg_color": "#ffffff"},
-            "random": {"min_speed": 50, "max_speed": 200, "duration": 3000}
+            "random": {"min_speed": 50, "max_speed": 200, "duration": 3000, "recent_exclude": 0},
+            "backup": {"enabled": True, "interval_hours": 24, "pages": 64,
+                       "keep_daily": 7, "keep_weekly": 4, "on_exit": True, "exit_timeout_s": 10},
+            "database": {"busy_timeout_ms": 5000, "write_retries": 5, "retry_base_delay": 0.05,
+                         "storage": "disk", "flush_interval_s": 5.0},
+            "sync": {"source": "", "debounce_ms": 500},
+            "logging": {"level": "INFO", "file": "app.log", "max_bytes": 1048576,
+                        "backup_count": 5, "console": False},
+            "metrics": {"enabled": False},
+            "watchdog": {"enabled": False, "threshold_ms": 200, "heartbeat_ms": 50,
+                         "track_events": False, "report": "stall_report.log"},
+            "server": {"enabled": False, "host": "127.0.0.1", "port": 8765,
+                       "token": "", "queue_size": 64},
+            "tray": dict(DEFAULT_TRAY_CONFIG),
+            "prewarm": {"enabled": True, "delay_ms": 1000, "slice_ms": 10, "idle_ms": 300},
+            "rng": {"mode": "default", "seed": ""}
         }
         
         try:
@@ -83,19 +169,38 @@ class MainWindow(QWidget):
 
     def update_roll(self):
         """更新点名滚动效果"""
+        tick_start = None
+        if registry.enabled:
+            # 实际间隔超出定时器间隔的部分即为抖动（包括上一帧的绘制时间）
+            tick_start = time.perf_counter()
+            if self.last_tick is not None:
+                actual = (tick_start - self.last_tick) * 1000
+                registry.observe("roll.interval_ms", actual)
+                registry.observe("roll.jitter_ms", max(0.0, actual - self.timer.interval()))
+            self.last_tick = tick_start
         try:
             if not self.remaining_names:
-                self.remaining_names = get_names().copy()
-                random.shuffle(self.remaining_names)
-                logger.debug("重新加载名单")
+                self.remaining_names = self.draw_pool.available()
+                get_rng().shuffle(self.remaining_names)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("重新加载名单")
             
             if not self.remaining_names:
                 self.toggle_roll()
                 return
                 
-            selected_name = random.choice(self.remaining_names)
-            self.result_label.setText(selected_name)
-            self.remaining_names.remove(selected_name)
+            draw_count = self.count_spin.value()
+            if draw_count > 1:
+                # 多人模式：滚动时只预览，不消耗姓名池
+                preview = get_rng().sample(
+                    self.remaining_names, min(draw_count, len(self.remaining_names)))
+                self.show_batch(preview)
+                self.publish({"type": "tick", "names": preview})
+            else:
+                selected_name = get_rng().choice(self.remaining_names)
+                self.result_label.setText(selected_name)
+                self.remaining_names.remove(selected_name)
+                self.publish({"type": "tick", "names": [selected_name]})
             
             # 减慢速度
             max_speed = self.config["random"].get("max_speed", 200)
@@ -103,12 +208,59 @@ class MainWindow(QWidget):
             self.timer.setInterval(self.roll_interval)
             
             if self.roll_interval >= max_speed:
-                record_called_name(selected_name)
+                if draw_count > 1:
+                    # 一次抽取并在同一事务中记录
+                    result = draw_names(draw_count, self.draw_pool)
+                    self.show_batch(result)
+                else:
+                    self.draw_pool.record([selected_name])
+                    result = [selected_name]
+                self.publish({"type": "result", "names": result})
+                self.resolve_remote(result)
                 self.toggle_roll()
         except Exception as e:
             logger.error(f"点名过程中出错: {e}")
             self.toggle_roll()
             QMessageBox.warning(self, "错误", f"点名过程中出错:\n{str(e)}")
+        finally:
+            if tick_start is not None:
+                registry.observe("roll.tick_ms", (time.perf_counter() - tick_start) * 1000)
+
+    def publish(self, event):
+        """向点名服务的订阅者推送点名事件"""
+        if self.draw_server is not None:
+            self.draw_server.publish(event)
+
+    def request_remote_draw(self, k):
+        """
+        点名服务线程中调用：转到界面线程开始滚动，等待滚动结束后返回抽中的姓名
+        （名单为空或滚动被手动停止时返回空列表）；
+        超过 REMOTE_DRAW_TIMEOUT 秒返回None，服务返回202，结果仍通过事件推送
+        """
+        future = Future()
+        self.remote_draw_requested.emit(k, future)
+        try:
+            return future.result(REMOTE_DRAW_TIMEOUT)
+        except FutureTimeout:
+            logger.warning(f"远程点名等待结果超过 {REMOTE_DRAW_TIMEOUT} 秒")
+            return None
+
+    def start_remote_roll(self, k, future):
+        """远程请求的点名与点击"开始点名"相同，正在滚动时等待这次滚动的结果"""
+        self.restore_resources()
+        if not self.draw_pool.roster:
+            future.set_result([])
+            return
+        self.remote_waiters.append(future)
+        if not self.is_rolling:
+            self.count_spin.setValue(min(k, self.count_spin.maximum()))
+            self.toggle_roll()
+
+    def resolve_remote(self, names):
+        """把本次滚动的结果交给等待中的远程点名请求"""
+        waiters, self.remote_waiters = self.remote_waiters, []
+        for future in waiters:
+            future.set_result(names)
 
     def init_ui(self):
         self.setWindowTitle('随机点名系统')
@@ -129,14 +281,37 @@ class MainWindow(QWidget):
         self.result_label.setFont(QFont("Microsoft YaHei", 24, QFont.Bold))
         layout.addWidget(self.result_label)
         
+        # 多人点名结果网格
+        self.batch_widget = QWidget()
+        self.batch_layout = QGridLayout(self.batch_widget)
+        self.batch_widget.hide()
+        layout.addWidget(self.batch_widget)
+        
         # 点名控制按钮
         roll_btn_layout = QHBoxLayout()
         self.roll_btn = QPushButton("开始点名")
         self.roll_btn.setObjectName("roll_btn")
         self.roll_btn.clicked.connect(self.toggle_roll)
         roll_btn_layout.addWidget(self.roll_btn)
+        
+        # 每次抽取人数
+        roll_btn_layout.addWidget(QLabel("人数:"))
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(1, 50)
+        self.count_spin.setValue(1)
+        self.count_spin.valueChanged.connect(self.on_count_changed)
+        roll_btn_layout.addWidget(self.count_spin)
         layout.addLayout(roll_btn_layout)
         
+        # 点名范围（按导入的属性筛选）
+        scope_layout = QHBoxLayout()
+        scope_layout.addWidget(QLabel("范围:"))
+        self.scope_combo = QComboBox()
+        self.refresh_scope_options()
+        self.scope_combo.currentIndexChanged.connect(self.on_scope_changed)
+        scope_layout.addWidget(self.scope_combo, stretch=1)
+        layout.addLayout(scope_layout)
+        
         # 功能按钮
         btn_layout1 = QHBoxLayout()
         btn_layout2 = QHBoxLayout()
@@ -165,48 +340,147 @@ class MainWindow(QWidget):
         layout.addStretch()
         self.setLayout(layout)
 
+    def on_count_changed(self, count):
+        """切换单人/多人点名显示"""
+        if self.is_rolling:
+            self.toggle_roll()
+        self.result_label.setVisible(count <= 1)
+        self.batch_widget.setVisible(count > 1)
+
+    def refresh_scope_options(self):
+        """根据属性位图刷新点名范围选项"""
+        current = self.scope_combo.currentData()
+        self.scope_combo.blockSignals(True)
+        self.scope_combo.clear()
+        self.scope_combo.addItem("全部名单", (None, None))
+        index = self.draw_pool.index
+        for key in index.keys():
+            for value in index.values(key):
+                self.scope_combo.addItem(f"{key}: {value}", ({key: [value]}, None))
+                self.scope_combo.addItem(f"{key}: 非{value}", (None, {key: [value]}))
+        position = self.scope_combo.findData(current)
+        self.scope_combo.setCurrentIndex(max(position, 0))
+        self.scope_combo.blockSignals(False)
+        if position < 0 and current is not None:
+            self.on_scope_changed()
+
+    def on_scope_changed(self, index=None):
+        """切换点名范围"""
+        if self.is_rolling:
+            self.toggle_roll()
+        include, exclude = self.scope_combo.currentData() or (None, None)
+        self.draw_pool.set_filter(include, exclude)
+        self.remaining_names = []
+        logger.info(f"点名范围: {self.scope_combo.currentText()}")
+
+    def show_batch(self, names):
+        """在网格中显示多个姓名"""
+        columns = max(2, min(4, math.ceil(math.sqrt(len(names)))))
+        while len(self.batch_labels) < len(names):
+            label = QLabel()
+            label.setObjectName("batch_label")
+            label.setAlignment(Qt.AlignCenter)
+            label.setFont(QFont("Microsoft YaHei", 16, QFont.Bold))
+            self.batch_labels.append(label)
+        
+        for i, label in enumerate(self.batch_labels):
+            if i < len(names):
+                label.setText(names[i])
+                self.batch_layout.addWidget(label, i // columns, i % columns)
+                label.show()
+            else:
+                self.batch_layout.removeWidget(label)
+                label.hide()
+
     def toggle_roll(self):
         """切换点名状态"""
-        names = get_names()
-        if not names:
+        if not self.draw_pool.roster:
             QMessageBox.warning(self, "名单为空", "请先添加名单数据")
             return
             
         if not self.is_rolling:
-            # 开始新的一轮点名
-            self.remaining_names = names.copy()
-            random.shuffle(self.remaining_names)
+            self.last_tick = None
+            # 从本轮尚未点到的姓名开始（排除最近点到的姓名）
+            self.remaining_names = self.draw_pool.available()
+            get_rng().shuffle(self.remaining_names)
             self.roll_interval = self.config["random"].get("min_speed", 50)
             
         self.is_rolling = not self.is_rolling
         self.roll_btn.setText("停止点名" if self.is_rolling else "开始点名")
         
         if self.is_rolling:
+            self.publish({"type": "start", "k": self.count_spin.value()})
             self.timer.start(self.roll_interval)
         else:
             self.timer.stop()
+            # 没有产生结果就停止（手动停止或出错）时不再让远程请求等待
+            self.resolve_remote([])
 
-    def open_simple_mode(self):
-        """打开简约模式窗口"""
+    def observe_open(self, window, start):
+        """统计窗口打开耗时（到窗口显示后事件循环空闲为止）"""
+        if start is not None:
+            QTimer.singleShot(0, lambda: registry.observe(
+                f"window.{window}.open_ms", (time.perf_counter() - start) * 1000))
+
+    def schedule_prewarm(self):
+        """在事件循环空闲时预先导入模块并创建尚未创建的子窗口（见 PrewarmScheduler）"""
+        self.prewarm.schedule("modules", lambda: import_in_background(["pandas", "openpyxl"]))
+        if self.change_window is None:
+            self.prewarm.schedule("change", self.prewarm_change_window)
+        if self.simple_window is None:
+            self.prewarm.schedule("simple", self.create_simple_window)
+        if self.settings_window is None:
+            self.prewarm.schedule("settings", self.create_settings_window)
+        self.prewarm.start()
+
+    def create_simple_window(self):
         from simple import SimpleCallWindow
         if self.simple_window is None:
             self.simple_window = SimpleCallWindow(self)
+
+    def create_change_window(self, load=True):
+        from change import ChangeListWindow
+        if self.change_window is None:
+            self.change_window = ChangeListWindow(self, load=load)
+            self.change_window.names_changed.connect(self.on_names_changed)
+
+    def prewarm_change_window(self):
+        """创建名单管理窗口，名单分批加载"""
+        if self.change_window is not None:
+            return None
+        self.create_change_window(load=False)
+        return self.change_window.load_names_slices()
+
+    def create_settings_window(self):
+        if self.settings_window is None:
+            self.settings_window = SettingsWindow(CONFIG_PATH)
+            self.settings_window.theme_changed.connect(self.on_theme_changed)
+            self.settings_window.config_changed.connect(self.on_config_changed)
+            self.settings_window.setWindowModality(Qt.ApplicationModal)
+
+    def open_simple_mode(self):
+        """打开简约模式窗口"""
+        start = time.perf_counter() if registry.enabled else None
+        self.prewarm.finish("simple")
+        self.create_simple_window()
         self.hide()
         self.simple_window.show()
+        self.observe_open("simple", start)
         logger.info("进入简约模式")
 
     def open_change_window(self):
         """安全打开名单管理窗口"""
+        start = time.perf_counter() if registry.enabled else None
         try:
-            from change import ChangeListWindow
-            if self.change_window is None:
-                self.change_window = ChangeListWindow(self)
-                self.change_window.names_changed.connect(self.on_names_changed)
+            # 预热中的窗口先加载完名单
+            self.prewarm.finish("change")
+            self.create_change_window()
             
             # 确保窗口正常显示
             self.change_window.show()
             self.change_window.raise_()
             self.change_window.activateWindow()
+            self.observe_open("change", start)
             logger.info("成功打开名单管理窗口")
             
         except ImportError as e:
@@ -218,23 +492,102 @@ class MainWindow(QWidget):
             # 重置窗口引用
             self.change_window = None
 
-    def on_names_changed(self):
-        """处理名单变化"""
+    def link_source(self, path, save=True):
+        """关联名单源文件（path为空时取消关联），关联后立即同步一次"""
+        if self.source_watcher.files():
+            self.source_watcher.removePaths(self.source_watcher.files())
+        self.source_sync = SourceSync(path) if path else None
+        if save:
+            self.save_config_section("sync", dict(self.config.get("sync", DEFAULT_SYNC_CONFIG), source=path))
+        if self.source_sync is None:
+            logger.info("已取消关联名单源文件")
+            return
+        if os.path.exists(path):
+            self.source_watcher.addPath(path)
+        else:
+            logger.warning(f"名单源文件不存在: {path}")
+        logger.info(f"关联名单源文件: {path}")
+        self.sync_source()
+
+    def on_source_changed(self, path):
+        """源文件变化后等待写入完成再同步（连续的修改通知只同步一次）"""
+        self.sync_timer.start()
+
+    def sync_source(self):
+        """将源文件的变化增量同步到名单"""
+        if self.source_sync is None:
+            return
+        path = self.source_sync.source
+        # 许多编辑器以替换文件的方式保存，此时监视会失效，需要重新添加
+        if path not in self.source_watcher.files() and os.path.exists(path):
+            self.source_watcher.addPath(path)
+        
+        result = self.source_sync.sync()
+        if not result or not any(result) or self.resources_released:
+            return
+        diff = get_roster_changes(self.draw_pool.version)
+        diff["attributes_changed"] = result[2] > 0
+        if self.change_window is not None:
+            self.change_window.roster_version = diff["version"]
+            self.change_window.load_names()
+        self.on_names_changed(diff)
+
+    def save_config_section(self, key, value):
+        """只更新配置文件中的一项（保留设置窗口写入的其他项）"""
+        self.config[key] = value
+        config_path = CONFIG_PATH
+        try:
+            config = {}
+            if os.path.exists(config_path):
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            config[key] = value
+            with open(config_path, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2)
+        except Exception as e:
+            logger.error(f"保存配置失败: {e}")
+
+    def on_names_changed(self, diff):
+        """处理名单变化（增量修补姓名池，不中断正在进行的点名）"""
         logger.info("检测到名单变化")
-        if self.is_rolling:
+        if self.resources_released:
+            # 低内存模式下不维护姓名池，恢复时会重新读取
+            return
+        if diff["since"] != self.draw_pool.version:
+            # 通知的起点与姓名池的版本不一致时，按姓名池自己的版本重新计算变化
+            attributes_changed = diff.get("attributes_changed", False)
+            diff = get_roster_changes(self.draw_pool.version)
+            diff["attributes_changed"] = attributes_changed
+        
+        self.draw_pool.apply_diff(diff)
+        if diff["full"]:
+            if self.is_rolling:
+                self.toggle_roll()
+            self.remaining_names = []
+        else:
+            self.remaining_names = patch_name_list(self.remaining_names, diff, self.draw_pool)
+        
+        if not self.draw_pool.roster and self.is_rolling:
             self.toggle_roll()
-        self.remaining_names = []
-        self.names_updated.emit()
+        if diff.get("attributes_changed"):
+            self.refresh_scope_options()
+        self.names_updated.emit(diff)
 
     def open_settings(self):
         """打开设置窗口"""
-        if self.settings_window is None:
-            self.settings_window = SettingsWindow()
-            self.settings_window.theme_changed.connect(self.on_theme_changed)
-            self.settings_window.setWindowModality(Qt.ApplicationModal)
+        start = time.perf_counter() if registry.enabled else None
+        self.prewarm.finish("settings")
+        self.create_settings_window()
         self.settings_window.show()
+        self.observe_open("settings", start)
         logger.info("打开系统设置")
 
+    def on_config_changed(self, config):
+        """处理点名设置变更"""
+        self.config["random"] = config["random"]
+        self.draw_pool.recent.resize(self.config["random"].get("recent_exclude", 0))
+        logger.info("点名设置已更新")
+
     def on_theme_changed(self, theme_config):
         """处理主题变更"""
         self.config["theme"] = theme_config
@@ -368,6 +721,12 @@ class MainWindow(QWidget):
                 margin: 10px;
                 min-height: 60px;
             }
+            QLabel#batch_label {
+                color: #000000;
+                background-color: rgba(255, 255, 255, 200);
+                border-radius: 6px;
+                padding: 8px;
+            }
         """
         
         self.setStyleSheet(base_style + button_style + roll_button_style + result_label_style)
@@ -399,6 +758,63 @@ class MainWindow(QWidget):
         self.show()
         self.activateWindow()
 
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        if self.release_enabled:
+            self.release_timer.start()
+
+    def showEvent(self, event):
+        self.release_timer.stop()
+        self.restore_resources()
+        super().showEvent(event)
+        self.schedule_prewarm()
+
+    def release_resources(self):
+        """隐藏到托盘后释放内存：停止卡顿监视，关闭隐藏的子窗口，丢弃名单缓存"""
+        if self.resources_released or self.isVisible():
+            return
+        windows = [self.simple_window, self.change_window, self.settings_window]
+        if self.is_rolling or any(window is not None and window.isVisible() for window in windows):
+            # 正在点名或子窗口仍在使用，稍后再试
+            self.release_timer.start()
+            return
+        start = time.perf_counter()
+        before = rss_bytes()
+        self.watchdog.stop()
+        self.prewarm.cancel()
+        for window in windows:
+            if window is not None:
+                window.close()  # 名单窗口关闭时会先发出未通知的名单变化
+                window.deleteLater()
+        self.simple_window = self.change_window = self.settings_window = None
+        self.remaining_names = []
+        self.draw_pool.release()
+        QPixmapCache.clear()
+        self.resources_released = True
+        # 子窗口在事件循环处理延迟删除后才真正释放，之后再归还空闲内存
+        QTimer.singleShot(0, lambda: self.finish_release(before, start))
+
+    def finish_release(self, before, start):
+        trim_memory()
+        registry.observe("tray.release_ms", (time.perf_counter() - start) * 1000)
+        logger.info(f"已进入低内存模式，常驻内存 {format_bytes(before)} -> {format_bytes(rss_bytes())}")
+
+    def restore_resources(self):
+        """从低内存模式恢复：重新读取名单并恢复卡顿监视（子窗口在打开时重新创建）"""
+        if not self.resources_released:
+            return
+        start = time.perf_counter()
+        self.resources_released = False
+        self.draw_pool.reload()
+        self.watchdog.start()
+        elapsed = (time.perf_counter() - start) * 1000
+        registry.observe("tray.restore_ms", elapsed)
+        logger.info(f"已退出低内存模式，重新加载 {len(self.draw_pool.roster)} 个姓名用时 {elapsed:.1f} ms，"
+                    f"常驻内存 {format_bytes(rss_bytes())}")
+        if not self.isVisible() and self.release_enabled:
+            # 远程点名等后台使用结束后再次释放
+            self.release_timer.start()
+
     def closeEvent(self, event):
         reply = QMessageBox.question(
             self, '确认退出',
@@ -411,11 +827,20 @@ class MainWindow(QWidget):
             logger.info("应用程序退出")
             if hasattr(self, 'tray_icon'):
                 self.tray_icon.hide()
+            self.watchdog.stop()
+            if self.draw_server is not None:
+                self.draw_server.stop()
+            self.backup_service.stop()
+            shutdown_storage()
+            logger.info(f"数据库锁竞争统计: {get_lock_stats()}")
             event.accept()
         else:
             event.ignore()
 
 if __name__ == '__main__':
+    # 配置日志（在后台线程写入按大小轮换的日志文件）
+    setup_logging(load_logging_config(CONFIG_PATH))
+    
     # 确保单实例运行
     if sys.platform == 'win32':
         mutex = ctypes.windll.kernel32.CreateMutexW(None, False, "RandomCallMutex")
@@ -0,0 +1,177 @@
+import time
+import logging
+import importlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Optional
+from PyQt5.QtCore import QObject, QTimer, QEvent, pyqtSignal
+from PyQt5.QtWidgets import QApplication
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PREWARM_CONFIG = {
+    "enabled": True,
+    "delay_ms": 1000,   # 主窗口显示后等待多久开始预热
+    "slice_ms": 10,     # 每个分片的最长执行时间，之后让出事件循环
+    "idle_ms": 300      # 最近一次用户输入后需要空闲多久才继续预热
+}
+
+# 用户输入事件：这些事件之后的一段时间内暂停预热，保证输入响应
+INPUT_EVENTS = {
+    QEvent.MouseButtonPress, QEvent.MouseButtonRelease, QEvent.MouseButtonDblClick,
+    QEvent.MouseMove, QEvent.KeyPress, QEvent.KeyRelease, QEvent.Wheel,
+    QEvent.TouchBegin, QEvent.TouchUpdate
+}
+
+# 预热任务：返回生成器，每次yield为一个可以让出事件循环的分片点；
+# yield True 表示在等待后台工作，立即结束本分片
+Task = Callable[[], Optional[Iterator]]
+
+def import_in_background(modules: List[str]) -> Iterator[bool]:
+    """在后台线程中导入模块（如pandas），导入完成前每个分片都立即让出"""
+    def run():
+        for module in modules:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                logger.warning(f"预热导入 {module} 失败: {e}")
+
+    thread = threading.Thread(target=run, name="PrewarmImport", daemon=True)
+    thread.start()
+    while thread.is_alive():
+        yield True
+
+class PrewarmScheduler(QObject):
+    """
+    空闲预热调度：主窗口显示后，在事件循环空闲时按顺序分片执行预热任务
+    （导入模块、创建子窗口、加载名单），每个分片不超过 slice_ms，
+    有用户输入时暂停 idle_ms，使子窗口第一次打开和之后一样快
+    """
+    finished = pyqtSignal()
+
+    def __init__(self, config=None, parent=None):
+        super().__init__(parent)
+        self.config = dict(DEFAULT_PREWARM_CONFIG, **(config or {}))
+        self.tasks: "OrderedDict[str, Task]" = OrderedDict()
+        self.current = None  # 正在执行的任务 (名称, 生成器, 已用时间)
+        self.last_input = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.run_slice)
+        self._filtering = False
+
+    def eventFilter(self, obj, event):
+        if event.type() in INPUT_EVENTS:
+            self.last_input = time.monotonic()
+        return False
+
+    def schedule(self, name: str, task: Task):
+        """添加预热任务（同名任务已在队列中或正在执行时忽略）"""
+        if not self.config["enabled"] or name in self.tasks or (self.current and self.current[0] == name):
+            return
+        self.tasks[name] = task
+
+    def start(self):
+        """延迟 delay_ms 后开始执行队列中的任务"""
+        if not self.config["enabled"] or not (self.tasks or self.current):
+            return
+        if not self._filtering:
+            QApplication.instance().installEventFilter(self)
+            self._filtering = True
+        if not self.timer.isActive():
+            self.timer.start(self.config["delay_ms"])
+
+    def cancel(self):
+        """清空队列并放弃正在执行的任务"""
+        self.tasks.clear()
+        if self.current is not None:
+            self.current[1].close()
+            self.current = None
+        self._finish()
+
+    def is_idle(self) -> bool:
+        return not self.tasks and self.current is None
+
+    def finish(self, name: str):
+        """
+        用户在预热完成前打开窗口时调用：正在执行的同名任务立即执行完，
+        尚未开始的同名任务从队列中移除（由调用方直接创建）
+        """
+        self.tasks.pop(name, None)
+        if self.current is not None and self.current[0] == name:
+            current_name, steps, elapsed = self.current
+            self.current = None
+            start = time.perf_counter()
+            try:
+                for _ in steps:
+                    pass
+            except Exception as e:
+                logger.error(f"预热任务 {current_name} 出错: {e}")
+            self._task_done(current_name, elapsed + time.perf_counter() - start)
+            if self.is_idle():
+                self._finish()
+
+    def run_slice(self):
+        # 最近有用户输入时推迟
+        wait = self.last_input + self.config["idle_ms"] / 1000 - time.monotonic()
+        if wait > 0:
+            registry.incr("prewarm.deferred")
+            self.timer.start(int(wait * 1000) + 1)
+            return
+
+        budget = self.config["slice_ms"] / 1000
+        slice_start = time.perf_counter()
+        waiting = False
+        while time.perf_counter() - slice_start < budget:
+            if self.current is None:
+                if not self.tasks:
+                    break
+                name, task = self.tasks.popitem(last=False)
+                task_start = time.perf_counter()
+                try:
+                    steps = task()
+                except Exception as e:
+                    logger.error(f"预热任务 {name} 出错: {e}")
+                    steps = None
+                if steps is None:
+                    self._task_done(name, time.perf_counter() - task_start)
+                    continue
+                self.current = (name, steps, time.perf_counter() - task_start)
+
+            name, steps, elapsed = self.current
+            step_start = time.perf_counter()
+            try:
+                waiting = next(steps) is True
+                done = False
+            except StopIteration:
+                done = True
+            except Exception as e:
+                logger.error(f"预热任务 {name} 出错: {e}")
+                done = True
+            elapsed += time.perf_counter() - step_start
+            if done:
+                self.current = None
+                self._task_done(name, elapsed)
+            else:
+                self.current = (name, steps, elapsed)
+                if waiting:
+                    break
+
+        registry.observe("prewarm.slice_ms", (time.perf_counter() - slice_start) * 1000)
+        if self.is_idle():
+            self._finish()
+        else:
+            # 等待后台工作时稍后再查看，否则让出一次事件循环后继续
+            self.timer.start(20 if waiting else 0)
+
+    def _task_done(self, name: str, elapsed: float):
+        registry.observe(f"prewarm.{name}_ms", elapsed * 1000)
+        logger.info(f"预热 {name} 完成，用时 {elapsed * 1000:.1f} ms")
+
+    def _finish(self):
+        self.timer.stop()
+        if self._filtering:
+            QApplication.instance().removeEventFilter(self)
+            self._filtering = False
+        self.finished.emit()
@@ -2,12 +2,19 @@ import json
 import os
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QComboBox, QSpinBox, QPushButton,
-                            QMessageBox, QGroupBox, QTabWidget, QColorDialog)
-from PyQt5.QtCore import Qt, pyqtSignal
-from PyQt5.QtGui import QColor
+                            QMessageBox, QGroupBox, QTabWidget, QColorDialog,
+                            QCheckBox, QTableWidget, QTableWidgetItem, QHeaderView,
+                            QFileDialog, QShortcut)
+from PyQt5.QtCore import pyqtSignal, QTimer
+from PyQt5.QtGui import QColor, QKeySequence
+from utils.metrics import registry
 
 class SettingsWindow(QWidget):
     theme_changed = pyqtSignal(dict)  # 主题改变信号
+    config_changed = pyqtSignal(dict)  # 配置改变信号
+
+    # 设置窗口管理的配置项，保存时只更新这几项
+    SECTIONS = ("theme", "simple_mode", "random")
 
     def __init__(self, config_path='config.json'):
         super().__init__()
@@ -35,7 +42,8 @@ class SettingsWindow(QWidget):
             "random": {
                 "min_speed": 50,
                 "max_speed": 200,
-                "duration": 3000
+                "duration": 3000,
+                "recent_exclude": 0
             }
         }
 
@@ -69,14 +77,23 @@ class SettingsWindow(QWidget):
             self.config["random"] = {
                 "min_speed": self.min_speed_spin.value(),
                 "max_speed": self.max_speed_spin.value(),
-                "duration": self.duration_spin.value()
+                "duration": self.duration_spin.value(),
+                "recent_exclude": self.recent_spin.value()
             }
 
+            # 重新读取配置文件再合并，保留主窗口在设置窗口打开后写入的其他项（如 sync.source）
+            config = {}
+            if os.path.exists(self.config_path):
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            config.update({key: self.config[key] for key in self.SECTIONS})
+            self.config = config
             with open(self.config_path, 'w', encoding='utf-8') as f:
                 json.dump(self.config, f, indent=2)
             
             # 发送主题改变信号
             self.theme_changed.emit(self.config["theme"])
+            self.config_changed.emit(self.config)
             
             QMessageBox.information(self, "成功", "配置已保存！")
             return True
@@ -105,6 +122,10 @@ class SettingsWindow(QWidget):
 
         layout.addWidget(self.tabs)
 
+        # 诊断标签页默认隐藏，按 Ctrl+Shift+D 显示
+        self.diagnostics_tab = None
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self, self.show_diagnostics_tab)
+
         # 按钮区域
         btn_layout = QHBoxLayout()
         self.save_btn = QPushButton("保存")
@@ -239,12 +260,115 @@ class SettingsWindow(QWidget):
         duration_layout.addWidget(self.duration_spin)
         random_layout.addLayout(duration_layout)
         
+        recent_layout = QHBoxLayout()
+        recent_label = QLabel("排除最近点名(次):")
+        self.recent_spin = QSpinBox()
+        self.recent_spin.setRange(0, 1000)
+        self.recent_spin.setValue(self.config["random"].get("recent_exclude", 0))
+        recent_layout.addWidget(recent_label)
+        recent_layout.addWidget(self.recent_spin)
+        random_layout.addLayout(recent_layout)
+        
         random_group.setLayout(random_layout)
         layout.addWidget(random_group)
 
         layout.addStretch()
         self.random_tab.setLayout(layout)
 
+    def show_diagnostics_tab(self):
+        """显示诊断标签页（性能指标）"""
+        if self.diagnostics_tab is None:
+            self.diagnostics_tab = QWidget()
+            self.init_diagnostics_tab()
+            self.tabs.addTab(self.diagnostics_tab, "诊断")
+        self.tabs.setCurrentWidget(self.diagnostics_tab)
+        self.update_metrics_timer()
+
+    def init_diagnostics_tab(self):
+        layout = QVBoxLayout()
+
+        top_layout = QHBoxLayout()
+        self.metrics_check = QCheckBox("启用性能统计")
+        self.metrics_check.setChecked(registry.enabled)
+        self.metrics_check.toggled.connect(registry.set_enabled)
+        reset_btn = QPushButton("重置")
+        reset_btn.clicked.connect(self.reset_metrics)
+        dump_btn = QPushButton("导出JSON")
+        dump_btn.clicked.connect(self.dump_metrics)
+        top_layout.addWidget(self.metrics_check)
+        top_layout.addStretch()
+        top_layout.addWidget(reset_btn)
+        top_layout.addWidget(dump_btn)
+        layout.addLayout(top_layout)
+
+        columns = ["指标", "次数", "平均", "p50", "p95", "p99", "最大"]
+        self.metrics_table = QTableWidget(0, len(columns))
+        self.metrics_table.setHorizontalHeaderLabels(columns)
+        self.metrics_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.metrics_table.verticalHeader().setVisible(False)
+        self.metrics_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.metrics_table)
+        layout.addWidget(QLabel("耗时单位为毫秒（import.rows_per_s 为行/秒）"))
+        self.diagnostics_tab.setLayout(layout)
+
+        # 只在诊断页可见时每秒刷新（切换标签页、隐藏窗口时停止）
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.setInterval(1000)
+        self.metrics_timer.timeout.connect(self.refresh_metrics)
+        self.tabs.currentChanged.connect(self.update_metrics_timer)
+
+    def update_metrics_timer(self):
+        """按诊断页是否可见启动或停止刷新定时器"""
+        if self.diagnostics_tab is None:
+            return
+        if self.isVisible() and self.tabs.currentWidget() is self.diagnostics_tab:
+            if not self.metrics_timer.isActive():
+                self.metrics_timer.start()
+                self.refresh_metrics()
+        else:
+            self.metrics_timer.stop()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.update_metrics_timer()
+
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.update_metrics_timer()
+
+    def refresh_metrics(self):
+        """刷新诊断页的指标表格"""
+        if not self.isVisible() or self.tabs.currentWidget() is not self.diagnostics_tab:
+            return
+        snapshot = registry.snapshot()
+        rows = [
+            [name, summary["count"]] + [
+                f"{summary[key]:.3f}" for key in ("mean", "p50", "p95", "p99", "max")
+            ]
+            for name, summary in snapshot["histograms"].items() if summary["count"]
+        ]
+        rows += [[name, count] + [""] * 5 for name, count in sorted(snapshot["counters"].items())]
+
+        self.metrics_table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for col, value in enumerate(values):
+                self.metrics_table.setItem(row, col, QTableWidgetItem(str(value)))
+
+    def reset_metrics(self):
+        registry.reset()
+        self.refresh_metrics()
+
+    def dump_metrics(self):
+        """将当前指标导出为JSON文件"""
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出性能指标", "metrics.json", "JSON文件 (*.json)")
+        if not file_path:
+            return
+        try:
+            registry.dump(file_path)
+            QMessageBox.information(self, "成功", f"性能指标已导出到:\n{file_path}")
+        except Exception as e:
+            QMessageBox.warning(self, "导出失败", f"无法导出性能指标:\n{str(e)}")
+
     def choose_color(self):
         """选择颜色"""
         color = QColorDialog.getColor(QColor(self.config["simple_mode"].get("bg_color", "#323232")), self, "选择背景色")
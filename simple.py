@@ -1,15 +1,14 @@
-from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QLabel, 
+from PyQt5.QtWidgets import (QWidget, QLabel, 
                             QPushButton, QMessageBox)
 from PyQt5.QtCore import Qt, QTimer, QPoint
 from PyQt5.QtGui import QFont, QMouseEvent, QColor
-from utils.database import get_names
-import random
+from utils.draw import patch_name_list
+from utils.rng import get_rng
 
 class SimpleCallWindow(QWidget):
     def __init__(self, main_window):
         super().__init__()
         self.main_window = main_window
-        self.names = get_names()
         self.remaining_names = []
         self.init_ui()
         self.drag_pos = QPoint()
@@ -20,6 +19,8 @@ class SimpleCallWindow(QWidget):
         self.timer.timeout.connect(self.update_roll)
         self.is_running = False
         self.interval = 50
+        
+        self.main_window.names_updated.connect(self.on_names_updated)
 
     def init_ui(self):
         self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint)
@@ -60,14 +61,17 @@ class SimpleCallWindow(QWidget):
 
     def toggle_roll(self):
         """切换点名状态"""
-        if not self.names:
+        if not self.main_window.draw_pool.roster:
             QMessageBox.warning(self, "名单为空", "请先添加名单数据")
             return
             
         if not self.is_running:
-            # 开始新的一轮点名
-            self.remaining_names = self.names.copy()
-            random.shuffle(self.remaining_names)
+            # 从本轮尚未点到的姓名开始（排除最近点到的姓名）
+            self.remaining_names = self.main_window.draw_pool.available()
+            if not self.remaining_names:
+                QMessageBox.warning(self, "提示", "当前点名范围内没有可点的姓名")
+                return
+            get_rng().shuffle(self.remaining_names)
             self.interval = self.main_window.config["random"].get("min_speed", 50)
             
         self.is_running = not self.is_running
@@ -82,11 +86,16 @@ class SimpleCallWindow(QWidget):
         """更新点名滚动效果"""
         if not self.remaining_names:
             # 如果名单已空，重新加载
-            self.remaining_names = get_names().copy()
-            random.shuffle(self.remaining_names)
+            self.remaining_names = self.main_window.draw_pool.available()
+            if not self.remaining_names:
+                # 点名范围内没有姓名（如范围筛选后为空），停止滚动
+                self.toggle_roll()
+                QMessageBox.warning(self, "提示", "当前点名范围内没有可点的姓名")
+                return
+            get_rng().shuffle(self.remaining_names)
             
         # 随机选择一个名字
-        selected_name = random.choice(self.remaining_names)
+        selected_name = get_rng().choice(self.remaining_names)
         self.result_label.setText(selected_name)
         
         # 从剩余名单中移除已点到的名字
@@ -99,6 +108,7 @@ class SimpleCallWindow(QWidget):
         
         # 达到最大速度时停止
         if self.interval >= max_speed:
+            self.main_window.draw_pool.record([selected_name])
             self.toggle_roll()
 
     def apply_theme(self, theme_config):
@@ -176,6 +186,15 @@ class SimpleCallWindow(QWidget):
         
         self.setStyleSheet(self.bg_style + button_style)
 
+    def on_names_updated(self, diff):
+        """名单变化时修补本轮剩余姓名"""
+        if diff["full"]:
+            self.remaining_names = []
+        else:
+            self.remaining_names = patch_name_list(
+                self.remaining_names, diff, self.main_window.draw_pool
+            )
+
     def return_to_main(self):
         """返回主界面"""
         self.close()
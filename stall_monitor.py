@@ -0,0 +1,149 @@
+import os
+import re
+import sys
+import time
+import threading
+import traceback
+import logging
+from datetime import datetime
+from PyQt5.QtCore import QObject, QTimer, QEvent
+from PyQt5.QtWidgets import QApplication
+from utils.database import get_app_data_dir
+from utils.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCHDOG_CONFIG = {
+    "enabled": False,      # 诊断用，开启后有心跳定时器和监视线程的开销
+    "threshold_ms": 200,   # 事件循环超过该时间没有响应视为卡顿
+    "heartbeat_ms": 50,    # 主线程心跳间隔
+    "track_events": False, # 通过事件过滤器记录正在处理的事件（每个事件都会调用一次Python）
+    "report": "stall_report.log"
+}
+
+# 进入Qt事件循环的调用（app.exec_()、dialog.exec() 等），不匹配 conn.execute(...)
+EVENT_LOOP_CALL = re.compile(r'\.exec_?\(')
+
+# 事件类型编号到名称的映射（用于报告）
+EVENT_NAMES = {
+    value: name for name, value in vars(QEvent).items()
+    if isinstance(value, QEvent.Type)
+}
+
+class StallWatchdog(QObject):
+    """
+    事件循环卡顿监视：主线程定时心跳，监视线程发现心跳超过阈值未更新时
+    抓取主线程的Python调用栈，结合事件过滤器记录的正在处理的事件，写入卡顿报告
+    """
+
+    def __init__(self, config=None, parent=None):
+        super().__init__(parent)
+        self.config = dict(DEFAULT_WATCHDOG_CONFIG, **(config or {}))
+        report = self.config["report"]
+        if not os.path.isabs(report):
+            report = os.path.join(get_app_data_dir(), report)
+        self.report_path = report
+        self.threshold = self.config["threshold_ms"] / 1000
+        self.main_ident = threading.main_thread().ident
+
+        self.last_beat = time.monotonic()
+        self.current_event = None  # 正在处理的事件 (接收者类名, 事件类型)
+        self.stall_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.heartbeat = QTimer(self)
+        self.heartbeat.setInterval(self.config["heartbeat_ms"])
+        self.heartbeat.timeout.connect(self.beat)
+
+    def beat(self):
+        self.last_beat = time.monotonic()
+
+    def eventFilter(self, obj, event):
+        # 只记录事件，不拦截（在监视线程中不访问Qt对象）
+        self.current_event = (type(obj).__name__, event.type())
+        return False
+
+    def start(self):
+        if not self.config["enabled"] or self._thread is not None:
+            return
+        self.beat()
+        self.heartbeat.start()
+        if self.config["track_events"]:
+            QApplication.instance().installEventFilter(self)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="StallWatchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"卡顿监视已启动，阈值 {self.config['threshold_ms']} ms")
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.heartbeat.stop()
+        if self.config["track_events"]:
+            QApplication.instance().removeEventFilter(self)
+        logger.info(f"卡顿监视已停止，共记录 {self.stall_count} 次卡顿")
+
+    def _run(self):
+        interval = self.config["heartbeat_ms"] / 1000
+        stall = None  # 当前卡顿：(开始时间, 调用栈, 事件描述)
+        while not self._stop.wait(interval):
+            beat = self.last_beat
+            now = time.monotonic()
+            if stall is None:
+                if now - beat > self.threshold:
+                    # 卡顿进行中：立即抓取主线程调用栈
+                    stall = (beat, self._capture_stack(), self._describe_event())
+            elif beat > stall[0]:
+                # 心跳恢复，卡顿结束
+                self._report(beat - stall[0], stall[1], stall[2])
+                stall = None
+
+    def _capture_stack(self):
+        frame = sys._current_frames().get(self.main_ident)
+        return traceback.extract_stack(frame) if frame is not None else []
+
+    def _describe_event(self) -> str:
+        current = self.current_event
+        if current is None:
+            return "未知"
+        receiver, event_type = current
+        return f"{receiver} {EVENT_NAMES.get(event_type, int(event_type))}"
+
+    @staticmethod
+    def slot_frame(stack) -> str:
+        """
+        卡顿时正在执行的槽函数：事件循环(exec_)调用的第一层Python函数
+        嵌套事件循环（模态对话框）时取最内层
+        """
+        slot = None
+        for index, frame in enumerate(stack[:-1]):
+            if EVENT_LOOP_CALL.search(frame.line or ''):
+                slot = stack[index + 1]
+        if slot is None and stack:
+            slot = stack[0]
+        return f"{os.path.basename(slot.filename)}:{slot.lineno} {slot.name}" if slot else "未知"
+
+    def _report(self, duration, stack, event):
+        self.stall_count += 1
+        duration_ms = duration * 1000
+        registry.incr("stall.count")
+        registry.observe("stall.duration_ms", duration_ms)
+        slot = self.slot_frame(stack)
+        logger.warning(f"事件循环卡顿 {duration_ms:.0f} ms，槽函数: {slot}，事件: {event}")
+
+        lines = [
+            f"=== {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} 卡顿 {duration_ms:.0f} ms "
+            f"(阈值 {self.config['threshold_ms']} ms)",
+            f"事件: {event}",
+            f"槽函数: {slot}",
+            "调用栈:",
+        ] + [line.rstrip('\n') for line in traceback.format_list(stack)]
+        try:
+            with open(self.report_path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n\n')
+        except OSError as e:
+            logger.error(f"写入卡顿报告失败: {e}")
@@ -0,0 +1,22 @@
+import os
+import sys
+import shutil
+import tempfile
+
+# 导入 utils.database 时会初始化数据库，测试只使用临时数据库
+_IMPORT_DIR = tempfile.mkdtemp(prefix="randomcall_tests_")
+os.environ["RANDOMCALL_DB"] = os.path.join(_IMPORT_DIR, "import.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from utils import database
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(_IMPORT_DIR, ignore_errors=True)
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """每个测试使用独立的空数据库"""
+    monkeypatch.setattr(database, "DB_PATH", str(tmp_path / "names.db"))
+    database.init_db()
+    return database
@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip("numpy")
+from utils import audit
+from utils.rng import configure_rng
+
+@pytest.fixture
+def seeded():
+    yield configure_rng({"mode": "seeded", "seed": "audit"})
+    configure_rng()
+
+@pytest.mark.parametrize("names, k, recent", [(7, 3, 2), (5, 1, 0), (6, 2, 3)])
+def test_simulation_matches_draw_pool(db, seeded, names, k, recent):
+    result = audit.cross_check(names, k, recent, sessions=150, draws=6, seed=1)
+    assert result["impossible"] == 0
+    assert result["p"] > 0.001
+
+def test_cross_check_detects_rule_mismatch(db, seeded):
+    observed = audit.gap_counts(audit.replay(4, 1, 0, sessions=150, draws=8), 4)
+    expected = audit.gap_counts(audit.simulate(4, 1, 2, sessions=5000, draws=8, seed=1), 4)
+    assert audit.compare_gaps(observed, expected)["p"] < 0.001
+
+def test_replay_leaves_database_untouched(db, seeded):
+    db.add_names(["张三"])
+    audit.replay(3, 1, sessions=2, draws=2)
+    assert db.get_names() == ["张三"] and db.count_history() == 0
@@ -0,0 +1,62 @@
+import os
+import threading
+from datetime import datetime, timedelta
+
+from utils import backup
+from utils.backup import BackupService, list_backups, rotate_backups
+
+def _touch(directory, stamp: datetime) -> str:
+    path = os.path.join(directory, f"names_backup_{stamp.strftime('%Y%m%d_%H%M%S')}.db")
+    open(path, "w").close()
+    return path
+
+def test_rotate_keeps_newest_per_day_and_week(tmp_path):
+    start = datetime(2024, 1, 1, 8, 0, 0)  # 周一
+    paths = []
+    for day in range(21):
+        paths.append(_touch(tmp_path, start + timedelta(days=day)))
+        paths.append(_touch(tmp_path, start + timedelta(days=day, hours=6)))
+
+    removed = rotate_backups(str(tmp_path), keep_daily=3, keep_weekly=2)
+
+    kept = {path for _, path in list_backups(str(tmp_path))}
+    # 最近3天每天最新的一份，最近一周的最新一份与之重合，再加上前一周的最新一份
+    expected = {paths[-1], paths[-3], paths[-5], paths[-15]}
+    assert kept == expected
+    assert len(removed) == len(paths) - len(expected)
+    assert not any(os.path.exists(path) for path in removed)
+
+def test_rotate_ignores_non_matching_files(tmp_path):
+    others = ["names.db", "names_backup_latest.db", "names_backup_20240101_080000.db.partial", "notes.txt"]
+    for name in others:
+        (tmp_path / name).write_text("x")
+    old = _touch(tmp_path, datetime(2024, 1, 1, 8, 0, 0))
+    new = _touch(tmp_path, datetime(2024, 1, 2, 8, 0, 0))
+
+    assert rotate_backups(str(tmp_path), keep_daily=1, keep_weekly=0) == [old]
+    assert os.path.exists(new)
+    for name in others:
+        assert (tmp_path / name).exists()
+
+def test_rotate_empty_dir(tmp_path):
+    assert rotate_backups(str(tmp_path), keep_daily=7, keep_weekly=4) == []
+    assert list_backups(str(tmp_path)) == []
+
+def test_run_backup_leaves_only_finished_file(db, tmp_path):
+    backup_dir = tmp_path / "backups"
+    backup_dir.mkdir()
+    service = BackupService({"pages": 1}, backup_dir=str(backup_dir))
+    assert service.run_backup()
+    files = os.listdir(backup_dir)
+    assert len(files) == 1 and backup.BACKUP_PATTERN.match(files[0])
+
+def test_stop_does_not_wait_past_timeout(tmp_path, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(BackupService, "run_backup", lambda self: release.wait(5))
+    service = BackupService({"exit_timeout_s": 0.1}, backup_dir=str(tmp_path))
+    service._stop.set()  # 跳过定时备份，只剩退出时的那一次
+    service.start()
+    try:
+        assert service.stop() is False
+    finally:
+        release.set()
@@ -0,0 +1,64 @@
+import json
+import pytest
+
+import cli
+from utils.rng import configure_rng
+
+@pytest.fixture
+def run(db, monkeypatch, capsys):
+    """在临时数据库上运行命令行，返回 (退出码, --json 输出)"""
+    monkeypatch.setattr(cli, "setup_logging", lambda config: None)
+    monkeypatch.setattr(cli, "load_config", lambda: {"random": {"recent_exclude": 0}})
+
+    def run(*argv):
+        capsys.readouterr()
+        code = cli.main(["--json", *argv])
+        out = capsys.readouterr().out
+        return code, json.loads(out) if out else None
+
+    yield run
+    configure_rng(None)
+
+def test_build_parser():
+    parser = cli.build_parser()
+    args = parser.parse_args(["--json", "draw", "-k", "3", "--seed", "42"])
+    assert (args.func, args.k, args.seed, args.recent, args.json) == (cli.cmd_draw, 3, "42", None, True)
+    args = parser.parse_args(["export", "out.csv", "--history", "--start", "2024-01-01"])
+    assert (args.func, args.history, args.start, args.end) == (cli.cmd_export, True, "2024-01-01", None)
+    with pytest.raises(SystemExit):
+        parser.parse_args([])
+
+def test_draw_records_history(run, db):
+    assert run("draw")[0] == 1  # 名单为空
+    db.add_names(["张三", "李四", "王五"])
+    code, names = run("draw", "-k", "2", "--seed", "7")
+    assert code == 0 and len(set(names)) == 2
+    assert [name for name, _ in db.get_called_history()] == names[::-1]
+
+    # 同一种子和同一本轮状态下结果相同
+    db.reset_cycle()
+    assert run("draw", "-k", "2", "--seed", "7")[1] == names
+
+def test_stats(run, db):
+    db.add_names(["张三", "李四", "王五"])
+    db.record_called_names(["张三"])
+    db.record_called_name("张三")
+    code, stats = run("stats", "--top", "1")
+    assert code == 0
+    assert stats["names"] == 3 and stats["history"] == 2
+    assert stats["cycle_called"] == 1 and stats["cycle_remaining"] == 2
+    assert stats["top"] == {"张三": 2}
+
+def test_export_names_and_history(run, db, tmp_path):
+    db.add_names(["张三", "李四"])
+    db.record_called_name("李四")
+
+    path = tmp_path / "names.csv"
+    assert run("export", str(path)) == (0, {"rows": 2, "file": str(path)})
+    assert sorted(path.read_text(encoding="utf-8-sig").splitlines()[1:]) == ["张三", "李四"]
+
+    path = tmp_path / "history.txt"
+    assert run("export", str(path), "--history")[1]["rows"] == 1
+    assert path.read_text(encoding="utf-8").startswith("李四\t")
+
+    assert run("export", str(tmp_path / "names.pdf"))[0] == 1
@@ -0,0 +1,121 @@
+from utils.draw import DrawPool, RecentWindow, draw_names, partition_names
+
+def test_available_does_not_reset_exhausted_cycle(db):
+    db.add_names(["张三", "李四"])
+    pool = DrawPool()
+    pool.record(["张三", "李四"])
+    bits = db.get_cycle_bits()
+
+    names, new_cycle = pool.candidates()
+    assert new_cycle
+    assert sorted(names) == ["张三", "李四"]
+    assert pool.available()
+    # 只查看候选不会清空已保存的本轮进度
+    assert db.get_cycle_bits() == bits
+    assert DrawPool().cycle_exhausted()
+
+def test_record_starts_new_cycle_when_exhausted(db):
+    db.add_names(["张三", "李四"])
+    pool = DrawPool()
+    pool.record(["张三", "李四"])
+    pool.record(["张三"])
+    assert DrawPool().available() == ["李四"]
+    assert db.count_history() == 3
+
+def test_draw_names_carries_over_into_new_cycle(db):
+    db.add_names(["甲", "乙", "丙"])
+    pool = DrawPool()
+    pool.record(["甲", "乙"])
+    drawn = draw_names(2, pool)
+    assert drawn[0] == "丙" and len(set(drawn)) == 2
+    # 补足的姓名计入新一轮，上一轮剩余的丙不计入
+    assert sorted(DrawPool().available()) == sorted({"甲", "乙", "丙"} - {drawn[1]})
+
+def test_empty_scope_draws_nothing(db):
+    db.add_names(["张三", "李四"])
+    db.set_attributes([("张三", "性别", "男"), ("李四", "性别", "男")])
+    pool = DrawPool()
+    pool.set_filter({"性别": ["女"]})
+    assert pool.available() == []
+    assert draw_names(1, pool) == []
+    assert db.count_history() == 0
+
+def test_unique_attribute_is_not_indexed(db):
+    names = [f"学生{i}" for i in range(200)]
+    db.add_names(names)
+    db.set_attributes([(name, "学号", str(i)) for i, name in enumerate(names)] +
+                      [(name, "性别", "男女"[i % 2]) for i, name in enumerate(names)])
+    pool = DrawPool()
+    assert pool.index.keys() == ["性别"]
+    assert pool.index.skipped == ["学号"]
+    pool.set_filter({"性别": ["女"]})
+    assert len(pool.available()) == 100
+
+def test_scoped_refill_keeps_class_wide_cycle(db):
+    db.add_names(["a", "b", "c", "d", "e"])
+    db.set_attributes([("a", "g", "x"), ("b", "g", "x"), ("c", "g", "y")])
+    pool = DrawPool()
+    pool.record(["a", "c", "d"])
+    pool.set_filter({"g": ["x"]})
+    drawn = draw_names(2, pool)
+    assert drawn[0] == "b" and sorted(drawn) == ["a", "b"]
+    # 范围内补足不会清空其他人的本轮进度
+    pool.set_filter()
+    assert sorted(pool.available()) == ["e"]
+    assert sorted(DrawPool().available()) == ["e"]
+
+def test_partition_sizes_and_membership():
+    names = [f"学生{i}" for i in range(23)]
+    groups = partition_names(4, names=names)
+    assert sorted(len(group) for group in groups) == [5, 6, 6, 6]
+    assert sorted(name for group in groups for name in group) == sorted(names)
+    # 组数多于人数时多出的组为空
+    assert sorted(map(len, partition_names(5, names=["甲", "乙"]))) == [0, 0, 0, 1, 1]
+    assert partition_names(0, names=names) == []
+    assert partition_names(3, names=[]) == []
+
+def test_balanced_partition_spreads_call_counts(db):
+    often = [f"常{i}" for i in range(4)]
+    rarely = [f"少{i}" for i in range(4)]
+    db.add_names(often + rarely)
+    for _ in range(3):
+        for name in often:
+            db.record_called_name(name)
+    counts = db.get_call_counts()
+    for _ in range(20):
+        groups = partition_names(2, balance=True, names=often + rarely)
+        assert [len(group) for group in groups] == [4, 4]
+        assert [sum(counts.get(name, 0) for name in group) for group in groups] == [6, 6]
+
+def test_recent_window_evicts_oldest_and_counts_repeats():
+    window = RecentWindow(3)
+    window.extend(["甲", "乙", "甲"])
+    assert len(window) == 3 and window.counts == {"甲": 2, "乙": 1}
+    window.push("丙")  # 移出最早的甲，另一次甲仍在窗口内
+    assert "甲" in window and window.counts == {"甲": 1, "乙": 1, "丙": 1}
+    window.extend(["丁", "丁"])
+    assert "甲" not in window and "乙" not in window
+    assert window.counts == {"丙": 1, "丁": 2}
+
+    window.resize(1)
+    assert list(window.buffer) == ["丁"] and window.counts == {"丁": 1}
+    window.resize(0)
+    window.push("戊")
+    assert len(window) == 0 and window.counts == {}
+
+def test_recent_window_filter_keeps_one_candidate():
+    window = RecentWindow(5)
+    window.extend(["甲", "乙", "丙"])
+    assert window.filter(["甲", "乙", "丙", "丁"]) == ["丁"]
+    # 窗口覆盖全部名单时只排除最近的 len(names)-1 个
+    assert window.filter(["甲", "乙", "丙"]) == ["甲"]
+    assert window.filter([]) == []
+
+def test_recent_window_seeds_from_history(db):
+    db.add_names(["甲", "乙", "丙"])
+    for name in ["甲", "乙", "丙", "乙"]:
+        db.record_called_name(name)
+    window = RecentWindow(3)
+    window.seed_from_history()
+    assert list(window.buffer) == ["乙", "丙", "乙"]
+    assert window.counts == {"乙": 2, "丙": 1}
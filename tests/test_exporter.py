@@ -0,0 +1,45 @@
+import pytest
+from utils.exporter import ExportCancelled, write_rows
+
+HEADER = ["姓名", "点名时间"]
+BATCHES = [[("张三", "2024-01-01 08:00:00"), ("李四", "2024-01-01 08:05:00")],
+           [("王五", "2024-01-02 09:00:00")]]
+
+def test_csv_has_bom_header_and_rows(tmp_path):
+    path = tmp_path / "history.csv"
+    progress = []
+    assert write_rows(str(path), 'csv', HEADER, BATCHES, progress=progress.append) == 3
+    assert progress == [2, 3]
+    assert path.read_bytes().startswith(b'\xef\xbb\xbf')
+    assert path.read_text(encoding='utf-8-sig').splitlines() == [
+        "姓名,点名时间", "张三,2024-01-01 08:00:00", "李四,2024-01-01 08:05:00", "王五,2024-01-02 09:00:00",
+    ]
+
+def test_txt_is_tab_separated_without_header(tmp_path):
+    path = tmp_path / "history.txt"
+    assert write_rows(str(path), 'txt', HEADER, BATCHES) == 3
+    assert path.read_text(encoding='utf-8').splitlines() == [
+        "张三\t2024-01-01 08:00:00", "李四\t2024-01-01 08:05:00", "王五\t2024-01-02 09:00:00",
+    ]
+
+def test_excel_rows(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    path = tmp_path / "history.xlsx"
+    assert write_rows(str(path), 'excel', HEADER, BATCHES) == 3
+    sheet = openpyxl.load_workbook(path, read_only=True).worksheets[0]
+    assert [list(row) for row in sheet.iter_rows(values_only=True)] == [
+        HEADER, *[list(row) for batch in BATCHES for row in batch]
+    ]
+
+def test_empty_export_writes_header_only(tmp_path):
+    path = tmp_path / "names.csv"
+    assert write_rows(str(path), 'csv', ["姓名"], []) == 0
+    assert path.read_text(encoding='utf-8-sig').splitlines() == ["姓名"]
+
+def test_cancel_stops_before_next_batch(tmp_path):
+    path = tmp_path / "history.txt"
+    progress = []
+    with pytest.raises(ExportCancelled):
+        write_rows(str(path), 'txt', HEADER, BATCHES, progress=progress.append,
+                   cancelled=lambda: bool(progress))
+    assert progress == [2]
@@ -0,0 +1,43 @@
+import pytest
+from utils.importer import detect_layout, iter_csv_names, iter_excel_names
+
+TITLED_ROWS = [
+    ["2024级三班学生名单", None, None],
+    ["序号", "姓名", "性别"],
+    [1, "张三", "男"],
+    [2, "李四", "女"],
+]
+
+def test_title_row_is_not_header():
+    assert detect_layout(TITLED_ROWS) == (1, 1)
+
+def test_exact_header_preferred_over_keyword():
+    rows = [["学生编号", "姓名"], ["S001", "张三"], ["S002", "李四"]]
+    assert detect_layout(rows) == (0, 1)
+
+def test_fallback_skips_title_row():
+    rows = [["2024级三班"], ["编号", "称呼（必填）"], ["1", "张三"], ["2", "李四"]]
+    assert detect_layout(rows) == (1, 1)
+
+def test_no_header():
+    assert detect_layout([["张三"], ["李四"]]) == (None, 0)
+
+def test_csv_with_title_row(tmp_path):
+    path = tmp_path / "names.csv"
+    path.write_text("2024级三班学生名单,,\n序号,姓名,性别\n1,张三,男\n2,李四,女\n", encoding="utf-8")
+    names, attributes = [], []
+    for chunk, chunk_attributes, _ in iter_csv_names(str(path)):
+        names += chunk
+        attributes += chunk_attributes
+    assert names == ["张三", "李四"]
+    assert ("张三", "性别", "男") in attributes and ("张三", "序号", "1") in attributes
+
+def test_excel_with_title_row(tmp_path):
+    openpyxl = pytest.importorskip("openpyxl")
+    workbook = openpyxl.Workbook()
+    for row in TITLED_ROWS:
+        workbook.active.append(row)
+    path = tmp_path / "names.xlsx"
+    workbook.save(path)
+    names = [name for chunk, _, _ in iter_excel_names(str(path)) for name in chunk]
+    assert names == ["张三", "李四"]
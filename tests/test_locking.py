@@ -0,0 +1,47 @@
+import sqlite3
+import pytest
+
+import cli
+
+@pytest.fixture
+def locking(db, monkeypatch):
+    """很短的等待和退避，测试结束后恢复原来的锁设置和统计"""
+    for name in ("BUSY_TIMEOUT_MS", "WRITE_RETRIES", "RETRY_BASE_DELAY"):
+        monkeypatch.setattr(db, name, getattr(db, name))
+    db.configure_locking(busy_timeout_ms=10, write_retries=2, retry_base_delay=0.001)
+    db.reset_lock_stats()
+    yield db
+    db.reset_lock_stats()
+
+def test_write_retries_then_reraises_while_locked(locking):
+    locking.get_connection().close()  # 先切换到WAL模式，与程序运行时一致
+    holder = sqlite3.connect(locking.DB_PATH, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")
+    calls = []
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            locking._write(calls.append)
+    finally:
+        holder.rollback()
+        holder.close()
+
+    assert calls == []  # 一直没有拿到写锁，work 不会执行
+    stats = locking.get_lock_stats()
+    assert stats["retries"] == 2
+    assert stats["failures"] == 1
+
+def test_write_succeeds_after_lock_released(locking):
+    assert locking._write(lambda conn: conn.execute("SELECT 1").fetchone()[0]) == 1
+    assert locking.get_lock_stats()["retries"] == 0
+
+def test_cli_applies_database_config(db, monkeypatch):
+    for name in ("BUSY_TIMEOUT_MS", "WRITE_RETRIES", "RETRY_BASE_DELAY"):
+        monkeypatch.setattr(db, name, getattr(db, name))
+    monkeypatch.setattr(cli, "setup_logging", lambda config: None)
+    monkeypatch.setattr(cli, "load_config", lambda: {
+        "database": {"busy_timeout_ms": 1234, "write_retries": 7, "retry_base_delay": 0.5,
+                     "storage": "disk", "flush_interval_s": 1.0}
+    })
+    assert cli.main(["--json", "stats"]) == 0
+    assert (db.BUSY_TIMEOUT_MS, db.WRITE_RETRIES, db.RETRY_BASE_DELAY) == (1234, 7, 0.5)
+    assert db._storage["mode"] == "disk"
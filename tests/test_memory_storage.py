@@ -0,0 +1,53 @@
+import sqlite3
+import threading
+import pytest
+
+@pytest.fixture
+def memory_db(db, monkeypatch):
+    for key in ("mode", "anchor", "generation", "flushed", "interval", "thread"):
+        monkeypatch.setitem(db._storage, key, db._storage[key])
+    db.configure_storage("memory", flush_interval_s=3600)
+    yield db
+    db.shutdown_storage()
+    db._storage["anchor"].close()
+
+def disk_names(db):
+    conn = sqlite3.connect(db.DB_PATH)
+    try:
+        return [name for (name,) in conn.execute("SELECT name FROM names ORDER BY name")]
+    finally:
+        conn.close()
+
+def test_changes_reach_disk_only_on_flush(memory_db):
+    memory_db.add_names(["张三", "李四"])
+    assert sorted(memory_db.get_names()) == ["张三", "李四"]
+    assert disk_names(memory_db) == []
+    assert memory_db.flush_to_disk()
+    assert disk_names(memory_db) == ["张三", "李四"]
+
+    memory_db.delete_name("张三")
+    memory_db.shutdown_storage()
+    assert disk_names(memory_db) == ["李四"]
+
+def test_readers_do_not_see_uncommitted_rows(memory_db):
+    inserted, release = threading.Event(), threading.Event()
+
+    def work(conn):
+        conn.execute("INSERT INTO names (name, name_key) VALUES ('王五', name_key('王五'))")
+        inserted.set()
+        release.wait(5)
+
+    writer = threading.Thread(target=memory_db._write, args=(work,))
+    writer.start()
+    inserted.wait(5)
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(memory_db.get_names()))
+    reader.start()
+    reader.join(0.2)
+    # 写事务提交前读取会等待，而不是读到未提交的行
+    assert reader.is_alive() and not seen
+    release.set()
+    writer.join(5)
+    reader.join(5)
+    assert seen == [["王五"]]
+    assert sum(len(batch) for batch in memory_db.iter_names(1)) == 1
@@ -0,0 +1,56 @@
+import pytest
+from utils.metrics import BUCKETS_PER_OCTAVE, Histogram, MetricsRegistry
+
+# 百分位返回所在桶的上界，相对误差不超过一个桶的宽度
+BUCKET_RATIO = 2 ** (1 / BUCKETS_PER_OCTAVE)
+
+def test_percentiles_within_one_bucket():
+    histogram = Histogram()
+    for value in range(1, 1001):
+        histogram.observe(float(value))
+    for p in (1, 50, 90, 95, 99):
+        exact = 1000 * p / 100
+        assert exact <= histogram.percentile(p) <= exact * BUCKET_RATIO
+    assert histogram.percentile(100) == 1000.0
+    assert histogram.percentile(0) <= 1.0 * BUCKET_RATIO
+
+def test_percentile_never_exceeds_max():
+    histogram = Histogram()
+    for value in (3.0, 3.0, 3.0):
+        histogram.observe(value)
+    assert histogram.percentile(50) == histogram.percentile(99) == 3.0
+
+def test_tiny_values_share_first_bucket():
+    histogram = Histogram()
+    histogram.observe(0.0)
+    histogram.observe(0.0001)
+    assert histogram.buckets == {0: 2}
+    assert histogram.percentile(99) == 0.0001
+
+def test_summary():
+    histogram = Histogram()
+    assert histogram.summary() == {"count": 0}
+    assert histogram.percentile(50) == 0.0
+    for value in (1.0, 2.0, 6.0):
+        histogram.observe(value)
+    summary = histogram.summary()
+    assert (summary["count"], summary["mean"], summary["min"], summary["max"]) == (3, 3.0, 1.0, 6.0)
+    assert summary["p50"] == pytest.approx(2.0, rel=BUCKET_RATIO - 1)
+
+def test_registry_records_only_when_enabled():
+    registry = MetricsRegistry()
+
+    @registry.timed("work")
+    def work(fail=False):
+        if fail:
+            raise ValueError()
+
+    work()
+    assert registry.snapshot()["histograms"] == {}
+    registry.set_enabled(True)
+    work()
+    with pytest.raises(ValueError):
+        work(fail=True)
+    snapshot = registry.snapshot()
+    assert snapshot["histograms"]["work"]["count"] == 2
+    assert snapshot["counters"] == {"work.errors": 1}
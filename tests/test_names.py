@@ -0,0 +1,88 @@
+import sqlite3
+
+def test_variants_share_one_name_key(db):
+    assert db.add_name("张三")
+    assert not db.add_name(" 张三 ")
+    assert db.add_name("ＡＢＣ　Ｄ")
+    assert not db.add_name("abc d")
+    assert not db.add_name("ABC  D")
+    assert db.add_names(["李四", "李四", "Li  Si", "li si", "王五"]) == 3
+    assert sorted(db.get_names()) == sorted(["张三", "ＡＢＣ　Ｄ", "李四", "Li  Si", "王五"])
+
+def test_rename_collisions(db):
+    db.add_names(["张三", "李四", "王五", "zhao"])
+    db.record_called_name("张三")
+    outcomes = db.rename_names([
+        ("张三", "张小三"),      # 正常重命名
+        ("李四", "ＷＡＮＧ"),    # 与同一批的另一个新姓名去重键相同
+        ("王五", "wang"),
+        ("zhao", "ZHAO"),        # 只改大小写，去重键与自身相同
+        ("赵六", "赵七"),
+    ])
+    assert outcomes == {"张三": "renamed", "李四": "duplicate", "王五": "duplicate",
+                        "zhao": "renamed", "赵六": "missing"}
+    assert db.rename_names([("李四", "张小三 "), ("王五", " ")]) == {"李四": "exists", "王五": "invalid"}
+    assert sorted(db.get_names()) == sorted(["张小三", "李四", "王五", "ZHAO"])
+    # 点名历史跟随重命名
+    assert [name for name, _ in db.get_called_history()] == ["张小三"]
+
+def test_migration_merges_existing_duplicates(tmp_path, monkeypatch, db):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE names (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+    conn.execute("""CREATE TABLE history (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL,
+                    called_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.executemany("INSERT INTO names (name) VALUES (?)", [("Zhang San",), ("zhang  san",), ("李四",)])
+    conn.executemany("INSERT INTO history (name) VALUES (?)", [("zhang  san",), ("Zhang San",)])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_PATH", str(path))
+    db.init_db()
+    assert sorted(db.get_names()) == ["Zhang San", "李四"]
+    assert [name for name, _ in db.get_called_history()] == ["Zhang San", "Zhang San"]
+    assert not db.add_name("ZHANG SAN")
+
+def attributes_by_name(db):
+    names = {name_id: name for name_id, name in db.get_name_ids()}
+    return {(names[name_id], key, value) for name_id, key, value in db.get_attributes()}
+
+def test_bulk_delete_reports_each_name(db):
+    db.add_names(["张三", "李四", "王五"])
+    db.set_attributes([("张三", "小组", "1"), ("王五", "小组", "2")])
+    assert db.bulk_delete_names(["张三", "赵六", "李四"]) == {"张三": True, "赵六": False, "李四": True}
+    assert db.get_names() == ["王五"]
+    # 属性随姓名一起删除
+    assert attributes_by_name(db) == {("王五", "小组", "2")}
+    assert db.bulk_delete_names([]) == {}
+    # 同一姓名重复出现只算一次
+    assert db.delete_names(["王五", "王五"]) == 1
+    assert db.get_names() == []
+
+def test_move_names_overwrites_group(db):
+    db.add_names(["张三", "李四", "王五"])
+    db.set_attributes([("张三", "小组", "1"), ("张三", "性别", "男"), ("李四", "小组", "1")])
+    assert db.move_names(["张三", "王五", "赵六"], "小组", "2") == {"张三": True, "王五": True, "赵六": False}
+    assert attributes_by_name(db) == {
+        ("张三", "小组", "2"), ("张三", "性别", "男"), ("李四", "小组", "1"), ("王五", "小组", "2"),
+    }
+    assert db.move_names([], "小组", "3") == {}
+
+def test_migration_moves_attributes_of_merged_names(tmp_path, monkeypatch, db):
+    path = tmp_path / "old.db"
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE names (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL)")
+    conn.execute("""CREATE TABLE name_attributes (
+                    name_id INTEGER NOT NULL REFERENCES names(id) ON DELETE CASCADE,
+                    key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (name_id, key))""")
+    conn.executemany("INSERT INTO names (name) VALUES (?)", [("Zhang San",), ("zhang  san",)])
+    conn.executemany("INSERT INTO name_attributes VALUES (?, ?, ?)",
+                     [(1, "小组", "1"), (2, "小组", "2"), (2, "性别", "男")])
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(db, "DB_PATH", str(path))
+    db.init_db()
+    assert db.get_names() == ["Zhang San"]
+    # 保留姓名已有的属性不变，被合并姓名的其他属性转过来，不留下孤立的属性行
+    assert sorted(db.get_attributes()) == [(1, "小组", "1"), (1, "性别", "男")]
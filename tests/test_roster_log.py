@@ -0,0 +1,51 @@
+def ids(db):
+    return {name: name_id for name_id, name in db.get_name_ids()}
+
+def test_add_delete_rename(db):
+    db.add_names(["张三", "李四", "王五"])
+    start = db.get_roster_version()
+    before = ids(db)
+
+    db.add_names(["赵六"])
+    db.delete_name("李四")
+    db.rename_names([("王五", "王小五")])
+    after = ids(db)
+
+    diff = db.get_roster_changes(start)
+    assert diff["since"] == start
+    assert diff["version"] == db.get_roster_version() == start + 3
+    assert not diff["full"]
+    assert diff["added"] == {after["赵六"]: "赵六"}
+    assert diff["removed"] == [before["李四"]]
+    assert diff["renamed"] == {before["王五"]: "王小五"}
+
+def test_changes_within_window_collapse(db):
+    db.add_names(["张三"])
+    start = db.get_roster_version()
+    db.add_names(["李四", "王五"])
+    db.rename_names([("李四", "李小四")])  # 新增后重命名：仍只算新增，取最新姓名
+    db.delete_name("王五")                 # 新增后删除：两边都不出现
+    db.rename_names([("张三", "张小三")])
+    db.delete_name("张小三")               # 重命名后删除：只算删除
+    diff = db.get_roster_changes(start)
+    assert list(diff["added"].values()) == ["李小四"]
+    assert len(diff["removed"]) == 1
+    assert diff["renamed"] == {}
+
+def test_empty_diff(db):
+    db.add_names(["张三"])
+    version = db.get_roster_version()
+    assert db.get_roster_changes(version) == {
+        "since": version, "version": version, "full": False,
+        "added": {}, "removed": [], "renamed": {},
+    }
+
+def test_since_older_than_retention_needs_full_reload(db, monkeypatch):
+    db.add_names(["张三", "李四", "王五", "赵六"])
+    monkeypatch.setattr(db, "ROSTER_LOG_KEEP", 1)
+    db.init_db()  # 启动时按保留条数清理变更日志
+    diff = db.get_roster_changes(0)
+    assert diff["full"]
+    assert diff["version"] == db.get_roster_version() == 4
+    # 仍在保留范围内的版本可以计算差异
+    assert not db.get_roster_changes(3)["full"]
@@ -0,0 +1,36 @@
+import logging
+import pytest
+from utils import search
+from utils.search import NameIndex
+
+def test_incremental_updates_match_rebuild():
+    index = NameIndex(["张三", "张三丰", "李四"])
+    index.add("王五")
+    index.remove(0)
+    index.update(2, "张小四")
+    assert index.search("张") == [1, 2]
+    assert index.search("三") == [1]
+    assert index.search("王") == [3]
+    assert index.search("") == [1, 2, 3]
+    assert len(index) == 3
+    assert index.matches(2, "小四") and not index.matches(0, "张")
+
+def test_search_returns_copy():
+    index = NameIndex(["张三", "张四"])
+    index.search("张").clear()
+    assert index.search("张") == [0, 1]
+
+def test_pinyin_initials_search():
+    pytest.importorskip("pypinyin")
+    index = NameIndex(["张三", "李四", "张小三"])
+    assert index.search("zs") == [0]
+    assert index.search("zxs") == [2]
+
+def test_missing_pinyin_logs_warning(monkeypatch, caplog):
+    monkeypatch.setattr(search, "lazy_pinyin", None)
+    monkeypatch.setattr(search, "_pinyin_warned", False)
+    with caplog.at_level(logging.WARNING, logger="utils.search"):
+        NameIndex(["张三"])
+        NameIndex(["李四"])
+    assert [record.message for record in caplog.records].count(
+        "未安装pypinyin，拼音首字母搜索不可用（pip install pypinyin）") == 1
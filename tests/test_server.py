@@ -0,0 +1,40 @@
+import urllib.error
+import urllib.request
+import pytest
+from utils.client import DrawClient
+from utils.server import DrawServer
+
+@pytest.fixture
+def server(db):
+    db.add_names(["张三", "李四"])
+    server = DrawServer({"port": 0, "token": "secret"}, on_draw=lambda k: ["张三"][:k])
+    port = server.start()
+    yield f"http://127.0.0.1:{port}"
+    server.stop()
+
+def test_token_required_on_every_route(server):
+    anonymous = DrawClient(server)
+    for request in (anonymous.roster, anonymous.history, anonymous.draw):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            request()
+        assert error.value.code == 403
+    with pytest.raises(ConnectionError):
+        anonymous.subscribe()
+
+    client = DrawClient(server, token="secret")
+    assert sorted(client.roster()["names"]) == ["张三", "李四"]
+    assert client.draw()["names"] == ["张三"]
+    client.subscribe().close()
+
+def test_cross_origin_request_rejected(server):
+    client = DrawClient(server, token="secret")
+    request = urllib.request.Request(f"{server}/roster", headers={
+        "X-Token": "secret", "Origin": "http://evil.example"})
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(request, timeout=5)
+    assert error.value.code == 403
+    assert "names" in client.roster()
+
+def test_remote_host_requires_token():
+    with pytest.raises(ValueError):
+        DrawServer({"host": "0.0.0.0", "port": 0}).start()
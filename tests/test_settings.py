@@ -0,0 +1,52 @@
+import json
+import os
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+QtWidgets = pytest.importorskip("PyQt5.QtWidgets")
+
+@pytest.fixture(scope="module")
+def app():
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+
+def test_save_keeps_sections_written_by_main_window(app, tmp_path, monkeypatch):
+    import setting
+    monkeypatch.setattr(setting.QMessageBox, "information", lambda *args: None)
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({
+        "theme": {"main": "light", "simple": "dark", "style": "classic"},
+        "simple_mode": {"width": 320, "height": 220, "opacity": 200, "bg_color": "#323232"},
+        "random": {"min_speed": 50, "max_speed": 200, "duration": 3000, "recent_exclude": 0},
+    }), encoding="utf-8")
+    window = setting.SettingsWindow(str(path))
+
+    # 设置窗口打开期间主窗口写入了关联文件
+    config = json.loads(path.read_text(encoding="utf-8"))
+    config["sync"] = {"source": "roster.xlsx"}
+    path.write_text(json.dumps(config), encoding="utf-8")
+
+    window.recent_spin.setValue(3)
+    assert window.save_config()
+    saved = json.loads(path.read_text(encoding="utf-8"))
+    assert saved["sync"] == {"source": "roster.xlsx"}
+    assert saved["random"]["recent_exclude"] == 3
+    window.close()
+
+def test_diagnostics_refresh_only_while_visible(app, tmp_path):
+    import setting
+    window = setting.SettingsWindow(str(tmp_path / "config.json"))
+    window.show()
+    window.show_diagnostics_tab()
+    assert window.metrics_timer.isActive()
+
+    window.tabs.setCurrentIndex(0)
+    assert not window.metrics_timer.isActive()
+    window.tabs.setCurrentWidget(window.diagnostics_tab)
+    assert window.metrics_timer.isActive()
+
+    window.hide()
+    assert not window.metrics_timer.isActive()
+    window.show()
+    assert window.metrics_timer.isActive()
+    window.close()
+    assert not window.metrics_timer.isActive()
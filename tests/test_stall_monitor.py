@@ -0,0 +1,27 @@
+import os
+import traceback
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PyQt5.QtWidgets")
+from stall_monitor import StallWatchdog
+
+def frame(filename, lineno, name, line):
+    return traceback.FrameSummary(filename, lineno, name, lookup_line=False, line=line)
+
+def test_slot_frame_skips_database_execute():
+    stack = [
+        frame("main.py", 841, "<module>", "sys.exit(app.exec_())"),
+        frame("change.py", 400, "delete_selected_name", "outcomes = bulk_delete_names(names)"),
+        frame("database.py", 480, "delete_name", "_write(lambda conn: conn.execute(sql))"),
+        frame("database.py", 240, "<lambda>", "conn.execute(sql)"),
+    ]
+    assert StallWatchdog.slot_frame(stack) == "change.py:400 delete_selected_name"
+
+def test_slot_frame_uses_innermost_event_loop():
+    stack = [
+        frame("main.py", 841, "<module>", "sys.exit(app.exec_())"),
+        frame("main.py", 300, "open_dialog", "dialog.exec()"),
+        frame("change.py", 50, "accept", "self.save()"),
+    ]
+    assert StallWatchdog.slot_frame(stack) == "change.py:50 accept"
@@ -0,0 +1,39 @@
+from utils.sync import SourceSync
+
+def write_source(path, rows):
+    path.write_text("姓名,小组\n" + "".join(f"{name},{group}\n" for name, group in rows), encoding="utf-8")
+
+def test_sync_applies_only_deltas(db, tmp_path):
+    source = tmp_path / "roster.csv"
+    write_source(source, [("张三", "一组"), ("李四", "二组"), ("王五", "一组")])
+    sync = SourceSync(str(source))
+    assert sync.sync() == (3, 0, 3)
+    # 内容未变化时不再写入
+    assert sync.sync() is None
+
+    write_source(source, [("张三", "一组"), ("李四", "三组"), ("赵六", "二组")])
+    assert sync.sync() == (1, 1, 2)
+    assert sorted(db.get_names()) == ["张三", "李四", "赵六"]
+    attributes = {(name_id, key): value for name_id, key, value in db.get_attributes()}
+    ids = {name: name_id for name_id, name in db.get_name_ids()}
+    assert attributes[(ids["李四"], "小组")] == "三组"
+    assert attributes[(ids["张三"], "小组")] == "一组"
+
+def test_empty_source_does_not_clear_roster(db, tmp_path):
+    source = tmp_path / "roster.csv"
+    write_source(source, [("张三", "一组")])
+    sync = SourceSync(str(source))
+    sync.sync()
+    source.write_text("", encoding="utf-8")
+    assert sync.sync() is None
+    assert db.get_names() == ["张三"]
+
+def test_first_sync_after_restart_skips_unchanged_rows(db, tmp_path):
+    source = tmp_path / "roster.csv"
+    write_source(source, [("张三", "一组"), ("李四", "二组")])
+    SourceSync(str(source)).sync()
+
+    # 重新启动后第一次同步：内容未变化的行不重新写入属性
+    assert SourceSync(str(source)).sync() == (0, 0, 0)
+    write_source(source, [("张三", "一组"), ("李四", "三组")])
+    assert SourceSync(str(source)).sync() == (0, 0, 1)
@@ -0,0 +1,269 @@
+"""
+点名公平性审计：用NumPy向量化并行模拟大量独立的点名会话，逐步复现 DrawPool 的抽取规则
+（本轮不重复、轮次用完自动开始新一轮、最近K次排除窗口及其回退规则、
+多人抽取时本轮剩余不足先取完再从新一轮补足），用卡方检验判断每个人被点到的机会是否均等
+
+所有会话从相同的初始状态（空的本轮位图和排除窗口）开始，此时规则对每个姓名对称，
+第d次抽取点到每个人的概率都应相等。点名范围筛选只是缩小名单，不单独模拟
+
+模拟与实际实现是否一致由 cross_check 核对：在临时数据库上用真实的 DrawPool/draw_names
+运行少量会话，比较两者"再次点到同一人的间隔"的分布
+"""
+import os
+import math
+import time
+import tempfile
+from typing import Dict, Optional
+import numpy as np
+from utils.rng import get_rng, rng_info
+
+def chi2_sf(x: float, df: int) -> float:
+    """卡方分布的上尾概率 P(X >= x)（正则化不完全伽马函数 Q(df/2, x/2)）"""
+    if x <= 0:
+        return 1.0
+    a, x = df / 2, x / 2
+    log_prefix = -x + a * math.log(x) - math.lgamma(a)
+    if x < a + 1:
+        # 级数展开求 P，再取补
+        term = total = 1 / a
+        n = a
+        for _ in range(10000):
+            n += 1
+            term *= x / n
+            total += term
+            if abs(term) < abs(total) * 1e-15:
+                break
+        return max(0.0, 1 - total * math.exp(log_prefix))
+    # 连分式求 Q（Lentz方法）
+    tiny = 1e-300
+    b = x + 1 - a
+    c, d = 1 / tiny, 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = 1 / (d if abs(d) > tiny else tiny)
+        c = b + an / c
+        c = c if abs(c) > tiny else tiny
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+def chi_square(counts: np.ndarray) -> Dict[str, float]:
+    """计数与均匀分布的卡方拟合优度检验"""
+    counts = np.asarray(counts, dtype=np.float64)
+    expected = counts.sum() / len(counts)
+    stat = float(((counts - expected) ** 2 / expected).sum())
+    df = len(counts) - 1
+    return {"chi2": stat, "df": df, "p": chi2_sf(stat, df)}
+
+def _recent_filter(mask: np.ndarray, last_push: np.ndarray, pushes: np.ndarray,
+                   recent: int) -> np.ndarray:
+    """RecentWindow.filter 的向量化版本：去掉最近 recent 次点名中的姓名，全部被排除时只保留最早点到的一个"""
+    if recent == 0:
+        return mask
+    in_window = last_push > (pushes - recent)[:, None]
+    pool = mask & ~in_window
+    fallback = ~pool.any(axis=1) & mask.any(axis=1)
+    if fallback.any():
+        rows = np.nonzero(fallback)[0]
+        oldest = np.where(mask[rows], last_push[rows], np.iinfo(np.int64).max).argmin(axis=1)
+        pool[rows, oldest] = True
+    return pool
+
+def simulate(names: int, k: int = 1, recent: int = 0, sessions: int = 10000, draws: int = 100,
+             seed: Optional[int] = None) -> np.ndarray:
+    """
+    并行模拟 sessions 个会话，每个会话连续抽取 draws 次、每次k人（与 draw_names 相同的规则）
+    返回形状为 (draws, sessions, k) 的姓名序号，不足k人的位置为-1
+    """
+    if names < 1 or k < 1:
+        raise ValueError("名单人数和抽取人数必须大于0")
+    gen = np.random.default_rng(seed)
+    rows = np.arange(sessions)[:, None]
+    called = np.zeros((sessions, names), dtype=bool)
+    last_push = np.full((sessions, names), np.iinfo(np.int64).min // 2, dtype=np.int64)
+    pushes = np.zeros(sessions, dtype=np.int64)
+    result = np.empty((draws, sessions, k), dtype=np.int64)
+    take = min(k, names)
+
+    for step in range(draws):
+        # DrawPool.available：本轮点完时开始新一轮
+        exhausted = called.all(axis=1)
+        called[exhausted] = False
+        candidates = _recent_filter(~called, last_push, pushes, recent)
+        short = candidates.sum(axis=1) < k
+
+        # 随机键：本轮候选 [0,1)，人数不足时新一轮补足的候选 [1,2)，其余为3；
+        # 取键最小的k个，得到打乱的本轮候选在前、补足的姓名在后的顺序
+        keys = gen.random((sessions, names))
+        allowed = candidates
+        if short.any():
+            fresh = _recent_filter(np.ones_like(called), last_push, pushes, recent)
+            fresh &= ~candidates & short[:, None]
+            keys[fresh] += 1
+            allowed = candidates | fresh
+        keys[~allowed] = 3
+        if take <= 8:
+            # 人数少时逐个取最小值比部分排序快得多，且结果已按键排好序
+            chosen = np.empty((sessions, take), dtype=np.int64)
+            chosen_keys = np.empty((sessions, take))
+            for j in range(take):
+                chosen[:, j] = keys.argmin(axis=1)
+                chosen_keys[:, j] = keys[rows[:, 0], chosen[:, j]]
+                keys[rows[:, 0], chosen[:, j]] = 4
+        else:
+            chosen = np.argpartition(keys, take - 1, axis=1)[:, :take]
+            chosen_keys = np.take_along_axis(keys, chosen, axis=1)
+            order = chosen_keys.argsort(axis=1)
+            chosen = np.take_along_axis(chosen, order, axis=1)
+            chosen_keys = np.take_along_axis(chosen_keys, order, axis=1)
+        valid = chosen_keys < 2
+
+        # DrawPool.record：补足时开始新一轮，只有补足的姓名计入新一轮
+        if short.any():
+            called[short] = False
+        mark = valid & ((chosen_keys >= 1) | ~short[:, None])
+        called[np.broadcast_to(rows, chosen.shape)[mark], chosen[mark]] = True
+        # 按点名顺序推入排除窗口
+        offsets = np.cumsum(valid, axis=1)
+        last_push[np.broadcast_to(rows, chosen.shape)[valid], chosen[valid]] = \
+            (pushes[:, None] + offsets)[valid]
+        pushes += valid.sum(axis=1)
+
+        step_result = np.full((sessions, k), -1, dtype=np.int64)
+        step_result[:, :take] = np.where(valid, chosen, -1)
+        result[step] = step_result
+    return result
+
+def engine_check(names: int, k: int, samples: int) -> Dict[str, float]:
+    """用当前随机数引擎（get_rng）做 samples 次 sample(range(names), k)，检验第一个结果的计数是否均匀"""
+    rng = get_rng()
+    population = range(names)
+    firsts = np.fromiter((rng.sample(population, k)[0] for _ in range(samples)),
+                         dtype=np.int64, count=samples)
+    return chi_square(np.bincount(firsts, minlength=names))
+
+def replay(names: int, k: int = 1, recent: int = 0, sessions: int = 200, draws: int = 10) -> np.ndarray:
+    """
+    用真实的 DrawPool/draw_names（当前随机数引擎）在临时数据库上运行 sessions 个会话，
+    每个会话从空的本轮位图和排除窗口开始，返回与 simulate 相同形状的姓名序号
+    """
+    from utils import database
+    from utils.draw import DrawPool, RecentWindow, draw_names
+
+    if database._storage["mode"] == "memory":
+        raise RuntimeError("内存存储模式下不能切换到临时数据库")
+    labels = [f"#{i:06d}" for i in range(names)]
+    position = {label: i for i, label in enumerate(labels)}
+    result = np.full((draws, sessions, k), -1, dtype=np.int64)
+    saved = database.DB_PATH
+    with tempfile.TemporaryDirectory(prefix="randomcall_audit_") as directory:
+        database.DB_PATH = os.path.join(directory, "audit.db")
+        try:
+            database.init_db()
+            database.add_names(labels)
+            pool = DrawPool()
+            for session in range(sessions):
+                database.reset_cycle()
+                pool.reload()
+                pool.recent = RecentWindow(recent)
+                for step in range(draws):
+                    picked = draw_names(k, pool)
+                    result[step, session, :len(picked)] = [position[name] for name in picked]
+        finally:
+            database.DB_PATH = saved
+    return result
+
+def gap_counts(picks: np.ndarray, names: int) -> np.ndarray:
+    """
+    统计每次点中距离同一人上次被点中的抽取次数，返回形状为 (draws, draws+1) 的计数：
+    [d, g] 为第d次抽取中间隔为g的次数，g=0表示之前没有点到过。
+    本轮不重复、排除窗口和补足规则都会体现在这个分布上
+    """
+    draws, sessions, k = picks.shape
+    last = np.full((sessions, names), -1, dtype=np.int64)
+    counts = np.zeros((draws, draws + 1), dtype=np.int64)
+    rows = np.arange(sessions)
+    for step in range(draws):
+        chosen = picks[step]
+        valid = chosen >= 0
+        session_rows = np.broadcast_to(rows[:, None], chosen.shape)[valid]
+        previous = last[session_rows, chosen[valid]]
+        gaps = np.where(previous >= 0, step - previous, 0)
+        counts[step] += np.bincount(gaps, minlength=draws + 1)
+        last[session_rows, chosen[valid]] = step
+    return counts
+
+def cross_check(names: int, k: int = 1, recent: int = 0, sessions: int = 200, draws: int = 10,
+                simulate_sessions: int = 20000, seed: Optional[int] = None) -> Dict[str, float]:
+    """
+    核对 simulate 与真实 DrawPool 的规则一致：以大量模拟会话的间隔分布为期望，
+    对 replay 的间隔分布做卡方拟合优度检验（期望次数不足5的类别合并），p值很小说明两者不一致
+    """
+    expected = gap_counts(simulate(names, k, recent, simulate_sessions, draws, seed), names)
+    observed = gap_counts(replay(names, k, recent, sessions, draws), names)
+    return compare_gaps(observed, expected)
+
+def compare_gaps(observed: np.ndarray, expected: np.ndarray) -> Dict[str, float]:
+    """
+    逐次抽取比较两个间隔分布（见 gap_counts），expected 按 observed 每次抽取的总数缩放；
+    期望次数不足5的类别合并，各次抽取的卡方值和自由度相加
+    """
+    stat, df, impossible = 0.0, 0, 0
+    for seen, base in zip(observed, expected):
+        if not base.sum():
+            continue
+        base = base / base.sum() * seen.sum()
+        # 模拟中从未出现的间隔在实际实现中出现，说明规则不一致
+        impossible += int(seen[base == 0].sum())
+        large = base >= 5
+        cells_seen = np.append(seen[large], seen[~large].sum())
+        cells_base = np.append(base[large], base[~large].sum())
+        keep = cells_base > 0
+        stat += float(((cells_seen[keep] - cells_base[keep]) ** 2 / cells_base[keep]).sum())
+        df += int(keep.sum()) - 1
+    p = 0.0 if impossible else (chi2_sf(stat, df) if df else 1.0)
+    return {"chi2": stat, "df": df, "p": p, "impossible": impossible}
+
+def run_audit(names: int, k: int = 1, recent: int = 0, sessions: int = 20000, draws: int = 100,
+              seed: Optional[int] = None, alpha: float = 0.01, engine_samples: int = 200000) -> dict:
+    """
+    运行审计并汇总：
+    totals      全部点名中每人被点到的次数（有轮次规则时会比随机更均匀，p值接近1是正常的）
+    per_draw    每个会话的第d次抽取中每人被点到的次数，对每个d单独检验，
+                报告最小p值的Bonferroni校正值和平均 chi2/df（应接近1）
+    engine      当前随机数引擎（rng 配置）自身的均匀性
+    """
+    start = time.perf_counter()
+    picks = simulate(names, k, recent, sessions, draws, seed)
+    simulated = time.perf_counter() - start
+
+    valid = picks[picks >= 0]
+    totals = chi_square(np.bincount(valid, minlength=names))
+    per_draw_p, ratios = [], []
+    for step in range(draws):
+        first = picks[step, :, 0]
+        test = chi_square(np.bincount(first[first >= 0], minlength=names))
+        per_draw_p.append(test["p"])
+        ratios.append(test["chi2"] / test["df"] if test["df"] else 0.0)
+    per_draw = {
+        "tests": draws,
+        "min_p": min(per_draw_p),
+        "bonferroni_p": min(1.0, min(per_draw_p) * draws),
+        "mean_chi2_per_df": float(np.mean(ratios)),
+    }
+    engine = engine_check(names, k, engine_samples) if engine_samples else None
+
+    passed = per_draw["bonferroni_p"] >= alpha and (engine is None or engine["p"] >= alpha)
+    return {
+        "names": names, "k": k, "recent": recent, "sessions": sessions, "draws": draws,
+        "simulated_picks": int(valid.size), "seed": seed, "alpha": alpha,
+        "rng": rng_info(),
+        "totals": totals, "per_draw": per_draw, "engine": engine,
+        "passed": passed,
+        "seconds": time.perf_counter() - start, "simulate_seconds": simulated,
+    }
@@ -0,0 +1,132 @@
+import os
+import re
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+from utils.database import backup_database, get_backup_dir
+
+logger = logging.getLogger(__name__)
+
+BACKUP_PATTERN = re.compile(r'^names_backup_(\d{8}_\d{6})\.db$')
+
+DEFAULT_BACKUP_CONFIG = {
+    "enabled": True,
+    "interval_hours": 24,
+    "pages": 64,
+    "keep_daily": 7,
+    "keep_weekly": 4,
+    "on_exit": True,        # 退出时在后台线程中再备份一次
+    "exit_timeout_s": 10    # 退出时最多等待备份的秒数，超时后放弃（不会留下不完整的备份）
+}
+
+def list_backups(backup_dir: str) -> List[Tuple[datetime, str]]:
+    """列出备份文件 (备份时间, 路径)，按时间从新到旧"""
+    backups = []
+    for filename in os.listdir(backup_dir):
+        match = BACKUP_PATTERN.match(filename)
+        if match:
+            stamp = datetime.strptime(match.group(1), '%Y%m%d_%H%M%S')
+            backups.append((stamp, os.path.join(backup_dir, filename)))
+    backups.sort(reverse=True)
+    return backups
+
+def rotate_backups(backup_dir: str, keep_daily: int, keep_weekly: int) -> List[str]:
+    """
+    按轮换策略清理备份：保留最近keep_daily天每天最新的一份、
+    最近keep_weekly周每周最新的一份，返回被删除的文件
+    """
+    keep = set()
+    days, weeks = [], []
+    for stamp, path in list_backups(backup_dir):
+        day = stamp.date()
+        week = stamp.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.append(day)
+            keep.add(path)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.append(week)
+            keep.add(path)
+
+    removed = []
+    for _, path in list_backups(backup_dir):
+        if path not in keep:
+            try:
+                os.remove(path)
+                removed.append(path)
+            except OSError as e:
+                logger.warning(f"删除旧备份失败 {path}: {e}")
+    if removed:
+        logger.info(f"轮换清理 {len(removed)} 个旧备份")
+    return removed
+
+class BackupService:
+    """
+    后台备份服务：按间隔在后台线程中分步执行在线备份，
+    每份备份都经过 quick_check 校验，并按天/周轮换保留
+    """
+
+    def __init__(self, config: Optional[dict] = None, backup_dir: Optional[str] = None):
+        self.config = dict(DEFAULT_BACKUP_CONFIG, **(config or {}))
+        self.backup_dir = backup_dir or get_backup_dir()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def last_backup_time(self) -> Optional[datetime]:
+        backups = list_backups(self.backup_dir)
+        return backups[0][0] if backups else None
+
+    def run_backup(self) -> bool:
+        """立即执行一次备份并轮换（同一时间只会有一个备份在进行）"""
+        with self._lock:
+            path = os.path.join(
+                self.backup_dir,
+                f"names_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+            )
+            # 先写到临时文件，校验通过后再改名，进程中途退出时不会留下不完整的备份
+            partial = path + ".partial"
+            if not backup_database(partial, pages=self.config["pages"]):
+                return False
+            os.replace(partial, path)
+            rotate_backups(self.backup_dir, self.config["keep_daily"], self.config["keep_weekly"])
+            return True
+
+    def _seconds_until_due(self) -> float:
+        interval = timedelta(hours=self.config["interval_hours"])
+        last = self.last_backup_time()
+        if last is None:
+            return 0
+        return max(0.0, (last + interval - datetime.now()).total_seconds())
+
+    def _run(self):
+        while not self._stop.wait(self._seconds_until_due()):
+            if not self.run_backup():
+                # 失败后稍后重试，避免连续失败占用资源
+                if self._stop.wait(600):
+                    break
+        if self.config["on_exit"]:
+            self.run_backup()
+
+    def start(self):
+        """启动定时备份线程"""
+        if not self.config["enabled"] or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="BackupService", daemon=True)
+        self._thread.start()
+        logger.info(f"备份服务已启动，间隔 {self.config['interval_hours']} 小时")
+
+    def stop(self) -> bool:
+        """
+        停止定时备份，配置了on_exit时由备份线程在退出前再备份一次；
+        最多等待 exit_timeout_s 秒（不阻塞界面线程太久），返回备份线程是否已结束
+        """
+        self._stop.set()
+        if self._thread is None:
+            return True
+        self._thread.join(self.config["exit_timeout_s"])
+        if self._thread.is_alive():
+            logger.warning(f"退出备份超过 {self.config['exit_timeout_s']} 秒，放弃等待")
+            return False
+        self._thread = None
+        return True
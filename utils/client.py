@@ -0,0 +1,146 @@
+"""
+点名服务（utils.server.DrawServer）的客户端，只依赖标准库，可用于测试和脚本
+
+用法:
+    python -m utils.client http://127.0.0.1:8765 draw -k 2
+    python -m utils.client http://127.0.0.1:8765 watch
+"""
+import os
+import sys
+import json
+import base64
+import socket
+import argparse
+import urllib.request
+from typing import List, Optional
+from urllib.parse import urlsplit, urlencode
+from utils.server import ws_accept_key, ws_frame
+
+class EventStream:
+    """WebSocket事件订阅（阻塞读取）"""
+
+    def __init__(self, sock: socket.socket, buffered: bytes = b""):
+        self.sock = sock
+        self.buffer = buffered
+
+    def _read(self, size: int) -> bytes:
+        while len(self.buffer) < size:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                raise ConnectionError("连接已关闭")
+            self.buffer += chunk
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
+
+    def recv(self, timeout: Optional[float] = None) -> Optional[dict]:
+        """读取下一个事件，服务端关闭连接时返回None，超时抛出 socket.timeout"""
+        self.sock.settimeout(timeout)
+        while True:
+            first, second = self._read(2)
+            length = second & 0x7F
+            if length == 126:
+                length = int.from_bytes(self._read(2), 'big')
+            elif length == 127:
+                length = int.from_bytes(self._read(8), 'big')
+            payload = self._read(length)
+            opcode = first & 0x0F
+            if opcode == 0x1:
+                return json.loads(payload.decode('utf-8'))
+            if opcode == 0x8:
+                return None
+            if opcode == 0x9:
+                self.sock.sendall(ws_frame(0xA, payload, mask=os.urandom(4)))
+
+    def close(self):
+        try:
+            self.sock.sendall(ws_frame(0x8, b"", mask=os.urandom(4)))
+        except OSError:
+            pass
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class DrawClient:
+    def __init__(self, base_url: str, token: str = "", timeout: float = 10):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.timeout = timeout
+
+    def _request(self, method: str, path: str, params: Optional[dict] = None):
+        url = f"{self.base_url}{path}"
+        if params:
+            url += "?" + urlencode(params)
+        request = urllib.request.Request(url, method=method, data=b"" if method == "POST" else None)
+        if self.token:
+            request.add_header("X-Token", self.token)
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+
+    def roster(self) -> dict:
+        return self._request("GET", "/roster")
+
+    def history(self, limit: int = 50) -> List[dict]:
+        return self._request("GET", "/history", {"limit": limit})
+
+    def draw(self, k: int = 1) -> dict:
+        """请求抽取，返回 {"names": [...]} 或 {"status": "rolling"}（结果通过事件推送）"""
+        return self._request("POST", "/draw", {"k": k})
+
+    def subscribe(self) -> EventStream:
+        """订阅点名事件"""
+        url = urlsplit(self.base_url)
+        sock = socket.create_connection((url.hostname, url.port or 80), timeout=self.timeout)
+        key = base64.b64encode(os.urandom(16)).decode()
+        token = f"X-Token: {self.token}\r\n" if self.token else ""
+        sock.sendall(
+            f"GET /events HTTP/1.1\r\nHost: {url.netloc}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n{token}"
+            "Sec-WebSocket-Version: 13\r\n\r\n".encode('latin-1')
+        )
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise ConnectionError("握手失败")
+            response += chunk
+        head, rest = response.split(b"\r\n\r\n", 1)
+        if b" 101 " not in head.split(b"\r\n", 1)[0] or ws_accept_key(key).encode() not in head:
+            sock.close()
+            raise ConnectionError("握手失败")
+        return EventStream(sock, rest)
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m utils.client", description="点名服务客户端")
+    parser.add_argument('url', help="服务地址，如 http://127.0.0.1:8765")
+    parser.add_argument('--token', default="")
+    commands = parser.add_subparsers(dest='command', required=True)
+    draw = commands.add_parser('draw')
+    draw.add_argument('-k', type=int, default=1)
+    commands.add_parser('roster')
+    history = commands.add_parser('history')
+    history.add_argument('-n', type=int, default=20)
+    commands.add_parser('watch', help="持续打印点名事件")
+    args = parser.parse_args(argv)
+
+    client = DrawClient(args.url, args.token)
+    if args.command == 'watch':
+        with client.subscribe() as events:
+            while True:
+                event = events.recv()
+                if event is None:
+                    return 0
+                print(json.dumps(event, ensure_ascii=False), flush=True)
+    result = {
+        'draw': lambda: client.draw(args.k),
+        'roster': client.roster,
+        'history': lambda: client.history(args.n),
+    }[args.command]()
+    print(json.dumps(result, ensure_ascii=False))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,15 +1,17 @@
 import os
+import atexit
+import random
 import sqlite3
 import sys
-from typing import List, Optional, Tuple
+import threading
+import time
+import unicodedata
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, TypeVar
 import logging
+from utils.metrics import registry
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    filename=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'database.log')
-)
+# 日志由程序入口通过 utils.log.setup_logging 统一配置
 logger = logging.getLogger(__name__)
 
 def get_app_data_dir():
@@ -31,20 +33,90 @@ def get_app_data_dir():
     return data_dir
 
 def get_db_path():
-    """获取数据库完整路径"""
+    """获取数据库完整路径（环境变量 RANDOMCALL_DB 可指定其他路径，测试和基准测试用它避免改动真实数据）"""
+    override = os.environ.get("RANDOMCALL_DB")
+    if override:
+        return override
     return os.path.join(get_app_data_dir(), 'names.db')
 
 DB_PATH = get_db_path()
 
+# 点名轮次位图按块存储，每块 512 字节（4096 个 id），点名时只改写所在的块
+CYCLE_CHUNK_BYTES = 512
+CYCLE_CHUNK_BITS = CYCLE_CHUNK_BYTES * 8
+
+# 锁竞争设置（多进程同时访问时生效，可通过 configure_locking 修改）
+BUSY_TIMEOUT_MS = 5000      # 等待其他连接释放锁的最长时间
+WRITE_RETRIES = 5           # 等待超时后写事务的重试次数
+RETRY_BASE_DELAY = 0.05     # 重试的初始退避时间（秒），每次翻倍
+LOCK_WAIT_THRESHOLD = 0.01  # 获取写锁超过该时间（秒）计为一次锁等待
+
+# 名单变更日志保留的条数（更早的变更需要重新全量读取名单）
+ROSTER_LOG_KEEP = 100000
+
+# 存储模式：'disk' 直接读写 names.db；'memory' 读写内存副本，后台定期写回磁盘（见 configure_storage）
+MEMORY_URI = "file:randomcall_memory?mode=memory&cache=shared"
+_storage = {
+    "mode": "disk",
+    "anchor": None,        # 保持内存数据库存在的连接
+    "lock": threading.RLock(),  # 内存模式下串行化读写（共享缓存使用表锁且不支持busy_timeout）
+    "generation": 0,       # 每次提交写事务加一
+    "flushed": 0,          # 已写回磁盘的 generation
+    "interval": 5.0,
+    "stop": threading.Event(),
+    "thread": None,
+}
+
+_lock_stats_mutex = threading.Lock()
+_lock_stats = {"lock_waits": 0, "lock_wait_seconds": 0.0, "retries": 0, "failures": 0}
+
+T = TypeVar('T')
+
+def normalize_name(name: str) -> str:
+    """
+    姓名去重键：NFKC规范化（全角转半角、合并NFC/NFD形式）、
+    合并连续空白（包括全角空格）并去掉首尾空白、忽略大小写
+    """
+    return ' '.join(unicodedata.normalize('NFKC', name).split()).casefold()
+
+def _migrate_name_key(conn: sqlite3.Connection):
+    """
+    为旧版本数据库补充name_key列，并合并去重键相同的姓名（保留最早添加的一个）
+    被合并姓名的历史记录和属性转到保留的姓名上（保留的姓名已有的属性不覆盖）
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(names)")]
+    if 'name_key' not in columns:
+        conn.execute("ALTER TABLE names ADD COLUMN name_key TEXT")
+    conn.execute("UPDATE names SET name_key = name_key(name) WHERE name_key IS NULL")
+
+    duplicates = conn.execute("""
+        SELECT n.id, n.name, k.id, k.name FROM names n
+        JOIN (SELECT name_key, MIN(id) AS keep_id FROM names GROUP BY name_key HAVING COUNT(*) > 1) d
+            ON n.name_key = d.name_key AND n.id != d.keep_id
+        JOIN names k ON k.id = d.keep_id
+    """).fetchall()
+    for name_id, name, kept_id, kept in duplicates:
+        conn.execute("UPDATE history SET name=? WHERE name=?", (kept, name))
+        conn.execute("""
+            INSERT OR IGNORE INTO name_attributes (name_id, key, value)
+            SELECT ?, key, value FROM name_attributes WHERE name_id=?
+        """, (kept_id, name_id))
+        # 剩余属性由外键级联删除（init_db 的连接已启用外键约束）
+        conn.execute("DELETE FROM names WHERE id=?", (name_id,))
+        logger.warning(f"合并重复姓名: {name!r} -> {kept!r}")
+
 def init_db():
     """初始化数据库表结构"""
     try:
         with sqlite3.connect(DB_PATH) as conn:
-            # 名单表
+            conn.create_function("name_key", 1, normalize_name, deterministic=True)
+            conn.execute("PRAGMA foreign_keys = ON")  # 迁移删除姓名时级联删除属性
+            # 名单表（name_key为去重键）
             conn.execute("""
             CREATE TABLE IF NOT EXISTS names (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL
+                name TEXT UNIQUE NOT NULL,
+                name_key TEXT
             )
             """)
             # 点名历史表
@@ -55,18 +127,124 @@ def init_db():
                 called_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
             """)
+            # 本轮点名状态表（以names.id为位序号的位图）
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS draw_cycle (
+                chunk INTEGER PRIMARY KEY,
+                bits BLOB NOT NULL
+            )
+            """)
+            # 姓名属性表（座位排、性别、小组、出勤等）
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS name_attributes (
+                name_id INTEGER NOT NULL REFERENCES names(id) ON DELETE CASCADE,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                PRIMARY KEY (name_id, key)
+            )
+            """)
+            # 名单变更日志（由触发器写入，version即名单版本号）
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS roster_log (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                name_id INTEGER NOT NULL,
+                op TEXT NOT NULL
+            )
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_names_insert AFTER INSERT ON names
+            BEGIN INSERT INTO roster_log (name_id, op) VALUES (NEW.id, 'add'); END
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_names_delete AFTER DELETE ON names
+            BEGIN INSERT INTO roster_log (name_id, op) VALUES (OLD.id, 'remove'); END
+            """)
+            conn.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_names_rename AFTER UPDATE OF name ON names
+            BEGIN INSERT INTO roster_log (name_id, op) VALUES (NEW.id, 'rename'); END
+            """)
+            conn.execute(
+                "DELETE FROM roster_log WHERE version <= (SELECT MAX(version) FROM roster_log) - ?",
+                (ROSTER_LOG_KEEP,)
+            )
+            _migrate_name_key(conn)
             # 创建索引
             conn.execute("CREATE INDEX IF NOT EXISTS idx_name ON names(name)")
+            # 名单按不区分大小写的顺序读取，索引使分批读取不需要先排序全表
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_name_nocase ON names(name COLLATE NOCASE)")
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_name_key ON names(name_key)")
             conn.execute("CREATE INDEX IF NOT EXISTS idx_history_time ON history(called_time)")
         logger.info(f"数据库初始化成功，路径: {DB_PATH}")
     except Exception as e:
         logger.critical(f"数据库初始化失败: {e}")
         raise RuntimeError(f"无法初始化数据库: {e}")
 
+def configure_locking(busy_timeout_ms: Optional[int] = None,
+                      write_retries: Optional[int] = None,
+                      retry_base_delay: Optional[float] = None):
+    """修改锁等待和重试设置（对应config.json中的database项）"""
+    global BUSY_TIMEOUT_MS, WRITE_RETRIES, RETRY_BASE_DELAY
+    if busy_timeout_ms is not None:
+        BUSY_TIMEOUT_MS = busy_timeout_ms
+    if write_retries is not None:
+        WRITE_RETRIES = write_retries
+    if retry_base_delay is not None:
+        RETRY_BASE_DELAY = retry_base_delay
+
+def get_lock_stats() -> Dict[str, float]:
+    """获取锁竞争统计（锁等待次数/总等待时间/重试次数/最终失败次数）"""
+    with _lock_stats_mutex:
+        return dict(_lock_stats)
+
+def reset_lock_stats():
+    with _lock_stats_mutex:
+        for key in _lock_stats:
+            _lock_stats[key] = 0
+
+def _count_lock(key: str, amount: float = 1):
+    with _lock_stats_mutex:
+        _lock_stats[key] += amount
+
+def _is_lock_error(error: sqlite3.OperationalError) -> bool:
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+class _MemoryConnection(sqlite3.Connection):
+    """
+    内存模式的连接：共享缓存的读写同时进行时会直接返回 SQLITE_LOCKED（busy_timeout 不生效），
+    因此 with 块内持有存储锁，与写事务和其他读取串行执行；
+    退出时关闭连接，未读完的语句不会继续占用表锁
+    """
+
+    def __enter__(self):
+        _storage["lock"].acquire()
+        try:
+            return super().__enter__()
+        except BaseException:
+            _storage["lock"].release()
+            raise
+
+    def __exit__(self, *exc):
+        try:
+            return super().__exit__(*exc)
+        finally:
+            self.close()
+            _storage["lock"].release()
+
 def get_connection():
-    """获取数据库连接（自动重试机制）"""
+    """
+    获取数据库连接（等待锁时由busy_timeout自动重试）
+    内存模式下的连接只能在 with 块中读取（见 _MemoryConnection）
+    """
     try:
-        conn = sqlite3.connect(DB_PATH)
+        if _storage["mode"] == "memory":
+            conn = sqlite3.connect(MEMORY_URI, uri=True, factory=_MemoryConnection)
+            conn.create_function("name_key", 1, normalize_name, deterministic=True)
+            conn.execute("PRAGMA foreign_keys = ON")
+            return conn
+        conn = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+        conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT_MS)}")
+        conn.create_function("name_key", 1, normalize_name, deterministic=True)
         conn.execute("PRAGMA foreign_keys = ON")  # 启用外键约束
         conn.execute("PRAGMA journal_mode = WAL")  # 使用WAL模式提高并发
         return conn
@@ -74,6 +252,205 @@ def get_connection():
         logger.error(f"连接数据库失败: {e}")
         raise RuntimeError(f"无法连接数据库: {e}")
 
+def _write(work: Callable[[sqlite3.Connection], T]) -> T:
+    """
+    在写事务中执行 work(conn) 并提交
+    使用 BEGIN IMMEDIATE 在事务开始时就获取写锁，避免读锁升级时的死锁；
+    busy_timeout 超时后按指数退避重试整个事务
+    """
+    if _storage["mode"] == "memory":
+        with _storage["lock"]:
+            conn = get_connection()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                result = work(conn)
+                conn.commit()
+                _storage["generation"] += 1
+                return result
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                conn.close()
+
+    for attempt in range(WRITE_RETRIES + 1):
+        conn = get_connection()
+        try:
+            started = time.perf_counter()
+            conn.execute("BEGIN IMMEDIATE")
+            waited = time.perf_counter() - started
+            if waited > LOCK_WAIT_THRESHOLD:
+                _count_lock("lock_waits")
+                _count_lock("lock_wait_seconds", waited)
+            result = work(conn)
+            conn.commit()
+            return result
+        except sqlite3.OperationalError as e:
+            conn.rollback()
+            if not _is_lock_error(e):
+                raise
+            if attempt == WRITE_RETRIES:
+                _count_lock("failures")
+                raise
+            _count_lock("retries")
+            delay = RETRY_BASE_DELAY * (2 ** attempt) * random.uniform(0.5, 1.0)
+            logger.warning(f"数据库被锁定，{delay:.2f}秒后第{attempt + 1}次重试: {e}")
+            time.sleep(delay)
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+def configure_storage(mode: str = "disk", flush_interval_s: float = 5.0):
+    """
+    设置存储模式（对应config.json中database项的storage和flush_interval_s）
+    memory: 启动时把 names.db 载入内存，之后的读写都在内存中完成；
+    有修改时每隔 flush_interval_s 秒在后台写回磁盘，退出时再写回一次，
+    意外断电时最多丢失 flush_interval_s 秒内的修改
+    """
+    _storage["interval"] = max(0.1, float(flush_interval_s))
+    if mode != "memory" or _storage["mode"] == "memory":
+        return
+
+    anchor = sqlite3.connect(MEMORY_URI, uri=True, check_same_thread=False)
+    disk = sqlite3.connect(DB_PATH)
+    try:
+        disk.backup(anchor)
+    finally:
+        disk.close()
+    _storage.update(mode="memory", anchor=anchor, generation=0, flushed=0)
+    _storage["stop"].clear()
+    thread = threading.Thread(target=_flush_loop, name="MemoryFlush", daemon=True)
+    _storage["thread"] = thread
+    thread.start()
+    logger.info(f"使用内存数据库，每 {_storage['interval']} 秒写回磁盘")
+
+def _flush_loop():
+    while not _storage["stop"].wait(_storage["interval"]):
+        flush_to_disk()
+
+def flush_to_disk() -> bool:
+    """把内存数据库中未写回的修改写入 names.db（磁盘模式或没有修改时直接返回True）"""
+    if _storage["mode"] != "memory":
+        return True
+    generation = _storage["generation"]
+    if generation == _storage["flushed"]:
+        return True
+    try:
+        # 先在存储锁内复制一份私有快照（内存复制很快），再把快照写到较慢的磁盘上，写盘期间不阻塞读写
+        snapshot = sqlite3.connect(":memory:")
+        with _storage["lock"]:
+            generation = _storage["generation"]
+            _storage["anchor"].backup(snapshot)
+        disk = sqlite3.connect(DB_PATH, timeout=BUSY_TIMEOUT_MS / 1000)
+        try:
+            snapshot.backup(disk)
+        finally:
+            disk.close()
+            snapshot.close()
+        _storage["flushed"] = generation
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"内存数据库已写回磁盘 (generation {generation})")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"内存数据库写回磁盘失败: {e}")
+        return False
+
+def shutdown_storage():
+    """停止后台写回并把剩余修改写回磁盘（退出时调用）"""
+    if _storage["mode"] != "memory":
+        return
+    _storage["stop"].set()
+    if _storage["thread"] is not None:
+        _storage["thread"].join()
+        _storage["thread"] = None
+    flush_to_disk()
+
+def get_name_ids() -> List[Tuple[int, str]]:
+    """获取所有 (id, 姓名)（按字母排序）"""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id, name FROM names ORDER BY name COLLATE NOCASE")
+            rows = cursor.fetchall()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"成功读取 {len(rows)} 个姓名及id")
+            return rows
+    except sqlite3.Error as e:
+        logger.error(f"获取姓名id失败: {e}")
+        return []
+
+def get_roster_version() -> int:
+    """获取名单版本号（每次增删改姓名都会递增）"""
+    try:
+        with get_connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(version), 0) FROM roster_log").fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"获取名单版本失败: {e}")
+        return 0
+
+def get_roster_changes(since: int) -> dict:
+    """
+    获取版本since之后的名单变化
+    返回 {"since": since, "version": 最新版本, "full": 是否需要全量重新读取,
+          "added": {id: 姓名}, "removed": [id, ...], "renamed": {id: 新姓名}}
+    """
+    diff = {"since": since, "version": since, "full": False,
+            "added": {}, "removed": [], "renamed": {}}
+    try:
+        with get_connection() as conn:
+            oldest, latest = conn.execute(
+                "SELECT MIN(version), COALESCE(MAX(version), 0) FROM roster_log").fetchone()
+            diff["version"] = latest
+            if oldest is not None and since < oldest - 1:
+                # 变更日志已被清理，无法计算差异
+                diff["full"] = True
+                return diff
+
+            added, removed, renamed = set(), set(), set()
+            for name_id, op in conn.execute(
+                    "SELECT name_id, op FROM roster_log WHERE version > ? ORDER BY version", (since,)):
+                if op == 'add':
+                    added.add(name_id)
+                elif op == 'remove':
+                    if name_id in added:
+                        added.discard(name_id)
+                    else:
+                        removed.add(name_id)
+                    renamed.discard(name_id)
+                elif name_id not in added:
+                    renamed.add(name_id)
+
+            ids = list(added | renamed)
+            current = {}
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                current.update(conn.execute(
+                    f"SELECT id, name FROM names WHERE id IN ({','.join('?' * len(batch))})", batch))
+            diff["added"] = {name_id: current[name_id] for name_id in added if name_id in current}
+            diff["renamed"] = {name_id: current[name_id] for name_id in renamed if name_id in current}
+            diff["removed"] = sorted(removed)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    f"名单变化 v{since}->v{latest}: +{len(diff['added'])} "
+                    f"-{len(diff['removed'])} ~{len(diff['renamed'])}"
+                )
+            return diff
+    except sqlite3.Error as e:
+        logger.error(f"获取名单变化失败: {e}")
+        diff["full"] = True
+        return diff
+
+def get_name_keys() -> Dict[str, str]:
+    """获取所有姓名的去重键 {去重键: 姓名}"""
+    try:
+        with get_connection() as conn:
+            return dict(conn.execute("SELECT name_key, name FROM names"))
+    except sqlite3.Error as e:
+        logger.error(f"获取姓名去重键失败: {e}")
+        return {}
+
 def get_names() -> List[str]:
     """获取所有姓名（按字母排序）"""
     try:
@@ -81,7 +458,8 @@ def get_names() -> List[str]:
             cursor = conn.cursor()
             cursor.execute("SELECT name FROM names ORDER BY name COLLATE NOCASE")
             names = [row[0] for row in cursor.fetchall()]
-            logger.info(f"成功读取 {len(names)} 个姓名")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"成功读取 {len(names)} 个姓名")
             return names
     except sqlite3.Error as e:
         logger.error(f"获取姓名列表失败: {e}")
@@ -93,11 +471,12 @@ def add_name(name: str) -> bool:
         return False
         
     try:
-        with get_connection() as conn:
-            conn.execute("INSERT INTO names (name) VALUES (?)", (name.strip(),))
-            conn.commit()
-            logger.info(f"成功添加姓名: {name}")
-            return True
+        _write(lambda conn: conn.execute(
+            "INSERT INTO names (name, name_key) VALUES (?, name_key(?))",
+            (name.strip(), name)
+        ))
+        logger.info(f"成功添加姓名: {name}")
+        return True
     except sqlite3.IntegrityError:
         logger.warning(f"姓名已存在: {name}")
         return False
@@ -108,95 +487,336 @@ def add_name(name: str) -> bool:
 def delete_name(name: str) -> bool:
     """删除单个姓名"""
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM names WHERE name=?", (name,))
-            conn.commit()
-            deleted = cursor.rowcount > 0
-            if deleted:
-                logger.info(f"成功删除姓名: {name}")
-            else:
-                logger.warning(f"姓名不存在: {name}")
-            return deleted
+        cursor = _write(lambda conn: conn.execute("DELETE FROM names WHERE name=?", (name,)))
+        deleted = cursor.rowcount > 0
+        if deleted:
+            logger.info(f"成功删除姓名: {name}")
+        else:
+            logger.warning(f"姓名不存在: {name}")
+        return deleted
     except sqlite3.Error as e:
         logger.error(f"删除姓名失败: {e}")
         return False
 
+def _stage(conn: sqlite3.Connection, rows: List[Tuple[str, Optional[str]]]):
+    """将待处理的 (姓名, 新姓名) 写入临时表，供后续集合操作使用"""
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS staging (
+            name TEXT NOT NULL,
+            new_name TEXT,
+            status TEXT
+        )
+    """)
+    conn.execute("DELETE FROM staging")
+    conn.executemany("INSERT INTO staging (name, new_name) VALUES (?, ?)", rows)
+    conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_staging_name ON staging(name)")
+
+def bulk_delete_names(names: List[str]) -> Dict[str, bool]:
+    """
+    批量删除姓名（整批只执行一条DELETE语句）
+    返回每个姓名的结果：True为已删除，False为姓名不存在
+    """
+    if not names:
+        return {}
+
+    def work(conn):
+        _stage(conn, [(name, None) for name in names])
+        found = {row[0] for row in conn.execute(
+            "SELECT name FROM staging WHERE name IN (SELECT name FROM names)")}
+        conn.execute("DELETE FROM names WHERE name IN (SELECT name FROM staging)")
+        return found
+
+    try:
+        found = _write(work)
+        logger.info(f"成功删除 {len(found)} 个姓名")
+        return {name: name in found for name in names}
+    except sqlite3.Error as e:
+        logger.error(f"批量删除姓名失败: {e}")
+        return {name: False for name in names}
+
 def delete_names(names: List[str]) -> int:
     """批量删除姓名（返回成功删除的数量）"""
+    return sum(bulk_delete_names(names).values())
+
+def rename_names(pairs: List[Tuple[str, str]]) -> Dict[str, str]:
+    """
+    批量重命名 [(原姓名, 新姓名), ...]，保留姓名id（本轮点名状态、属性不变）并同步更新点名历史
+    返回每个原姓名的结果:
+    'renamed' 已重命名 / 'missing' 原姓名不存在 / 'exists' 新姓名已存在 /
+    'duplicate' 同一批中有多个姓名改成同一个新姓名 / 'invalid' 新姓名为空 / 'error' 数据库错误
+    """
+    pairs = [(old, new.strip()) for old, new in pairs]
+    if not pairs:
+        return {}
+
+    def work(conn):
+        _stage(conn, pairs)
+        conn.execute("UPDATE staging SET status='invalid' WHERE new_name = ''")
+        conn.execute("""
+            UPDATE staging SET status='missing'
+            WHERE status IS NULL AND name NOT IN (SELECT name FROM names)
+        """)
+        conn.execute("""
+            UPDATE staging SET status='duplicate'
+            WHERE status IS NULL AND name_key(new_name) IN (
+                SELECT name_key(new_name) FROM staging
+                GROUP BY name_key(new_name) HAVING COUNT(*) > 1)
+        """)
+        conn.execute("""
+            UPDATE staging SET status='exists'
+            WHERE status IS NULL AND name_key(new_name) IN (
+                SELECT name_key FROM names WHERE name != staging.name)
+        """)
+        conn.execute("UPDATE staging SET status='renamed' WHERE status IS NULL")
+        conn.execute("""
+            UPDATE history SET name = (
+                SELECT new_name FROM staging s WHERE s.name = history.name AND s.status='renamed')
+            WHERE name IN (SELECT name FROM staging WHERE status='renamed')
+        """)
+        conn.execute("""
+            UPDATE names SET name = (
+                SELECT new_name FROM staging s WHERE s.name = names.name AND s.status='renamed')
+            WHERE name IN (SELECT name FROM staging WHERE status='renamed')
+        """)
+        conn.execute("""
+            UPDATE names SET name_key = name_key(name)
+            WHERE name IN (SELECT new_name FROM staging WHERE status='renamed')
+        """)
+        return dict(conn.execute("SELECT name, status FROM staging").fetchall())
+
+    try:
+        outcomes = _write(work)
+        renamed = sum(1 for status in outcomes.values() if status == 'renamed')
+        logger.info(f"成功重命名 {renamed}/{len(pairs)} 个姓名")
+        return outcomes
+    except sqlite3.Error as e:
+        logger.error(f"批量重命名失败: {e}")
+        return {old: 'error' for old, _ in pairs}
+
+def move_names(names: List[str], key: str, value: str) -> Dict[str, bool]:
+    """
+    将一批姓名移动到属性key的value分组（如调整小组、座位排），整批只执行一条写入语句
+    返回每个姓名的结果：True为已移动，False为姓名不存在
+    """
     if not names:
+        return {}
+
+    def work(conn):
+        _stage(conn, [(name, None) for name in names])
+        found = {row[0] for row in conn.execute(
+            "SELECT name FROM staging WHERE name IN (SELECT name FROM names)")}
+        conn.execute("""
+            INSERT OR REPLACE INTO name_attributes (name_id, key, value)
+            SELECT id, ?, ? FROM names WHERE name IN (SELECT name FROM staging)
+        """, (key, value))
+        return found
+
+    try:
+        found = _write(work)
+        logger.info(f"成功将 {len(found)} 个姓名移动到 {key}={value}")
+        return {name: name in found for name in names}
+    except sqlite3.Error as e:
+        logger.error(f"批量移动姓名失败: {e}")
+        return {name: False for name in names}
+
+def add_names(names: List[str]) -> int:
+    """批量添加姓名（返回成功添加的数量，已存在的姓名按去重键在SQL中过滤）"""
+    new_names = [(name.strip(), name) for name in names if name.strip()]
+    if not new_names:
         return 0
         
     try:
-        with get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.executemany(
-                "DELETE FROM names WHERE name=?",
-                [(name,) for name in names]
-            )
-            conn.commit()
-            deleted_count = cursor.rowcount
-            logger.info(f"成功删除 {deleted_count} 个姓名")
-            return deleted_count
+        cursor = _write(lambda conn: conn.executemany(
+            "INSERT OR IGNORE INTO names (name, name_key) VALUES (?, name_key(?))",
+            new_names
+        ))
+        added_count = cursor.rowcount
+        logger.info(f"成功批量添加 {added_count} 个姓名")
+        return added_count
     except sqlite3.Error as e:
-        logger.error(f"批量删除姓名失败: {e}")
+        logger.error(f"批量添加姓名失败: {e}")
         return 0
 
-def add_names(names: List[str]) -> int:
-    """批量添加姓名（返回成功添加的数量）"""
-    if not names:
+def set_attributes(rows: List[Tuple[str, str, str]]) -> int:
+    """批量设置姓名属性 (姓名, 属性名, 属性值)，返回写入的数量"""
+    if not rows:
         return 0
-        
-    # 过滤空姓名和已存在的姓名
-    existing = set(get_names())
-    new_names = [
-        (name.strip(),) 
-        for name in names 
-        if name.strip() and name.strip() not in existing
-    ]
-    
-    if not new_names:
+
+    try:
+        cursor = _write(lambda conn: conn.executemany(
+            """INSERT OR REPLACE INTO name_attributes (name_id, key, value)
+               SELECT id, ?, ? FROM names WHERE name_key = name_key(?)""",
+            [(key, value, name) for name, key, value in rows]
+        ))
+        written = cursor.rowcount
+        logger.info(f"成功写入 {written} 条姓名属性")
+        return written
+    except sqlite3.Error as e:
+        logger.error(f"写入姓名属性失败: {e}")
         return 0
-        
+
+def sync_roster(added: List[str], removed: List[str],
+                attributes: Dict[str, List[Tuple[str, str]]]) -> Optional[Tuple[int, int, int]]:
+    """
+    在同一个事务中应用名单增量：添加added、删除removed，
+    并用attributes {姓名: [(属性名, 属性值), ...]} 整体替换这些姓名的属性
+    返回 (新增数量, 删除数量, 写入属性数量)，失败时返回None
+    """
+    if not (added or removed or attributes):
+        return 0, 0, 0
+
+    def work(conn):
+        inserted = deleted = written = 0
+        if added:
+            inserted = conn.executemany(
+                "INSERT OR IGNORE INTO names (name, name_key) VALUES (?, name_key(?))",
+                [(name, name) for name in added]
+            ).rowcount
+        if removed:
+            _stage(conn, [(name, None) for name in removed])
+            deleted = conn.execute(
+                "DELETE FROM names WHERE name IN (SELECT name FROM staging)").rowcount
+        if attributes:
+            _stage(conn, [(name, None) for name in attributes])
+            conn.execute("""
+                DELETE FROM name_attributes WHERE name_id IN (
+                    SELECT id FROM names WHERE name_key IN (SELECT name_key(name) FROM staging)
+                )
+            """)
+            rows = [(key, value, name) for name, pairs in attributes.items() for key, value in pairs]
+            if rows:
+                written = conn.executemany(
+                    """INSERT OR REPLACE INTO name_attributes (name_id, key, value)
+                       SELECT id, ?, ? FROM names WHERE name_key = name_key(?)""",
+                    rows
+                ).rowcount
+        return inserted, deleted, written
+
+    try:
+        inserted, deleted, written = _write(work)
+        logger.info(f"名单同步: 新增 {inserted} 个, 删除 {deleted} 个, 更新属性 {written} 条")
+        return inserted, deleted, written
+    except sqlite3.Error as e:
+        logger.error(f"名单同步失败: {e}")
+        return None
+
+def get_attributes() -> List[Tuple[int, str, str]]:
+    """获取所有姓名属性 (姓名id, 属性名, 属性值)"""
     try:
         with get_connection() as conn:
             cursor = conn.cursor()
-            cursor.executemany(
-                "INSERT INTO names (name) VALUES (?)",
-                new_names
-            )
-            conn.commit()
-            added_count = cursor.rowcount
-            logger.info(f"成功批量添加 {added_count} 个姓名")
-            return added_count
+            cursor.execute("SELECT name_id, key, value FROM name_attributes")
+            rows = cursor.fetchall()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"获取 {len(rows)} 条姓名属性")
+            return rows
     except sqlite3.Error as e:
-        logger.error(f"批量添加姓名失败: {e}")
-        return 0
+        logger.error(f"获取姓名属性失败: {e}")
+        return []
 
 def clear_names() -> bool:
     """清空所有姓名"""
     try:
-        with get_connection() as conn:
-            conn.execute("DELETE FROM names")
-            conn.commit()
-            logger.info("成功清空姓名表")
-            return True
+        _write(lambda conn: conn.execute("DELETE FROM names"))
+        logger.info("成功清空姓名表")
+        return True
     except sqlite3.Error as e:
         logger.error(f"清空姓名表失败: {e}")
         return False
 
-def record_called_name(name: str) -> bool:
-    """记录被点到的姓名"""
+def _mark_cycle(conn: sqlite3.Connection, names: List[str]):
+    """在本轮点名位图中标记姓名（按块增量更新）"""
+    ids = []
+    for i in range(0, len(names), 500):
+        batch = names[i:i + 500]
+        cursor = conn.execute(
+            f"SELECT id FROM names WHERE name IN ({','.join('?' * len(batch))})", batch)
+        ids.extend(row[0] for row in cursor)
+
+    chunks = {}
+    for name_id in ids:
+        chunks.setdefault(name_id // CYCLE_CHUNK_BITS, []).append(name_id % CYCLE_CHUNK_BITS)
+    for chunk, offsets in chunks.items():
+        row = conn.execute("SELECT bits FROM draw_cycle WHERE chunk=?", (chunk,)).fetchone()
+        bits = bytearray(row[0]) if row else bytearray(CYCLE_CHUNK_BYTES)
+        for offset in offsets:
+            bits[offset >> 3] |= 1 << (offset & 7)
+        conn.execute(
+            "INSERT OR REPLACE INTO draw_cycle (chunk, bits) VALUES (?, ?)",
+            (chunk, bytes(bits))
+        )
+
+def get_cycle_bits() -> bytearray:
+    """读取本轮点名位图（第id位为1表示本轮已点到）"""
     try:
         with get_connection() as conn:
-            conn.execute("INSERT INTO history (name) VALUES (?)", (name,))
-            conn.commit()
-            logger.info(f"记录点名: {name}")
-            return True
+            rows = conn.execute("SELECT chunk, bits FROM draw_cycle").fetchall()
+        if not rows:
+            return bytearray()
+        bits = bytearray(CYCLE_CHUNK_BYTES * (max(chunk for chunk, _ in rows) + 1))
+        for chunk, blob in rows:
+            start = chunk * CYCLE_CHUNK_BYTES
+            bits[start:start + len(blob)] = blob
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"读取本轮点名位图 {len(rows)} 块")
+        return bits
+    except sqlite3.Error as e:
+        logger.error(f"读取本轮点名状态失败: {e}")
+        return bytearray()
+
+def reset_cycle() -> bool:
+    """开始新一轮点名（清空本轮点名位图）"""
+    try:
+        _write(lambda conn: conn.execute("DELETE FROM draw_cycle"))
+        logger.info("开始新一轮点名")
+        return True
+    except sqlite3.Error as e:
+        logger.error(f"重置点名轮次失败: {e}")
+        return False
+
+def record_called_name(name: str) -> bool:
+    """记录被点到的姓名（同时标记本轮已点）"""
+    def work(conn):
+        conn.execute("INSERT INTO history (name) VALUES (?)", (name,))
+        _mark_cycle(conn, [name])
+
+    try:
+        _write(work)
+        logger.info(f"记录点名: {name}")
+        return True
     except sqlite3.Error as e:
         logger.error(f"记录点名失败: {e}")
         return False
 
+def record_called_names(names: List[str], reset_cycle: bool = False, carried: int = 0) -> int:
+    """
+    批量记录被点到的姓名（单个事务，返回记录的数量）
+    reset_cycle: 写入历史后开始新一轮点名
+    carried: 前carried个姓名属于上一轮，只写历史，不在新一轮中标记
+    """
+    if not names:
+        return 0
+
+    def work(conn):
+        cursor = conn.executemany(
+            "INSERT INTO history (name) VALUES (?)",
+            [(name,) for name in names]
+        )
+        if reset_cycle:
+            conn.execute("DELETE FROM draw_cycle")
+            _mark_cycle(conn, names[carried:])
+        else:
+            _mark_cycle(conn, names)
+        return cursor.rowcount
+
+    try:
+        recorded = _write(work)
+        logger.info(f"批量记录点名 {recorded} 人: {', '.join(names)}")
+        return recorded
+    except sqlite3.Error as e:
+        logger.error(f"批量记录点名失败: {e}")
+        return 0
+
 def get_called_history(limit: int = 50) -> List[Tuple[str, str]]:
     """获取点名历史记录（最新50条）"""
     try:
@@ -205,41 +825,161 @@ def get_called_history(limit: int = 50) -> List[Tuple[str, str]]:
             cursor.execute("""
                 SELECT name, strftime('%Y-%m-%d %H:%M:%S', called_time) 
                 FROM history 
-                ORDER BY called_time DESC 
+                ORDER BY called_time DESC, id DESC
                 LIMIT ?
             """, (limit,))
             history = cursor.fetchall()
-            logger.info(f"获取 {len(history)} 条历史记录")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"获取 {len(history)} 条历史记录")
             return history
     except sqlite3.Error as e:
         logger.error(f"获取历史记录失败: {e}")
         return []
 
-def backup_database(backup_path: str = None) -> bool:
-    """备份数据库到指定路径"""
+def _history_range(start: Optional[str], end: Optional[str]) -> Tuple[str, list]:
+    """历史记录日期范围条件（日期格式 YYYY-MM-DD，包含首尾两天）"""
+    clauses, params = [], []
+    if start:
+        clauses.append("called_time >= ?")
+        params.append(start)
+    if end:
+        clauses.append("called_time < date(?, '+1 day')")
+        params.append(end)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def count_names() -> int:
+    """获取姓名数量"""
+    try:
+        with get_connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"统计姓名数量失败: {e}")
+        return 0
+
+def count_history(start: Optional[str] = None, end: Optional[str] = None) -> int:
+    """获取指定日期范围内的点名记录数量"""
+    where, params = _history_range(start, end)
+    try:
+        with get_connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+    except sqlite3.Error as e:
+        logger.error(f"统计历史记录失败: {e}")
+        return 0
+
+def _iter_query(sql: str, params: list, batch_size: int) -> Iterator[List[tuple]]:
+    if _storage["mode"] == "memory":
+        # 不能在两批之间持有存储锁（会阻塞写事务），先在锁内读完（数据已在内存中）再分批返回
+        with get_connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        for start in range(0, len(rows), batch_size):
+            yield rows[start:start + batch_size]
+        return
+    conn = get_connection()
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        conn.close()
+
+def iter_names(batch_size: int = 1000) -> Iterator[List[Tuple[str]]]:
+    """按批次读取姓名 [(姓名,), ...]，内存占用与名单大小无关"""
+    return _iter_query(
+        "SELECT name FROM names ORDER BY name COLLATE NOCASE", [], batch_size)
+
+def iter_history(start: Optional[str] = None, end: Optional[str] = None,
+                 batch_size: int = 1000) -> Iterator[List[Tuple[str, str]]]:
+    """按批次读取点名历史 [(姓名, 时间), ...]（按时间先后），可按日期范围筛选"""
+    where, params = _history_range(start, end)
+    return _iter_query(f"""
+        SELECT name, strftime('%Y-%m-%d %H:%M:%S', called_time)
+        FROM history{where}
+        ORDER BY called_time, id
+    """, params, batch_size)
+
+def get_call_counts() -> Dict[str, int]:
+    """获取每个姓名的历史点名次数"""
+    try:
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT name, COUNT(*) FROM history GROUP BY name")
+            counts = dict(cursor.fetchall())
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"获取 {len(counts)} 个姓名的点名次数")
+            return counts
+    except sqlite3.Error as e:
+        logger.error(f"获取点名次数失败: {e}")
+        return {}
+
+def get_backup_dir() -> str:
+    """获取备份目录"""
+    backup_dir = os.path.join(get_app_data_dir(), 'backups')
+    os.makedirs(backup_dir, exist_ok=True)
+    return backup_dir
+
+def verify_database(path: str) -> bool:
+    """使用 PRAGMA quick_check 校验数据库文件"""
+    try:
+        conn = sqlite3.connect(path)
+        try:
+            result = conn.execute("PRAGMA quick_check").fetchone()[0]
+        finally:
+            conn.close()
+        if result != 'ok':
+            logger.error(f"数据库校验失败 {path}: {result}")
+        return result == 'ok'
+    except sqlite3.Error as e:
+        logger.error(f"数据库校验失败 {path}: {e}")
+        return False
+
+def backup_database(backup_path: str = None, pages: int = -1, sleep: float = 0.25) -> bool:
+    """
+    备份数据库到指定路径并校验
+    pages: 每一步复制的页数（-1表示一次复制完）；每一步只在复制期间持有源库的读锁，
+           WAL模式下读锁本来就不阻塞写入，分步复制主要是缩短单次读事务；
+           其他连接在两步之间写入源库时备份会从头重新开始
+    sleep: 某一步遇到 SQLITE_BUSY/SQLITE_LOCKED 时重试前等待的秒数（正常情况下两步之间不等待）
+    """
     try:
         if not backup_path:
-            backup_dir = os.path.join(get_app_data_dir(), 'backups')
-            os.makedirs(backup_dir, exist_ok=True)
             backup_path = os.path.join(
-                backup_dir,
+                get_backup_dir(),
                 f"names_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
             )
             
-        # 使用SQLite备份API
-        with sqlite3.connect(DB_PATH) as src:
-            with sqlite3.connect(backup_path) as dst:
-                src.backup(dst)
+        # 内存模式下先把修改写回磁盘，再从磁盘文件备份
+        flush_to_disk()
+        # 使用SQLite在线备份API
+        src = sqlite3.connect(DB_PATH)
+        dst = sqlite3.connect(backup_path)
+        try:
+            src.backup(dst, pages=pages, sleep=sleep)
+        finally:
+            dst.close()
+            src.close()
+        
+        if not verify_database(backup_path):
+            os.remove(backup_path)
+            return False
         logger.info(f"数据库备份成功: {backup_path}")
         return True
     except Exception as e:
         logger.error(f"数据库备份失败: {e}")
         return False
 
-# 初始化数据库（如果不存在）
-if not os.path.exists(DB_PATH):
-    try:
-        init_db()
-    except Exception as e:
-        logger.critical(f"程序启动失败 - 无法初始化数据库: {e}")
-        raise RuntimeError(f"无法初始化数据库: {e}")
+# 初始化数据库（建表语句均为IF NOT EXISTS，旧版本数据库会自动补齐新表）
+try:
+    init_db()
+except Exception as e:
+    logger.critical(f"程序启动失败 - 无法初始化数据库: {e}")
+    raise RuntimeError(f"无法初始化数据库: {e}")
+
+# 统计公开数据库函数的调用次数和耗时（未启用统计时几乎没有开销）
+registry.instrument(globals(), prefix="db.", exclude=(
+    'get_app_data_dir', 'get_db_path', 'normalize_name', 'iter_names', 'iter_history'
+))
+
+atexit.register(shutdown_storage)
@@ -0,0 +1,422 @@
+import logging
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.database import (
+    get_names, get_name_ids, record_called_names, get_call_counts,
+    get_called_history, get_cycle_bits, reset_cycle, get_attributes,
+    get_roster_version
+)
+from utils.rng import get_rng
+
+logger = logging.getLogger(__name__)
+
+class RecentWindow:
+    """最近K次点名的排除窗口（定长环形缓冲 + 计数哈希表，O(1)判断）"""
+
+    def __init__(self, size: int = 0):
+        self.size = max(0, size)
+        self.buffer = deque(maxlen=self.size)
+        self.counts: Dict[str, int] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.counts
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+    def push(self, name: str):
+        """记录一次点名，超出窗口的最早记录自动移出"""
+        if self.size == 0:
+            return
+        if len(self.buffer) == self.size:
+            oldest = self.buffer[0]
+            if self.counts[oldest] == 1:
+                del self.counts[oldest]
+            else:
+                self.counts[oldest] -= 1
+        self.buffer.append(name)
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    def extend(self, names: Iterable[str]):
+        for name in names:
+            self.push(name)
+
+    def resize(self, size: int):
+        """调整窗口大小，保留最近的记录"""
+        recent = list(self.buffer)
+        self.size = max(0, size)
+        self.buffer = deque(maxlen=self.size)
+        self.counts = {}
+        self.extend(recent[-self.size:] if self.size else [])
+
+    def seed_from_history(self):
+        """从历史记录末尾恢复窗口（重启后仍然生效）"""
+        if self.size == 0:
+            return
+        history = get_called_history(self.size)
+        self.extend(name for name, _ in reversed(history))
+        logger.info(f"从历史记录恢复最近 {len(self.buffer)} 次点名")
+
+    def filter(self, names: List[str]) -> List[str]:
+        """
+        返回不在窗口内的姓名
+        窗口覆盖了全部名单时，只排除最近的 len(names)-1 个不同姓名
+        """
+        pool = [name for name in names if name not in self.counts]
+        if pool or not names:
+            return pool
+
+        roster = set(names)
+        excluded = set()
+        for name in reversed(self.buffer):
+            if len(excluded) >= len(roster) - 1:
+                break
+            if name in roster:
+                excluded.add(name)
+        return [name for name in names if name not in excluded]
+
+# 可用作点名范围的属性最多取值数；学号、座位号这类几乎每人一个值的属性不建位图，
+# 否则位图内存为 O(取值数 × 名单人数)，点名范围下拉框也会多出上万个选项
+MAX_SCOPE_VALUES = 50
+# 取值数超过 MIN_UNIQUE_VALUES 且超过有该属性人数的 UNIQUE_RATIO 时视为近似唯一的属性
+MIN_UNIQUE_VALUES = 10
+UNIQUE_RATIO = 0.5
+
+def _is_scope_key(value_count: int, member_count: int) -> bool:
+    """属性是否适合作为点名范围（取值数较少，不是近似唯一的编号）"""
+    if value_count > MAX_SCOPE_VALUES:
+        return False
+    return value_count <= MIN_UNIQUE_VALUES or value_count <= member_count * UNIQUE_RATIO
+
+def _ids_to_bitmap(ids: Iterable[int]) -> int:
+    """将id集合转换为位图（Python int，第id位为1）"""
+    bits = bytearray()
+    for name_id in ids:
+        byte = name_id >> 3
+        if byte >= len(bits):
+            bits.extend(bytearray(byte + 1 - len(bits)))
+        bits[byte] |= 1 << (name_id & 7)
+    return int.from_bytes(bits, 'little')
+
+def _bitmap_to_bytes(bitmap: int) -> bytes:
+    return bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+
+class AttributeIndex:
+    """
+    姓名属性的位图索引：每个 (属性名, 属性值) 预先计算一个位图，
+    筛选时只做位图的与/或运算，不需要每次点名都查询数据库
+    取值过多的属性（见 _is_scope_key）不建位图，记录在 skipped 中
+    """
+
+    def __init__(self):
+        self.bitmaps: Dict[str, Dict[str, int]] = {}
+        self.skipped: List[str] = []
+        self.reload()
+
+    def reload(self):
+        """从数据库重建位图"""
+        ids: Dict[str, Dict[str, List[int]]] = {}
+        for name_id, key, value in get_attributes():
+            ids.setdefault(key, {}).setdefault(value, []).append(name_id)
+        self.bitmaps = {}
+        self.skipped = []
+        for key, values in ids.items():
+            if not _is_scope_key(len(values), sum(map(len, values.values()))):
+                self.skipped.append(key)
+                continue
+            self.bitmaps[key] = {value: _ids_to_bitmap(value_ids) for value, value_ids in values.items()}
+        logger.info(f"重建属性位图 {sum(map(len, self.bitmaps.values()))} 个")
+        if self.skipped:
+            logger.info(f"属性取值过多，不作为点名范围: {', '.join(sorted(self.skipped))}")
+
+    def keys(self) -> List[str]:
+        return sorted(self.bitmaps)
+
+    def values(self, key: str) -> List[str]:
+        return sorted(self.bitmaps.get(key, {}))
+
+    def bitmap(self, key: str, values: Iterable[str]) -> int:
+        """属性值为values中任意一个的姓名位图"""
+        result = 0
+        for value in values:
+            result |= self.bitmaps.get(key, {}).get(value, 0)
+        return result
+
+    def select(self, include: Optional[Dict[str, Iterable[str]]] = None,
+               exclude: Optional[Dict[str, Iterable[str]]] = None) -> Optional[int]:
+        """
+        按条件计算筛选位图：同一属性的多个值取并集，不同属性取交集，再去掉exclude命中的姓名
+        没有任何条件时返回None（不筛选）
+        """
+        if not include and not exclude:
+            return None
+        mask = -1  # 全1
+        for key, values in (include or {}).items():
+            mask &= self.bitmap(key, values)
+        for key, values in (exclude or {}).items():
+            mask &= ~self.bitmap(key, values)
+        return mask
+
+class DrawPool:
+    """
+    点名姓名池：名单 + 本轮已点位图（持久化在names.db中，跨会话延续）+ 最近点名排除窗口
+    """
+
+    def __init__(self, recent_size: int = 0):
+        self.recent = RecentWindow(recent_size)
+        self.recent.seed_from_history()
+        self.index = AttributeIndex()
+        self.include: Optional[Dict[str, List[str]]] = None
+        self.exclude: Optional[Dict[str, List[str]]] = None
+        self.scope: Optional[bytes] = None
+        self.reload()
+
+    def reload(self):
+        """重新读取名单、属性位图和本轮点名位图"""
+        self.released = False
+        self.version = get_roster_version()
+        self.roster: Dict[int, str] = dict(get_name_ids())
+        self.ids = {name: name_id for name_id, name in self.roster.items()}
+        self.called = get_cycle_bits()
+        self.index.reload()
+        self.set_filter(self.include, self.exclude)
+
+    def release(self):
+        """
+        释放名单、属性位图和本轮位图占用的内存（保留筛选条件和排除窗口），
+        再次使用前需要调用 reload
+        """
+        self.released = True
+        self.roster, self.ids = {}, {}
+        self.called = bytearray()
+        self.index.bitmaps = {}
+        self.scope = None
+
+    def apply_diff(self, diff: dict):
+        """
+        按名单变化（见 get_roster_changes）增量更新，不重新读取整个名单
+        在diff中补充姓名级别的变化，供持有姓名列表的界面使用：
+        removed_names: 被删除的姓名集合, renamed_names: {原姓名: 新姓名}
+        """
+        if diff.get("full"):
+            self.reload()
+            diff["removed_names"], diff["renamed_names"] = set(), {}
+            return
+
+        removed_names = set()
+        for name_id in diff["removed"]:
+            name = self.roster.pop(name_id, None)
+            if name is not None:
+                removed_names.add(name)
+                self.ids.pop(name, None)
+        renamed_names = {}
+        for name_id, name in diff["renamed"].items():
+            old = self.roster.get(name_id)
+            if old is not None and old != name:
+                renamed_names[old] = name
+                self.ids.pop(old, None)
+            self.roster[name_id] = name
+            self.ids[name] = name_id
+        for name_id, name in diff["added"].items():
+            self.roster[name_id] = name
+            self.ids[name] = name_id
+        self.version = diff["version"]
+
+        if diff.get("attributes_changed"):
+            self.index.reload()
+            self.set_filter(self.include, self.exclude)
+        elif diff["added"] and self.scope is not None:
+            self.set_filter(self.include, self.exclude)
+        diff["removed_names"], diff["renamed_names"] = removed_names, renamed_names
+
+    def set_filter(self, include: Optional[Dict[str, List[str]]] = None,
+                   exclude: Optional[Dict[str, List[str]]] = None):
+        """限定点名范围（见 AttributeIndex.select）"""
+        self.include, self.exclude = include, exclude
+        mask = self.index.select(include, exclude)
+        if mask is None:
+            self.scope = None
+        else:
+            # 负数表示只有exclude条件，截取到当前最大id即可
+            max_id = max(self.roster, default=0)
+            self.scope = _bitmap_to_bytes(mask & ((1 << (max_id + 1)) - 1))
+
+    def in_scope(self, name_id: int) -> bool:
+        if self.scope is None:
+            return True
+        byte = name_id >> 3
+        return byte < len(self.scope) and bool(self.scope[byte] >> (name_id & 7) & 1)
+
+    def names(self) -> List[str]:
+        """点名范围内的全部姓名"""
+        return [name for name_id, name in self.roster.items() if self.in_scope(name_id)]
+
+    def is_called(self, name_id: int) -> bool:
+        byte = name_id >> 3
+        return byte < len(self.called) and bool(self.called[byte] >> (name_id & 7) & 1)
+
+    def _mark(self, name: str):
+        name_id = self.ids.get(name)
+        if name_id is None:
+            return
+        byte = name_id >> 3
+        if byte >= len(self.called):
+            self.called.extend(bytearray(byte + 1 - len(self.called)))
+        self.called[byte] |= 1 << (name_id & 7)
+
+    def new_cycle(self):
+        """开始新一轮点名"""
+        reset_cycle()
+        self.called = bytearray()
+
+    def candidates(self) -> Tuple[List[str], bool]:
+        """
+        返回 (本轮尚未点到且不在排除窗口内的姓名, 是否属于新一轮)
+        本轮点完时返回全部姓名并标记为新一轮，但不修改数据库，新一轮在 record 记录结果时才开始
+        限定了范围时，范围内的人都点过后在范围内重复点名，不影响全体的本轮进度
+        """
+        remaining = [
+            name for name_id, name in self.roster.items()
+            if self.in_scope(name_id) and not self.is_called(name_id)
+        ]
+        new_cycle = False
+        if not remaining and self.roster:
+            new_cycle = self.scope is None
+            remaining = self.names()
+        return self.recent.filter(remaining), new_cycle
+
+    def available(self) -> List[str]:
+        """可以点到的姓名（见 candidates，只读）"""
+        return self.candidates()[0]
+
+    def cycle_exhausted(self) -> bool:
+        """未限定范围且本轮所有人都已点到"""
+        return self.scope is None and bool(self.roster) and all(
+            self.is_called(name_id) for name_id in self.roster)
+
+    def record(self, names: List[str], new_cycle: Optional[bool] = None, carried: int = 0) -> int:
+        """
+        在同一事务中记录点名结果并更新本轮位图和排除窗口
+        new_cycle/carried: 见 record_called_names；new_cycle 为None时，本轮已点完则先开始新一轮
+        """
+        if new_cycle is None:
+            new_cycle = self.cycle_exhausted()
+        recorded = record_called_names(names, reset_cycle=new_cycle, carried=carried)
+        if recorded:
+            if new_cycle:
+                self.called = bytearray()
+                names_in_cycle = names[carried:]
+            else:
+                names_in_cycle = names
+            for name in names_in_cycle:
+                self._mark(name)
+            self.recent.extend(names)
+        return recorded
+
+def patch_name_list(names: List[str], diff: dict, pool: DrawPool) -> List[str]:
+    """
+    按名单变化（已经过 DrawPool.apply_diff）修补未点到的姓名列表，保留原有顺序：
+    去掉被删除的姓名、替换被重命名的姓名，新加入且在点名范围内的姓名追加到末尾
+    """
+    removed = diff.get("removed_names", set())
+    renamed = diff.get("renamed_names", {})
+    patched = [renamed.get(name, name) for name in names if name not in removed]
+    patched.extend(
+        name for name_id, name in diff["added"].items() if pool.in_scope(name_id)
+    )
+    return patched
+
+def draw_names(k: int, pool: Optional[DrawPool] = None) -> List[str]:
+    """
+    一次抽取k个不重复的姓名，并在同一事务中记录
+    本轮剩余人数不足时先取完本轮姓名，再开始新一轮补足；
+    限定了点名范围时只在范围内补足，不清空全体的本轮进度
+    """
+    if k <= 0:
+        return []
+
+    if pool is None:
+        pool = DrawPool()
+
+    candidates = pool.available()
+    if len(candidates) >= k:
+        selected = get_rng().sample(candidates, k)
+        pool.record(selected)
+    else:
+        # 本轮剩余不够，先取完再从新一轮中补足
+        carried = list(candidates)
+        get_rng().shuffle(carried)
+        chosen = set(carried)
+        fresh = [name for name in pool.recent.filter(pool.names()) if name not in chosen]
+        selected = carried + get_rng().sample(fresh, min(k - len(carried), len(fresh)))
+        if pool.scope is None:
+            pool.record(selected, new_cycle=True, carried=len(carried))
+        else:
+            pool.record(selected, new_cycle=False)
+
+    if selected and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"批量抽取 {len(selected)} 人")
+    return selected
+
+def draw_stratified(key: str, per_value: int = 1,
+                    pool: Optional[DrawPool] = None) -> Dict[str, List[str]]:
+    """
+    分层抽取：属性key的每个取值各抽per_value人（在当前点名范围内），在同一事务中记录
+    """
+    if pool is None:
+        pool = DrawPool()
+
+    if key in pool.index.skipped:
+        logger.warning(f"属性 {key} 取值过多，不能按它分层抽取")
+    available = set(pool.available())
+    result = {}
+    for value in pool.index.values(key):
+        stratum = _bitmap_to_bytes(pool.index.bitmap(key, [value]))
+        members = [
+            name for name_id, name in pool.roster.items()
+            if (name_id >> 3) < len(stratum) and stratum[name_id >> 3] >> (name_id & 7) & 1
+            and pool.in_scope(name_id)
+        ]
+        # 优先从本轮未点到的人中抽取
+        candidates = [name for name in members if name in available] or members
+        result[value] = get_rng().sample(candidates, min(per_value, len(candidates)))
+
+    selected = [name for names in result.values() for name in names]
+    if selected:
+        pool.record(selected)
+        logger.info(f"按 {key} 分层抽取 {len(selected)} 人")
+    return result
+
+def partition_names(group_count: int, balance: bool = False,
+                    names: Optional[List[str]] = None) -> List[List[str]]:
+    """
+    将名单随机分成group_count个人数均衡的小组（各组人数最多相差1）
+    balance: 按历史点名次数均衡，使各组被点名次数的分布接近
+    """
+    if names is None:
+        names = get_names()
+    if group_count <= 0 or not names:
+        return []
+
+    if balance:
+        # 按点名次数分桶（桶内随机），再按次数从高到低蛇形发牌
+        counts = get_call_counts()
+        buckets = {}
+        for name in names:
+            buckets.setdefault(counts.get(name, 0), []).append(name)
+        ordered = []
+        for count in sorted(buckets, reverse=True):
+            bucket = buckets[count]
+            get_rng().shuffle(bucket)
+            ordered.extend(bucket)
+        groups = [[] for _ in range(group_count)]
+        for i, name in enumerate(ordered):
+            row, col = divmod(i, group_count)
+            groups[col if row % 2 == 0 else group_count - 1 - col].append(name)
+    else:
+        ordered = list(names)
+        get_rng().shuffle(ordered)
+        groups = [ordered[i::group_count] for i in range(group_count)]
+
+    logger.info(f"将 {len(names)} 人分为 {group_count} 组")
+    return groups
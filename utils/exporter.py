@@ -0,0 +1,53 @@
+import csv
+import logging
+from typing import Callable, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+class ExportCancelled(Exception):
+    """导出被取消"""
+
+def write_rows(file_path: str, file_type: str, header: Sequence[str],
+               batches: Iterable[List[tuple]],
+               progress: Optional[Callable[[int], None]] = None,
+               cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    逐批写出数据行，返回写出的行数（内存中只保留当前批次）
+    file_type: 'excel' / 'csv' / 'txt'（txt 每行一条记录，字段以制表符分隔，不写表头）
+    progress: 每写完一批后以累计行数回调
+    cancelled: 每批写出前检查，返回True时中止并抛出 ExportCancelled
+    """
+    written = 0
+
+    def rows():
+        nonlocal written
+        for batch in batches:
+            if cancelled and cancelled():
+                raise ExportCancelled()
+            yield from batch
+            written += len(batch)
+            if progress:
+                progress(written)
+
+    if file_type == 'excel':
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(list(header))
+        for row in rows():
+            sheet.append(list(row))
+        workbook.save(file_path)
+    elif file_type == 'csv':
+        with open(file_path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows())
+    else:  # txt
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for row in rows():
+                f.write('\t'.join(str(value) for value in row))
+                f.write('\n')
+
+    logger.info(f"成功导出 {written} 行到 {file_path}")
+    return written
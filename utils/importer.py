@@ -0,0 +1,200 @@
+import os
+import re
+import csv
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 表头中出现这些关键字的列视为姓名列
+NAME_HEADER_KEYWORDS = ('姓名', '名字', '学生', 'name', 'student')
+# 与这些完全相同的表头单元格优先于只包含关键字的单元格（如标题"2024级三班学生名单"）
+NAME_HEADERS = ('姓名', '名字', '学生', '学生姓名', 'name', 'student', 'student name', 'full name')
+# 用于检测表头和姓名列的前若干行
+DETECT_ROWS = 20
+
+_NAME_PATTERN = re.compile(r'^[一-鿿·]{2,6}$|^[A-Za-z][A-Za-z .\'-]{1,40}$')
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def _looks_like_name(text: str) -> bool:
+    return bool(_NAME_PATTERN.match(text))
+
+def _column_score(rows: List[list], col_index: int) -> int:
+    """该列中"像姓名"的单元格数"""
+    return sum(
+        1 for row in rows
+        if col_index < len(row) and _looks_like_name(_cell_text(row[col_index]))
+    )
+
+def _find_header(rows: List[list]) -> Optional[Tuple[int, int]]:
+    """
+    按关键字查找表头行和姓名列：单元格与 NAME_HEADERS 完全相同得2分，包含关键字得1分，
+    只有一个非空单元格的行（表格标题）不参与；包含关键字时还要求下面的行中该列有像姓名的值
+    """
+    best, best_score = None, 0
+    for row_index, row in enumerate(rows):
+        if sum(1 for value in row if _cell_text(value)) < 2:
+            continue
+        for col_index, value in enumerate(row):
+            text = _cell_text(value).lower()
+            if not text:
+                continue
+            if text in NAME_HEADERS:
+                score = 2
+            elif any(keyword in text for keyword in NAME_HEADER_KEYWORDS) \
+                    and _column_score(rows[row_index + 1:], col_index) > 0:
+                score = 1
+            else:
+                continue
+            if score > best_score:
+                best, best_score = (row_index, col_index), score
+        if best_score == 2:
+            break
+    return best
+
+def detect_layout(rows: List[list]) -> Tuple[Optional[int], int]:
+    """
+    根据前若干行检测表头行和姓名列
+    返回 (表头行号或None, 姓名列号)
+    优先按表头关键字匹配（见 _find_header），找不到时选取"像姓名"的单元格最多的列
+    """
+    found = _find_header(rows)
+    if found is not None:
+        return found
+
+    width = max((len(row) for row in rows), default=0)
+    best_col, best_score = 0, -1
+    for col_index in range(width):
+        score = _column_score(rows, col_index)
+        if score > best_score:
+            best_col, best_score = col_index, score
+
+    # 第一个像姓名的单元格上面一行不像姓名时，视为没有关键字的表头（其上的标题行一并跳过）
+    header = None
+    if best_score > 0:
+        first_name_row = next(
+            row_index for row_index, row in enumerate(rows)
+            if best_col < len(row) and _looks_like_name(_cell_text(row[best_col]))
+        )
+        if first_name_row > 0:
+            above = rows[first_name_row - 1]
+            if best_col < len(above) and _cell_text(above[best_col]):
+                header = first_name_row - 1
+    return header, best_col
+
+def _sheet_chunks(rows: Iterator[tuple], chunk_size: int
+                  ) -> Iterator[Tuple[List[str], List[Tuple[str, str, str]], int]]:
+    """对单个工作表的行流检测布局并分块输出 (姓名, 属性, 已读行数)"""
+    head = []
+    for row in rows:
+        head.append(row)
+        if len(head) >= DETECT_ROWS:
+            break
+    if not head:
+        return
+
+    header_row, name_col = detect_layout(head)
+    headers = {}
+    if header_row is not None:
+        headers = {
+            col: _cell_text(value)
+            for col, value in enumerate(head[header_row])
+            if col != name_col and _cell_text(value)
+        }
+        head = head[header_row + 1:]
+
+    names, attributes, count = [], [], 0
+
+    def consume(row):
+        nonlocal count
+        count += 1
+        if name_col >= len(row):
+            return
+        name = _cell_text(row[name_col])
+        if not name:
+            return
+        names.append(name)
+        for col, key in headers.items():
+            if col < len(row):
+                value = _cell_text(row[col])
+                if value:
+                    attributes.append((name, key, value))
+
+    for row in head:
+        consume(row)
+    for row in rows:
+        consume(row)
+        if len(names) >= chunk_size:
+            yield names, attributes, count
+            names, attributes, count = [], [], 0
+    if names or count:
+        yield names, attributes, count
+
+def count_excel_rows(file_path: str, merge_sheets: bool = True) -> int:
+    """读取工作簿记录的行数（只读取元数据，可能为0表示未知）"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = workbook.worksheets if merge_sheets else workbook.worksheets[:1]
+        return sum(sheet.max_row or 0 for sheet in sheets)
+    finally:
+        workbook.close()
+
+def sheet_names(file_path: str) -> List[str]:
+    """获取工作簿中的工作表名称"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+def iter_excel_names(file_path: str, merge_sheets: bool = True, chunk_size: int = 5000
+                     ) -> Iterator[Tuple[List[str], List[Tuple[str, str, str]], int]]:
+    """
+    以只读模式流式读取Excel，逐块返回 (姓名列表, 属性列表, 本块读取的行数)
+    每个工作表单独检测表头和姓名列，merge_sheets为False时只读取第一个工作表
+    """
+    if os.path.splitext(file_path)[1].lower() == '.xls':
+        raise ValueError("流式导入仅支持 .xlsx 文件")
+
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        sheets = workbook.worksheets if merge_sheets else workbook.worksheets[:1]
+        for sheet in sheets:
+            logger.info(f"读取工作表: {sheet.title}")
+            yield from _sheet_chunks(sheet.iter_rows(values_only=True), chunk_size)
+    finally:
+        workbook.close()
+
+def iter_csv_names(file_path: str, chunk_size: int = 5000
+                   ) -> Iterator[Tuple[List[str], List[Tuple[str, str, str]], int]]:
+    """流式读取CSV，自动识别表头和姓名列，逐块返回 (姓名列表, 属性列表, 本块读取的行数)"""
+    with open(file_path, 'r', encoding='utf-8-sig', newline='') as f:
+        yield from _sheet_chunks(iter(csv.reader(f)), chunk_size)
+
+def iter_txt_names(file_path: str, chunk_size: int = 5000
+                   ) -> Iterator[Tuple[List[str], List[Tuple[str, str, str]], int]]:
+    """流式读取每行一个姓名的文本文件，逐块返回 (姓名列表, [], 本块读取的行数)"""
+    with open(file_path, 'r', encoding='utf-8-sig') as f:
+        names, count = [], 0
+        for line in f:
+            count += 1
+            name = line.strip()
+            if name:
+                names.append(name)
+            if len(names) >= chunk_size:
+                yield names, [], count
+                names, count = [], 0
+        if names or count:
+            yield names, [], count
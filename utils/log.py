@@ -0,0 +1,74 @@
+import os
+import json
+import queue
+import atexit
+import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+from utils.database import get_app_data_dir
+
+DEFAULT_LOGGING_CONFIG = {
+    "level": "INFO",
+    "file": "app.log",
+    "max_bytes": 1048576,
+    "backup_count": 5,
+    "console": False
+}
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(threadName)s - %(levelname)s - %(message)s'
+
+_listener: Optional[QueueListener] = None
+
+def load_logging_config(config_path: str) -> dict:
+    """从配置文件读取logging项（读取失败时使用默认值）"""
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("logging", {})
+    except (OSError, ValueError):
+        return {}
+
+def setup_logging(config: Optional[dict] = None) -> QueueListener:
+    """
+    配置全局日志（只需在程序入口调用一次，重复调用会先停止之前的配置）
+    各线程只把日志记录放入队列，由后台监听线程写入按大小轮换的日志文件，
+    低于配置级别的日志（如点名热路径上的DEBUG日志）在调用处即被过滤
+    """
+    global _listener
+    shutdown_logging()
+    config = dict(DEFAULT_LOGGING_CONFIG, **(config or {}))
+
+    log_file = config["file"]
+    if not os.path.isabs(log_file):
+        log_file = os.path.join(get_app_data_dir(), log_file)
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=config["max_bytes"], backupCount=config["backup_count"], encoding='utf-8'
+    )
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    handlers = [file_handler]
+    if config["console"]:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(log_queue))
+    root.setLevel(getattr(logging, str(config["level"]).upper(), logging.INFO))
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def shutdown_logging():
+    """停止后台写日志线程，写完队列中剩余的日志并关闭文件"""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = None
+
+atexit.register(shutdown_logging)
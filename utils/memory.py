@@ -0,0 +1,54 @@
+import gc
+import sys
+import ctypes
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+def rss_bytes() -> Optional[int]:
+    """当前进程的常驻内存（字节），无法获取时返回None"""
+    try:
+        if sys.platform == 'win32':
+            from ctypes import wintypes
+
+            class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+                _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                            ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                            ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+            counters = PROCESS_MEMORY_COUNTERS()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.WorkingSetSize
+            return None
+        with open('/proc/self/statm') as f:
+            import resource
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError, ValueError, IndexError, ImportError):
+        return None
+
+def trim_memory():
+    """
+    回收垃圾对象并把空闲的堆内存归还给操作系统
+    （Python释放的内存通常留在分配器中，不主动归还时常驻内存不会下降）
+    """
+    gc.collect()
+    try:
+        if sys.platform == 'win32':
+            # 把工作集中的页换出，需要时再按需调入
+            ctypes.windll.kernel32.SetProcessWorkingSetSize(
+                ctypes.windll.kernel32.GetCurrentProcess(), ctypes.c_size_t(-1), ctypes.c_size_t(-1))
+        elif sys.platform.startswith('linux'):
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError) as e:
+        logger.debug(f"归还空闲内存失败: {e}")
+
+def format_bytes(size: Optional[int]) -> str:
+    if size is None:
+        return "未知"
+    return f"{size / 1048576:.1f} MB"
@@ -0,0 +1,162 @@
+import json
+import math
+import time
+import threading
+import functools
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+# 直方图桶按对数划分：每个2倍区间分为 BUCKETS_PER_OCTAVE 个桶，百分位相对误差约 9%
+BUCKETS_PER_OCTAVE = 8
+# 直方图记录的最小值（毫秒），更小的值计入第一个桶
+MIN_VALUE_MS = 0.001
+
+class Histogram:
+    """对数分桶的延迟直方图（毫秒），内存占用与样本数无关"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets: Dict[int, int] = {}
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        index = int(math.log2(max(value, MIN_VALUE_MS) / MIN_VALUE_MS) * BUCKETS_PER_OCTAVE)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def percentile(self, p: float) -> float:
+        """第p百分位（0~100），返回所在桶的上界，不超过最大值"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * p / 100))
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = MIN_VALUE_MS * 2 ** ((index + 1) / BUCKETS_PER_OCTAVE)
+                return min(upper, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+class MetricsRegistry:
+    """
+    计数器和延迟直方图的注册表
+    未启用时 incr/observe 只做一次布尔判断，timed 包装的函数直接调用原函数
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started = time.time()
+
+    def set_enabled(self, enabled: bool):
+        self.enabled = bool(enabled)
+
+    def reset(self):
+        with self._lock:
+            self.counters = {}
+            self.histograms = {}
+            self.started = time.time()
+
+    def incr(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float):
+        """记录一个样本（延迟类指标单位为毫秒）"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """记录代码块耗时（毫秒）"""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - start) * 1000)
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        """装饰器：记录函数调用次数和耗时，异常计入 name.errors"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    self.incr(f"{name}.errors")
+                    raise
+                finally:
+                    self.observe(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    def instrument(self, namespace: dict, prefix: str, exclude: tuple = ()) -> List[str]:
+        """
+        用 timed 包装命名空间（通常是模块的 globals()）中定义的全部公开函数
+        只包装在该模块中定义的函数，返回被包装的函数名
+        """
+        module = namespace.get('__name__')
+        wrapped = []
+        for attr, value in list(namespace.items()):
+            if (attr.startswith('_') or attr in exclude or not callable(value)
+                    or isinstance(value, type) or getattr(value, '__module__', None) != module):
+                continue
+            namespace[attr] = self.timed(f"{prefix}{attr}")(value)
+            wrapped.append(attr)
+        return wrapped
+
+    def snapshot(self) -> dict:
+        """当前全部指标的汇总（可直接序列化为JSON）"""
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "uptime_s": time.time() - self.started,
+                "counters": dict(self.counters),
+                "histograms": {name: h.summary() for name, h in sorted(self.histograms.items())},
+            }
+
+    def dump(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+# 全局注册表
+registry = MetricsRegistry()
+
+def configure_metrics(config: Optional[dict] = None):
+    """按配置启用或停用指标统计"""
+    registry.set_enabled((config or {}).get("enabled", False))
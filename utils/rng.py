@@ -0,0 +1,48 @@
+import random
+import secrets
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RNG_CONFIG = {
+    "mode": "default",  # default: 系统熵播种的梅森旋转; seeded: 按种子可复现; secure: 操作系统密码学随机源（secrets）
+    "seed": ""          # seeded 模式的种子，为空时每次启动随机生成并写入日志
+}
+
+RNG_MODES = ("default", "seeded", "secure")
+
+# 点名代码使用的随机数引擎（random.Random 接口：choice/sample/shuffle）
+_engine = {"rng": random.Random(), "mode": "default", "seed": None}
+
+def get_rng() -> random.Random:
+    """当前的随机数引擎，点名相关代码统一通过它取随机数"""
+    return _engine["rng"]
+
+def configure_rng(config: Optional[dict] = None) -> random.Random:
+    """
+    按配置（config.json 中的 rng 项）切换随机数引擎
+    seeded 模式下，用日志中的种子和点名前的数据库备份可以复现同一次会话的点名结果
+    """
+    config = dict(DEFAULT_RNG_CONFIG, **(config or {}))
+    mode = config["mode"]
+    if mode not in RNG_MODES:
+        logger.warning(f"未知的随机数模式 {mode!r}，使用 default")
+        mode = "default"
+
+    seed = None
+    if mode == "seeded":
+        seed = str(config["seed"]) or secrets.token_hex(8)
+        rng = random.Random(seed)
+        logger.info(f"随机数引擎: seeded，种子 {seed}")
+    elif mode == "secure":
+        rng = secrets.SystemRandom()
+        logger.info("随机数引擎: secure（操作系统随机源）")
+    else:
+        rng = random.Random()
+    _engine.update(rng=rng, mode=mode, seed=seed)
+    return rng
+
+def rng_info() -> dict:
+    """当前引擎的模式和种子（非 seeded 模式种子为None）"""
+    return {"mode": _engine["mode"], "seed": _engine["seed"]}
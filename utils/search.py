@@ -0,0 +1,124 @@
+import bisect
+import logging
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from pypinyin import lazy_pinyin, Style
+except ImportError:  # 见 requirements.txt；缺少时只能按姓名本身搜索
+    lazy_pinyin = None
+
+logger = logging.getLogger(__name__)
+
+# 索引每个姓名长度为1~GRAM的全部子串
+GRAM = 3
+
+_pinyin_warned = False
+
+def _warn_missing_pinyin():
+    """未安装pypinyin时提示一次（拼音首字母搜索不可用）"""
+    global _pinyin_warned
+    if lazy_pinyin is None and not _pinyin_warned:
+        _pinyin_warned = True
+        logger.warning("未安装pypinyin，拼音首字母搜索不可用（pip install pypinyin）")
+
+def pinyin_initials(name: str) -> str:
+    """姓名的拼音首字母（如 张三 -> zs），未安装pypinyin时返回空字符串"""
+    if lazy_pinyin is None:
+        return ''
+    return ''.join(lazy_pinyin(name, style=Style.FIRST_LETTER)).lower()
+
+def _name_keys(name: str) -> List[str]:
+    """姓名的可搜索形式：小写姓名和拼音首字母"""
+    keys = [name.casefold()]
+    initials = pinyin_initials(name)
+    if initials:
+        keys.append(initials)
+    return keys
+
+def _grams(keys: List[str]) -> Set[str]:
+    grams = set()
+    for key in keys:
+        for size in range(1, GRAM + 1):
+            for start in range(len(key) - size + 1):
+                grams.add(key[start:start + size])
+    return grams
+
+class NameIndex:
+    """
+    名单的子串倒排索引：每个长度不超过GRAM的子串对应包含它的行号列表（升序）
+    查询不超过GRAM个字符时直接命中倒排表，更长的查询取各三元组倒排表的交集后再校验
+    支持逐个追加、删除和重命名，删除后行号不变（该行的keys为None）
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        self.build(names)
+
+    def build(self, names: Iterable[str]):
+        """重建索引，行号即names中的位置"""
+        _warn_missing_pinyin()
+        self.keys: List[Optional[List[str]]] = []
+        self.postings: Dict[str, List[int]] = {}
+        self.removed = 0
+        for name in names:
+            self.add(name)
+        logger.debug(f"构建搜索索引 {len(self.keys)} 个姓名, {len(self.postings)} 个子串")
+
+    def __len__(self) -> int:
+        return len(self.keys) - self.removed
+
+    def add(self, name: str) -> int:
+        """追加一个姓名，返回它的行号"""
+        row = len(self.keys)
+        keys = _name_keys(name)
+        self.keys.append(keys)
+        for gram in _grams(keys):
+            self.postings.setdefault(gram, []).append(row)
+        return row
+
+    def remove(self, row: int):
+        """删除一行，之后的查询不再返回它"""
+        keys = self.keys[row]
+        if keys is None:
+            return
+        for gram in _grams(keys):
+            rows = self.postings[gram]
+            del rows[bisect.bisect_left(rows, row)]
+            if not rows:
+                del self.postings[gram]
+        self.keys[row] = None
+        self.removed += 1
+
+    def update(self, row: int, name: str):
+        """重命名一行（行号不变）"""
+        self.remove(row)
+        self.removed -= 1
+        keys = _name_keys(name)
+        self.keys[row] = keys
+        for gram in _grams(keys):
+            bisect.insort(self.postings.setdefault(gram, []), row)
+
+    def matches(self, row: int, query: str) -> bool:
+        """第row行的姓名或拼音首字母是否包含query"""
+        keys = self.keys[row]
+        query = query.strip().casefold()
+        return keys is not None and any(query in key for key in keys)
+
+    def search(self, query: str) -> List[int]:
+        """返回姓名或拼音首字母包含query的行号（升序，新列表）"""
+        query = query.strip().casefold()
+        if not query:
+            return [row for row, keys in enumerate(self.keys) if keys is not None]
+        if len(query) <= GRAM:
+            return list(self.postings.get(query, []))
+
+        grams = {query[i:i + GRAM] for i in range(len(query) - GRAM + 1)}
+        lists = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+        candidates = set(lists[0])
+        for rows in lists[1:]:
+            candidates.intersection_update(rows)
+            if not candidates:
+                return []
+        return sorted(
+            row for row in candidates
+            if any(query in key for key in self.keys[row])
+        )
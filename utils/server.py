@@ -0,0 +1,320 @@
+import hmac
+import json
+import base64
+import asyncio
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Set
+from urllib.parse import urlsplit, parse_qs
+from utils.database import get_names, get_roster_version, get_called_history
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SERVER_CONFIG = {
+    "enabled": False,
+    "host": "127.0.0.1",
+    "port": 8765,
+    "token": "",          # 非空时所有请求（包括 /events）需要携带 ?token= 或 X-Token 请求头；
+                          # 监听非本机地址时必须设置
+    "queue_size": 64      # 每个订阅者待发送事件的上限，慢客户端丢弃最旧的事件
+}
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC11B65"
+MAX_HEADER_BYTES = 8192
+MAX_BODY_BYTES = 65536
+# 不设置令牌时只允许监听这些地址
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 403: "Forbidden",
+               404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+# 手机等设备直接打开的控制页面
+INDEX_HTML = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width">
+<title>随机点名</title>
+<style>body{font-family:sans-serif;text-align:center}#name{font-size:48px;margin:40px 0}
+button{font-size:24px;padding:12px 36px}</style></head>
+<body><div id="name">-</div>
+<input id="k" type="number" value="1" min="1" style="font-size:24px;width:80px">
+<button onclick="draw()">点名</button>
+<script>
+const token = new URLSearchParams(location.search).get("token") || "";
+function draw() {
+  fetch("/draw?k=" + document.getElementById("k").value + "&token=" + encodeURIComponent(token),
+        {method: "POST"});
+}
+const ws = new WebSocket("ws://" + location.host + "/events?token=" + encodeURIComponent(token));
+ws.onmessage = e => {
+  const event = JSON.parse(e.data);
+  if (event.names) document.getElementById("name").textContent = event.names.join("  ");
+};
+</script></body></html>"""
+
+def ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+def ws_frame(opcode: int, payload: bytes, mask: Optional[bytes] = None) -> bytes:
+    """构造一个完整的WebSocket帧（客户端发送时需要mask）"""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header.append(mask_bit | length)
+    elif length < 65536:
+        header.append(mask_bit | 126)
+        header += length.to_bytes(2, 'big')
+    else:
+        header.append(mask_bit | 127)
+        header += length.to_bytes(8, 'big')
+    if mask:
+        header += mask
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return bytes(header) + payload
+
+async def ws_read_frame(reader: asyncio.StreamReader):
+    """读取一个WebSocket帧，返回 (opcode, payload)"""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = int.from_bytes(await reader.readexactly(2), 'big')
+    elif length == 127:
+        length = int.from_bytes(await reader.readexactly(8), 'big')
+    if length > MAX_BODY_BYTES:
+        raise ValueError("WebSocket帧过大")
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+    return opcode, payload
+
+class DrawServer:
+    """
+    局域网点名服务：在独立线程的asyncio事件循环中提供HTTP接口和WebSocket事件推送
+
+    GET  /          控制页面
+    GET  /roster    名单 {"version", "names"}
+    GET  /history   点名历史 ?limit=N
+    POST /draw      抽取 ?k=N，on_draw 返回姓名时直接返回结果，返回None时结果通过事件推送
+    GET  /events    WebSocket，推送 publish 发布的点名事件（JSON文本帧）
+
+    设置了令牌时每个请求都要携带令牌；Origin 与 Host 不一致的跨站请求一律拒绝
+    数据库读写和 on_draw 都在线程池中执行，不阻塞事件循环
+    """
+
+    def __init__(self, config: Optional[dict] = None,
+                 on_draw: Optional[Callable[[int], Optional[List[str]]]] = None):
+        self.config = dict(DEFAULT_SERVER_CONFIG, **(config or {}))
+        self.on_draw = on_draw
+        self.port = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._subscribers: Dict[asyncio.Queue, asyncio.StreamWriter] = {}
+        self._connections: Set[asyncio.Task] = set()
+        self._ready = threading.Event()
+        self._thread = None
+        self._error = None
+
+    # ---- 线程管理 ----
+
+    def start(self) -> int:
+        """在后台线程中启动服务，返回实际监听的端口（配置端口为0时由系统分配）"""
+        if self._thread is not None:
+            return self.port
+        if not self.config["token"] and self.config["host"] not in LOOPBACK_HOSTS:
+            raise ValueError(f"监听 {self.config['host']} 时必须设置 token，否则局域网内任何人都能抽取和读取名单")
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._run, name="DrawServer", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            self._thread.join()
+            self._thread = None
+            raise self._error
+        logger.info(f"点名服务已启动 http://{self.config['host']}:{self.port}/")
+        return self.port
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join()
+        self._thread = None
+        logger.info("点名服务已停止")
+
+    def _run(self):
+        try:
+            asyncio.run(self._serve())
+        except Exception as e:
+            logger.error(f"点名服务启动失败: {e}")
+            self._error = e
+            self._ready.set()
+
+    async def _serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(
+            self._handle, self.config["host"], self.config["port"], limit=MAX_HEADER_BYTES)
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        async with server:
+            await self._stopping.wait()
+            # 通知订阅者关闭连接，避免等待连接关闭时阻塞
+            for writer in list(self._subscribers.values()):
+                writer.write(ws_frame(0x8, b""))
+                writer.close()
+            if self._connections:
+                await asyncio.wait(self._connections, timeout=1)
+
+    # ---- 事件推送 ----
+
+    def publish(self, event: dict):
+        """发布事件给所有WebSocket订阅者（可在任意线程调用）"""
+        loop = self._loop
+        if loop is None or not self._subscribers:
+            return
+        loop.call_soon_threadsafe(self._broadcast, json.dumps(event, ensure_ascii=False))
+
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def _broadcast(self, message: str):
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    # ---- HTTP ----
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+            lines = head.decode('latin-1').split("\r\n")
+            method, target, _ = lines[0].split(" ", 2)
+            headers = {}
+            for line in lines[1:]:
+                if ":" in line:
+                    key, value = line.split(":", 1)
+                    headers[key.strip().lower()] = value.strip()
+            length = int(headers.get("content-length", 0) or 0)
+            if length > MAX_BODY_BYTES:
+                await self._respond(writer, 413, {"error": "请求过大"})
+                return
+            if length:
+                await reader.readexactly(length)
+
+            url = urlsplit(target)
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if not self._authorized(query, headers):
+                await self._respond(writer, 403, {"error": "令牌无效"})
+                return
+            if url.path == "/events" and headers.get("upgrade", "").lower() == "websocket":
+                await self._websocket(reader, writer, headers)
+                return
+            status, body = await self._route(method, url.path, query, headers)
+            await self._respond(writer, status, body)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        except ValueError:
+            await self._respond(writer, 400, {"error": "请求格式错误"})
+        except Exception as e:
+            logger.error(f"处理请求出错: {e}")
+            await self._respond(writer, 500, {"error": str(e)})
+        finally:
+            writer.close()
+            self._connections.discard(task)
+
+    def _authorized(self, query: dict, headers: dict) -> bool:
+        """检查跨站来源和令牌（令牌用常量时间比较）"""
+        origin = headers.get("origin")
+        if origin and urlsplit(origin).netloc != headers.get("host"):
+            return False
+        token = self.config["token"]
+        if not token:
+            return True
+        supplied = query.get("token") or headers.get("x-token") or ""
+        return hmac.compare_digest(supplied.encode('utf-8'), token.encode('utf-8'))
+
+    async def _route(self, method: str, path: str, query: dict, headers: dict):
+        run = self._loop.run_in_executor
+        if path == "/" and method == "GET":
+            return 200, INDEX_HTML
+        if path == "/roster" and method == "GET":
+            version = await run(None, get_roster_version)
+            names = await run(None, get_names)
+            return 200, {"version": version, "names": names}
+        if path == "/history" and method == "GET":
+            limit = max(1, min(int(query.get("limit", 50)), 1000))
+            history = await run(None, get_called_history, limit)
+            return 200, [{"name": name, "time": time} for name, time in history]
+        if path == "/draw":
+            if method != "POST":
+                return 405, {"error": "请使用POST"}
+            if self.on_draw is None:
+                return 409, {"error": "未启用抽取"}
+            k = max(1, int(query.get("k", 1)))
+            names = await run(None, self.on_draw, k)
+            if names is None:
+                return 202, {"status": "rolling"}
+            return 200, {"names": names}
+        return 404, {"error": "未找到"}
+
+    async def _respond(self, writer: asyncio.StreamWriter, status: int, body):
+        if isinstance(body, str):
+            data, content_type = body.encode('utf-8'), "text/html; charset=utf-8"
+        else:
+            data, content_type = json.dumps(body, ensure_ascii=False).encode('utf-8'), \
+                "application/json; charset=utf-8"
+        writer.write(
+            f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            "Connection: close\r\n\r\n".encode('latin-1') + data
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    # ---- WebSocket ----
+
+    async def _websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: dict):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self._respond(writer, 400, {"error": "缺少 Sec-WebSocket-Key"})
+            return
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {ws_accept_key(key)}\r\n\r\n".encode('latin-1')
+        )
+        await writer.drain()
+
+        queue = asyncio.Queue(self.config["queue_size"])
+        self._subscribers[queue] = writer
+        sender = asyncio.create_task(self._ws_send(writer, queue))
+        try:
+            while not sender.done():
+                opcode, payload = await ws_read_frame(reader)
+                if opcode == 0x8:  # 关闭
+                    break
+                if opcode == 0x9:  # ping
+                    writer.write(ws_frame(0xA, payload))
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self._subscribers.pop(queue, None)
+            sender.cancel()
+            if not writer.is_closing():
+                writer.write(ws_frame(0x8, b""))
+
+    async def _ws_send(self, writer: asyncio.StreamWriter, queue: asyncio.Queue):
+        while True:
+            message = await queue.get()
+            writer.write(ws_frame(0x1, message.encode('utf-8')))
+            await writer.drain()
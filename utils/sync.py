@@ -0,0 +1,129 @@
+import os
+import hashlib
+import logging
+from typing import Dict, List, Optional, Tuple
+from utils.database import get_name_keys, get_name_ids, get_attributes, normalize_name, sync_roster
+from utils.importer import iter_excel_names, iter_csv_names, iter_txt_names
+
+logger = logging.getLogger(__name__)
+
+SOURCE_READERS = {
+    '.xlsx': iter_excel_names,
+    '.csv': iter_csv_names,
+    '.txt': iter_txt_names,
+}
+
+DEFAULT_SYNC_CONFIG = {
+    "source": "",
+    "debounce_ms": 500
+}
+
+def file_digest(file_path: str) -> str:
+    """文件内容摘要，用于跳过内容未变化的修改通知"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_source(file_path: str) -> Dict[str, Tuple[str, List[Tuple[str, str]]]]:
+    """
+    读取名单源文件，返回 {去重键: (姓名, [(属性名, 属性值), ...])}
+    去重键相同的多行只保留第一行的姓名，属性合并
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext not in SOURCE_READERS:
+        raise ValueError(f"不支持的名单源文件类型: {ext}")
+
+    rows = {}
+    for names, attributes, _ in SOURCE_READERS[ext](file_path):
+        keys = {}
+        for name in names:
+            key = keys[name] = normalize_name(name)
+            rows.setdefault(key, (name, []))
+        for name, key, value in attributes:
+            rows[keys[name]][1].append((key, value))
+    return rows
+
+def row_hash(name: str, attributes: List[Tuple[str, str]]) -> bytes:
+    """一行（姓名及其属性）的摘要，属性顺序不影响结果"""
+    text = '\x1f'.join([name] + [f"{key}={value}" for key, value in sorted(attributes)])
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest()
+
+def stored_hashes(current: Dict[str, str]) -> Dict[str, bytes]:
+    """
+    按数据库中当前的姓名和属性计算各行摘要 {去重键: 摘要}
+    启动后第一次同步时用它代替上次同步的摘要，内容没有变化的行不会重新写入属性
+    """
+    names = dict(get_name_ids())
+    pairs: Dict[int, List[Tuple[str, str]]] = {}
+    for name_id, key, value in get_attributes():
+        pairs.setdefault(name_id, []).append((key, value))
+    by_name = {name: pairs.get(name_id, []) for name_id, name in names.items()}
+    return {key: row_hash(name, by_name.get(name, [])) for key, name in current.items()}
+
+def compute_delta(rows: Dict[str, Tuple[str, List[Tuple[str, str]]]],
+                  current: Dict[str, str],
+                  hashes: Dict[str, bytes]
+                  ) -> Tuple[List[str], List[str], Dict[str, List[Tuple[str, str]]], Dict[str, bytes]]:
+    """
+    比较源文件各行与当前名单 {去重键: 姓名}
+    返回 (需要添加的姓名, 需要删除的姓名, 需要替换属性的 {姓名: 属性}, 新的行摘要)
+    只有摘要与上次同步不同的行才会重新写入属性
+    """
+    new_hashes = {}
+    added, attributes = [], {}
+    for key, (name, pairs) in rows.items():
+        digest = row_hash(name, pairs)
+        new_hashes[key] = digest
+        if key not in current:
+            added.append(name)
+            if pairs:
+                attributes[name] = pairs
+        elif hashes.get(key) != digest:
+            attributes[current[key]] = pairs
+    removed = [name for key, name in current.items() if key not in rows]
+    return added, removed, attributes, new_hashes
+
+class SourceSync:
+    """
+    关联名单源文件：源文件变化后对比各行摘要与当前名单，
+    只把新增、删除的姓名和有变化的属性在一个事务中写入数据库
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.digest = None
+        self.hashes: Dict[str, bytes] = {}
+
+    def sync(self) -> Optional[Tuple[int, int, int]]:
+        """
+        同步一次，返回 (新增数量, 删除数量, 写入属性数量)
+        文件内容未变化、文件为空或读取失败时返回None
+        """
+        try:
+            digest = file_digest(self.source)
+            if digest == self.digest:
+                return None
+            rows = read_source(self.source)
+        except Exception as e:  # 文件可能正在被写入或格式不完整
+            logger.error(f"读取名单源文件失败 {self.source}: {e}")
+            return None
+
+        if not rows:
+            # 文件可能正在被写入，不把名单清空
+            logger.warning(f"名单源文件为空，跳过同步: {self.source}")
+            return None
+
+        current = get_name_keys()
+        if not self.hashes:
+            self.hashes = stored_hashes(current)
+        added, removed, attributes, hashes = compute_delta(rows, current, self.hashes)
+        result = sync_roster(added, removed, attributes)
+        if result is None:
+            # 写入失败，保留上次的摘要，下次变化时重新比较
+            return None
+        self.digest = digest
+        self.hashes = hashes
+        logger.info(f"名单源文件已同步 {self.source}: {len(rows)} 行")
+        return result